@@ -6,10 +6,12 @@ to track workspace events for the activity feed.
 
 Requirements: 2.7, 2.8, 2.9, 8.2, 8.3
 """
+import uuid
+
 from .models import Activity
 
 
-def log_activity(workspace, activity_type, description, metadata=None):
+def log_activity(workspace, activity_type, description, metadata=None, deferred=False):
     """
     Create an activity record for workspace event logging.
     
@@ -18,32 +20,43 @@ def log_activity(workspace, activity_type, description, metadata=None):
         activity_type: Type of activity (memory_created, conversation_created, etc.)
         description: Human-readable description of the activity
         metadata: Optional dictionary with additional activity data
+        deferred: Insert in the background after the transaction commits
+                  (see side_effects) instead of during the request
         
     Returns:
-        Activity: Created activity instance
+        Activity: Created activity instance (not yet saved when deferred)
         
     Requirements: 2.8, 8.2, 8.3
     """
     if metadata is None:
         metadata = {}
     
-    activity = Activity.objects.create(
+    activity = Activity(
         workspace=workspace,
         type=activity_type,
         description=description,
         metadata=metadata
     )
     
+    if deferred:
+        from .side_effects import defer_activity
+        # bulk_create does not call save(), so assign the id here
+        activity.id = f"activity-{uuid.uuid4().hex[:12]}"
+        defer_activity(activity)
+    else:
+        activity.save()
+    
     return activity
 
 
-def log_memory_created(workspace, memory):
+def log_memory_created(workspace, memory, deferred=False):
     """
     Log memory creation activity.
     
     Args:
         workspace: Workspace model instance
         memory: Memory model instance
+        deferred: Insert after the transaction commits (batched with other activities)
         
     Returns:
         Activity: Created activity instance
@@ -57,7 +70,8 @@ def log_memory_created(workspace, memory):
         metadata={
             'memoryId': memory.id,
             'memoryTitle': memory.title
-        }
+        },
+        deferred=deferred
     )
 
 
@@ -86,7 +100,7 @@ def log_conversation_created(workspace, conversation):
     )
 
 
-def log_message_sent(workspace, conversation, message):
+def log_message_sent(workspace, conversation, message, deferred=False):
     """
     Log message sending activity.
     
@@ -94,6 +108,7 @@ def log_message_sent(workspace, conversation, message):
         workspace: Workspace model instance
         conversation: Conversation model instance
         message: ChatMessage model instance
+        deferred: Insert after the response is sent (chat hot path)
         
     Returns:
         Activity: Created activity instance
@@ -113,7 +128,8 @@ def log_message_sent(workspace, conversation, message):
             'conversationId': conversation.id,
             'messageId': message.id,
             'role': message.role
-        }
+        },
+        deferred=deferred
     )
 
 
@@ -12,5 +12,8 @@ class ApiConfig(AppConfig):
         """
         Import signals when app is ready
         This enables automatic memory indexing on create/update/delete
+        
+        Import job handlers so the worker can find them by name
         """
         import api.signals
+        import api.jobs
@@ -0,0 +1,319 @@
+"""
+Archive Import - Import every supported file of a zip or tar archive as memories
+One upload replaces hundreds of single-file imports. The endpoint stores the
+archive in the database (ArchiveUpload), where the worker service can read it,
+and the imports.archive background job imports it. The stored archive is
+deleted once the job has run or when it is cancelled.
+
+- Entries are read one at a time, in archive order (tar archives as a stream,
+  so compressed tarballs are never decompressed whole). Each entry is spooled
+  to memory or, past FILE_UPLOAD_MAX_MEMORY_SIZE, to a temporary file.
+- Entries are parsed with the file_parser parsers on a thread pool
+  (ARCHIVE_IMPORT_WORKERS). At most two entries per worker wait in the queue,
+  so memory stays bounded however large the archive is. Long PDFs are
+  extracted on the PDF process pool (see pdf_extract).
+- New memories are written every ARCHIVE_IMPORT_BATCH_SIZE files (see
+  import_service.save_memories).
+- Directories, links, hidden files, unsupported types and entries larger than
+  FILE_IMPORT_MAX_SIZE are skipped. The import stops after
+  ARCHIVE_IMPORT_MAX_FILES files or ARCHIVE_IMPORT_MAX_TOTAL_SIZE uncompressed
+  bytes, which also bounds zip bombs.
+"""
+import logging
+import os
+import tarfile
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import timedelta
+from typing import Callable, Dict, Any, Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchiveUpload, ArchiveUploadChunk, Job
+from .file_parser import parse_upload, is_supported_file, MAX_FILE_SIZE, CHUNK_SIZE
+from .import_service import build_file_memories, save_memories
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+# Bytes per ArchiveUploadChunk row
+STORE_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Stored archives without a queued or running job are deleted after this long
+UPLOAD_MAX_AGE = 24 * 3600
+
+
+def archive_extension(filename: str) -> Optional[str]:
+    """The archive extension of filename (e.g. '.tar.gz'), or None if it is not an archive"""
+    name = filename.lower()
+    for ext in sorted(ARCHIVE_EXTENSIONS, key=len, reverse=True):
+        if name.endswith(ext):
+            return ext
+    return None
+
+
+def store_archive(uploaded_file, user=None) -> ArchiveUpload:
+    """Store an uploaded archive in the database for the import job, one chunk row at a time"""
+    with transaction.atomic():
+        upload = ArchiveUpload.objects.create(filename=uploaded_file.name[:255], user=user)
+        size = 0
+        for index, chunk in enumerate(uploaded_file.chunks(STORE_CHUNK_SIZE)):
+            ArchiveUploadChunk.objects.create(upload=upload, index=index, data=chunk)
+            size += len(chunk)
+        upload.size = size
+        upload.save(update_fields=['size'])
+    return upload
+
+
+def spool_archive(upload_id: str) -> str:
+    """
+    Copy a stored archive to a local temporary file (zip needs a seekable file).
+    The caller removes it.
+
+    Raises:
+        ValueError: if the upload no longer exists
+    """
+    upload = ArchiveUpload.objects.filter(id=upload_id).first()
+    if upload is None:
+        raise ValueError('Archive upload not found')
+
+    handle, path = tempfile.mkstemp(suffix=archive_extension(upload.filename) or '')
+    try:
+        with os.fdopen(handle, 'wb') as out:
+            chunks = ArchiveUploadChunk.objects.filter(upload_id=upload_id).order_by('index')
+            for data in chunks.values_list('data', flat=True).iterator(chunk_size=1):
+                out.write(data)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+def delete_archive(upload_id: str) -> None:
+    """Delete a stored archive (no-op if it is already gone)"""
+    if upload_id:
+        ArchiveUpload.objects.filter(id=upload_id).delete()
+
+
+def prune_archives(max_age: float = UPLOAD_MAX_AGE) -> int:
+    """Delete stored archives left behind by import jobs that never finished (e.g. a worker crash)"""
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    active = Job.objects.filter(name='imports.archive', status__in=['queued', 'running']).values_list(
+        'payload__upload_id', flat=True
+    )
+    _, deleted = ArchiveUpload.objects.filter(created_at__lt=cutoff).exclude(id__in=list(active)).delete()
+    return deleted.get(ArchiveUpload._meta.label, 0)
+
+
+def iter_entries(path: str) -> Iterator[Tuple[str, int, Any]]:
+    """
+    Yield (name, size, stream) for each regular file in a zip or tar archive.
+    A stream is only readable until the next entry is requested.
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                with archive.open(info) as stream:
+                    yield info.filename, info.file_size, stream
+        return
+
+    try:
+        archive = tarfile.open(path, mode='r|*')
+    except tarfile.TarError:
+        raise ValueError('Not a zip or tar archive')
+    with archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            yield member.name, member.size, archive.extractfile(member)
+
+
+def _spool(stream, limit: int):
+    """Copy an entry to a spooled temporary file. Returns (file, size), or (None, size) past limit."""
+    spooled = tempfile.SpooledTemporaryFile(max_size=getattr(settings, 'FILE_UPLOAD_MAX_MEMORY_SIZE', 1024 * 1024))
+    size = 0
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > limit:
+            # Sizes in the archive's index can lie; trust what was read
+            spooled.close()
+            return None, size
+        spooled.write(chunk)
+    spooled.seek(0)
+    return spooled, size
+
+
+def _skip_reason(name: str, size: int) -> Optional[str]:
+    parts = name.replace('\\', '/').split('/')
+    if parts[0] == '__MACOSX' or parts[-1].startswith('.'):
+        return 'hidden'
+    if not is_supported_file(name):
+        return 'unsupported'
+    if size > MAX_FILE_SIZE:
+        return 'too large'
+    return None
+
+
+class ArchiveImport:
+    """One archive import: reads entries, parses them on a pool and saves memories in batches"""
+
+    def __init__(self, workspace, path: str, archive_name: str, should_summarize: bool = False,
+                 on_progress: Callable[..., None] = None):
+        self.workspace = workspace
+        self.path = path
+        self.archive_name = archive_name
+        self.should_summarize = should_summarize
+        self.on_progress = on_progress
+        self.workers = getattr(settings, 'ARCHIVE_IMPORT_WORKERS', 4)
+        self.batch_size = getattr(settings, 'ARCHIVE_IMPORT_BATCH_SIZE', 50)
+        self.max_files = getattr(settings, 'ARCHIVE_IMPORT_MAX_FILES', 2000)
+        self.max_total_size = getattr(settings, 'ARCHIVE_IMPORT_MAX_TOTAL_SIZE', 1024 * 1024 * 1024)
+
+        self.pending = []
+        self.results = []
+        self.stats = {'files': 0, 'imported': 0, 'failed': 0, 'skipped': 0, 'chunks': 0}
+        self.limited = False
+
+    def parse_entry(self, name: str, spooled, size: int) -> Dict[str, Any]:
+        """Parse one entry into unsaved memories (runs on the pool)"""
+        try:
+            upload = File(spooled, name=os.path.basename(name))
+            upload.size = size
+            result = parse_upload(upload, name)
+            if not result['success']:
+                return result
+            memories = build_file_memories(
+                self.workspace, name, result, size, self.should_summarize,
+                extra_metadata={'archive': self.archive_name}
+            )
+            return {'success': True, 'memories': memories}
+        finally:
+            spooled.close()
+
+    def handle(self, name: str, result: Dict[str, Any]) -> None:
+        if not result['success']:
+            self.stats['failed'] += 1
+            self.results.append({'path': name, 'success': False, 'error': result['error']})
+            return
+
+        memories = result['memories']
+        memory = memories[0]
+        self.pending.extend(memories)
+        self.stats['imported'] += 1
+        self.stats['chunks'] += len(memories) - 1
+        self.results.append({'path': name, 'success': True, 'memoryId': memory.id, 'title': memory.title})
+        if self.stats['imported'] % self.batch_size == 0:
+            self.flush()
+
+    def flush(self) -> None:
+        batch, self.pending = self.pending, []
+        save_memories(self.workspace, batch)
+
+    def report_progress(self) -> None:
+        if self.on_progress:
+            self.on_progress(**self.stats)
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Import the archive
+
+        Returns:
+            dict with file counts (files, imported, failed, skipped, chunks),
+            limited (a file or size limit stopped the import), elapsedMs,
+            filesPerSecond and per-file results
+        """
+        started = time.monotonic()
+        total_size = 0
+        in_flight = {}
+
+        def drain(until: int) -> None:
+            while len(in_flight) > until:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {'success': False, 'error': f'Failed to parse file: {str(e)[:100]}'}
+                    self.handle(name, result)
+                self.report_progress()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='archive') as executor:
+                try:
+                    for name, size, stream in iter_entries(self.path):
+                        if _skip_reason(name, size):
+                            self.stats['skipped'] += 1
+                            continue
+                        if self.stats['files'] >= self.max_files or total_size + size > self.max_total_size:
+                            self.limited = True
+                            break
+
+                        spooled, read = _spool(stream, MAX_FILE_SIZE)
+                        total_size += read
+                        if spooled is None:
+                            self.stats['skipped'] += 1
+                            continue
+
+                        self.stats['files'] += 1
+                        drain(self.workers * 2 - 1)
+                        in_flight[executor.submit(self.parse_entry, name, spooled, read)] = name
+                finally:
+                    drain(0)
+        except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError) as e:
+            # Keep what was imported before the archive turned out to be damaged
+            self.flush()
+            logger.warning(f"⚠️ Archive {self.archive_name} is damaged: {str(e)}")
+            return {'success': False, 'error': f'Could not read archive: {str(e)}', **self.stats}
+
+        self.flush()
+        self.report_progress()
+
+        elapsed = time.monotonic() - started
+        files_per_second = self.stats['files'] / elapsed if elapsed else 0
+        logger.info(
+            f"🗂️ Imported archive {self.archive_name} into {self.workspace.id} in {elapsed:.2f}s "
+            f"({files_per_second:.1f} files/s): {self.stats['imported']} imported, "
+            f"{self.stats['failed']} failed, {self.stats['skipped']} skipped"
+        )
+
+        return {
+            'success': True,
+            **self.stats,
+            'limited': self.limited,
+            'elapsedMs': round(elapsed * 1000),
+            'filesPerSecond': round(files_per_second, 2),
+            'results': self.results,
+        }
+
+
+def import_archive(workspace, path: str, archive_name: str, should_summarize: bool = False,
+                   on_progress: Callable[..., None] = None) -> Dict[str, Any]:
+    """
+    Import the supported files of a stored zip or tar archive as memories
+
+    Args:
+        workspace: Workspace model instance
+        path: Archive on disk (see spool_archive)
+        archive_name: Uploaded filename, kept in each memory's metadata
+        should_summarize: Summarize long files that are not chunked
+        on_progress: Called with keyword counts as files finish
+
+    Returns:
+        See ArchiveImport.run, or success False and error if the archive is unreadable
+    """
+    try:
+        return ArchiveImport(workspace, path, archive_name, should_summarize, on_progress).run()
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}
@@ -0,0 +1,89 @@
+"""
+Auto-Recall - Relevance-based memory retrieval for each chat turn
+For conversations with auto_recall enabled, the user's message is searched
+against the workspace memories in a background thread as soon as the request
+arrives. The search overlaps with saving the message and looking up the
+provider integration, and build_context only waits for whatever is left of
+the time budget, so recall adds no serial latency to the turn.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Dict, Any, List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .memory_service import memory_service
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class RecallTask:
+    """Handle on a running recall search"""
+
+    def __init__(self, future, started_at: float, budget: float):
+        self.future = future
+        self.started_at = started_at
+        self.budget = budget
+
+    def result(self) -> List[Dict[str, Any]]:
+        """
+        Wait for the search until its budget (counted from the start) runs out
+
+        Returns:
+            Matching memories, or [] if the search did not finish in time
+        """
+        remaining = self.started_at + self.budget - time.monotonic()
+        try:
+            return self.future.result(timeout=max(0.0, remaining))
+        except TimeoutError:
+            self.future.cancel()
+            logger.info(f"⏱️ Auto-recall exceeded {self.budget * 1000:.0f}ms, continuing without it")
+            return []
+        except Exception as e:
+            logger.warning(f"⚠️ Auto-recall failed: {str(e)}")
+            return []
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'AUTO_RECALL_WORKERS', 4),
+                thread_name_prefix='auto-recall'
+            )
+        return _executor
+
+
+def _search(query: str, workspace_id: str, top_k: int, budget: float) -> List[Dict[str, Any]]:
+    # Worker threads keep their own DB connection; drop it if it went stale
+    close_old_connections()
+    min_score = getattr(settings, 'AUTO_RECALL_MIN_SCORE', 0.2)
+    results = memory_service.search(query, top_k=top_k, workspace_id=workspace_id, time_budget=budget)
+    return [r for r in results if r['score'] >= min_score]
+
+
+def start_recall(conversation, query: str) -> Optional[RecallTask]:
+    """
+    Start searching the workspace memories for a message
+
+    Args:
+        conversation: Conversation model instance
+        query: User message text
+
+    Returns:
+        RecallTask, or None if auto-recall is off for the conversation
+    """
+    if not conversation.auto_recall or not query.strip():
+        return None
+
+    budget = getattr(settings, 'AUTO_RECALL_TIMEOUT_MS', 20) / 1000.0
+    top_k = getattr(settings, 'AUTO_RECALL_TOP_K', 3)
+    future = _get_executor().submit(_search, query, conversation.workspace_id, top_k, budget)
+    return RecallTask(future, time.monotonic(), budget)
@@ -0,0 +1,254 @@
+"""
+Browser Pool - Long-lived headless Chromium for advanced (Playwright) scraping
+Launching Chromium costs seconds, so one browser per process is started on first
+use and shared by every advanced scrape.
+
+- Playwright objects belong to the thread that created them, so the pool runs the
+  async API on its own event loop thread; callers block on the result.
+- At most BROWSER_POOL_MAX_PAGES pages are open at once.
+- Every fetch gets a fresh browser context (cheap next to a launch), so no
+  cookies, localStorage, sessionStorage or IndexedDB carry over between
+  imports of different users. The browser is restarted after
+  BROWSER_POOL_BROWSER_PAGES pages and shut down after BROWSER_POOL_IDLE_TIMEOUT
+  seconds without work, so memory stays bounded.
+- Images, fonts and media are not downloaded (BROWSER_POOL_BLOCKED_RESOURCES).
+- Instead of networkidle plus a fixed sleep, a page is read as soon as its text
+  stops changing.
+"""
+import asyncio
+import atexit
+import logging
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Dict, Any, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0'
+NAVIGATION_TIMEOUT_MS = 30000
+
+# Body text is considered loaded once its length is unchanged for STABLE_CHECKS
+# polls STABLE_INTERVAL_MS apart (or STABLE_TIMEOUT_MS passes)
+STABLE_INTERVAL_MS = 150
+STABLE_CHECKS = 3
+STABLE_TIMEOUT_MS = 5000
+
+CONTENT_SELECTORS = ['main', 'article', '.content', '#content', '.post', '.entry', '[role="main"]']
+
+WAIT_FOR_STABLE_JS = """
+(opts) => new Promise(resolve => {
+    const started = Date.now();
+    let last = -1;
+    let stable = 0;
+    const check = () => {
+        const length = document.body ? document.body.innerText.length : 0;
+        stable = (length > 0 && length === last) ? stable + 1 : 0;
+        last = length;
+        if (stable >= opts.checks || Date.now() - started > opts.timeout) {
+            resolve(length);
+        } else {
+            setTimeout(check, opts.interval);
+        }
+    };
+    check();
+})
+"""
+
+EXTRACT_JS = """
+(selectors) => {
+    for (const selector of selectors) {
+        const el = document.querySelector(selector);
+        if (el && el.innerText && el.innerText.trim().length > 100) {
+            return el.innerText;
+        }
+    }
+    return document.body ? document.body.innerText : '';
+}
+"""
+
+
+class BrowserPool:
+    """Shared headless browser with a page cap and one isolated context per fetch"""
+
+    def __init__(self, max_pages: int, browser_pages: int, idle_timeout: float, blocked_resources):
+        self.max_pages = max_pages
+        self.browser_pages = browser_pages
+        self.idle_timeout = idle_timeout
+        self.blocked_resources = set(blocked_resources)
+
+        self._loop = None
+        self._start_lock = threading.Lock()
+        self._playwright = None
+        self._browser = None
+        self._browser_lock = None
+        self._page_slots = None
+        self._browser_page_count = 0
+        self._active = 0
+        self._last_used = time.monotonic()
+        self.stats = {'pages': 0, 'errors': 0, 'launches': 0, 'contexts': 0}
+
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._loop is not None:
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                self._browser_lock = asyncio.Lock()
+                self._page_slots = asyncio.Semaphore(self.max_pages)
+                ready.set()
+                loop.run_forever()
+
+            threading.Thread(target=run, name='browser-pool', daemon=True).start()
+            ready.wait()
+            asyncio.run_coroutine_threadsafe(self._reap_idle(), loop)
+            atexit.register(self.close)
+            self._loop = loop
+            return loop
+
+    async def _close_browser(self) -> None:
+        browser, self._browser = self._browser, None
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception as e:
+                logger.warning(f"⚠️ Error closing browser: {str(e)}")
+
+    async def _get_browser(self):
+        async with self._browser_lock:
+            if self._browser is not None:
+                # Restart a long-lived browser only when this is the sole open page
+                worn_out = self._browser_page_count >= self.browser_pages and self._active == 1
+                if worn_out or not self._browser.is_connected():
+                    await self._close_browser()
+
+            if self._browser is None:
+                from playwright.async_api import async_playwright
+
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                started = time.monotonic()
+                self._browser = await self._playwright.chromium.launch(headless=True)
+                self._browser_page_count = 0
+                self.stats['launches'] += 1
+                logger.info(f"🌐 Launched Chromium for the browser pool in {time.monotonic() - started:.2f}s")
+            return self._browser
+
+    async def _route(self, route):
+        if route.request.resource_type in self.blocked_resources:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _new_context(self, browser):
+        context = await browser.new_context(user_agent=USER_AGENT, viewport={'width': 1280, 'height': 720})
+        if self.blocked_resources:
+            await context.route('**/*', self._route)
+        self.stats['contexts'] += 1
+        return context
+
+    async def _close_context(self, context) -> None:
+        try:
+            await context.close()
+        except Exception as e:
+            logger.warning(f"⚠️ Error closing browser context: {str(e)}")
+
+    async def _fetch(self, url: str) -> Tuple[str, str]:
+        async with self._page_slots:
+            self._active += 1
+            try:
+                browser = await self._get_browser()
+                context = await self._new_context(browser)
+                try:
+                    page = await context.new_page()
+                    await page.goto(url, wait_until='domcontentloaded', timeout=NAVIGATION_TIMEOUT_MS)
+                    try:
+                        await page.evaluate(WAIT_FOR_STABLE_JS, {
+                            'interval': STABLE_INTERVAL_MS,
+                            'checks': STABLE_CHECKS,
+                            'timeout': STABLE_TIMEOUT_MS,
+                        })
+                    except Exception as e:
+                        # e.g. a client-side redirect replaced the document; read what is there
+                        logger.debug(f"Stability wait interrupted on {url}: {str(e)}")
+                    title = await page.title()
+                    text = await page.evaluate(EXTRACT_JS, CONTENT_SELECTORS)
+                finally:
+                    # Closing the context closes its page and discards all of its storage
+                    await self._close_context(context)
+
+                self._browser_page_count += 1
+                self.stats['pages'] += 1
+                return title, text
+            except Exception:
+                self.stats['errors'] += 1
+                raise
+            finally:
+                self._active -= 1
+                self._last_used = time.monotonic()
+
+    async def _reap_idle(self) -> None:
+        while True:
+            await asyncio.sleep(min(30, self.idle_timeout))
+            if self._browser is None or self._active:
+                continue
+            if time.monotonic() - self._last_used < self.idle_timeout:
+                continue
+            async with self._browser_lock:
+                if self._active == 0 and self._browser is not None:
+                    await self._close_browser()
+                    logger.info("🌐 Closed idle browser pool")
+
+    def fetch(self, url: str) -> Tuple[str, str]:
+        """
+        Render a page and read its main text
+
+        Returns:
+            (title, text) with the text not yet cleaned
+        """
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._fetch(url), loop)
+        # Navigation and stability timeouts, plus time waiting for a free page
+        timeout = (NAVIGATION_TIMEOUT_MS + STABLE_TIMEOUT_MS) / 1000.0 + 30
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise
+
+    async def _shutdown(self) -> None:
+        await self._close_browser()
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def close(self) -> None:
+        """Close the browser (at process exit)"""
+        if self._loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=10)
+        except Exception as e:
+            logger.warning(f"⚠️ Error shutting down browser pool: {str(e)}")
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'running': self._browser is not None,
+            'activePages': self._active,
+            'maxPages': self.max_pages,
+        }
+
+
+browser_pool = BrowserPool(
+    max_pages=getattr(settings, 'BROWSER_POOL_MAX_PAGES', 4),
+    browser_pages=getattr(settings, 'BROWSER_POOL_BROWSER_PAGES', 500),
+    idle_timeout=getattr(settings, 'BROWSER_POOL_IDLE_TIMEOUT', 300),
+    blocked_resources=getattr(settings, 'BROWSER_POOL_BLOCKED_RESOURCES', ['image', 'font', 'media']),
+)
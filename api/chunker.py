@@ -0,0 +1,184 @@
+"""
+Chunker - Split long documents into overlapping, structure-aware chunks
+Long imports are stored as a parent memory plus one child memory per chunk (see
+import_service.chunk_document), so search and auto-recall can return only
+the relevant part of a document.
+
+Text is read as markdown-like blocks, the shape the file parser produces:
+- '#' heading lines start a new section. A chunk never ends on a heading, and
+  a chunk starting mid-section repeats the section heading for context.
+- Paragraphs (separated by blank lines) are kept whole when they fit.
+- Tables (consecutive ' | ' rows) are split between rows, and every piece
+  repeats the header row.
+- Oversized paragraphs are split on lines, then sentences, then words.
+Consecutive chunks of the same section overlap by about CHUNK_OVERLAP
+characters. Small sections are packed together into one chunk.
+"""
+import re
+from typing import Dict, Any, List
+
+from django.conf import settings
+
+_HEADING = re.compile(r'^(#{1,6})\s+(\S.*)$')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+class Block:
+    """A unit the chunker will not split: heading, paragraph (piece) or table rows"""
+
+    def __init__(self, text: str, kind: str, heading: str = ''):
+        self.text = text
+        self.kind = kind  # 'heading', 'text' or 'table'
+        self.heading = heading  # Heading line of the section the block is in
+
+
+def _is_table(lines: List[str]) -> bool:
+    return len(lines) > 1 and all(' | ' in line for line in lines)
+
+
+def _split_long(text: str, max_chars: int) -> List[str]:
+    """Split text on lines, then sentences, then words, into pieces of at most max_chars"""
+    for pattern in ('\n', _SENTENCE_END, ' '):
+        parts = text.split(pattern) if isinstance(pattern, str) else pattern.split(text)
+        if len(parts) == 1:
+            continue
+        joiner = pattern if isinstance(pattern, str) else ' '
+        pieces = []
+        current = ''
+        for part in parts:
+            candidate = f'{current}{joiner}{part}' if current else part
+            if len(candidate) <= max_chars:
+                current = candidate
+                continue
+            if current:
+                pieces.append(current)
+            if len(part) > max_chars:
+                pieces.extend(_split_long(part, max_chars))
+                current = ''
+            else:
+                current = part
+        if current:
+            pieces.append(current)
+        return pieces
+    return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+
+
+def split_blocks(text: str, max_chars: int) -> List[Block]:
+    """Read text into blocks no longer than max_chars"""
+    blocks = []
+    heading = ''
+    for paragraph in re.split(r'\n{2,}', text):
+        lines = [line for line in paragraph.split('\n') if line.strip()]
+        body = []
+        for line in lines:
+            match = _HEADING.match(line)
+            if match:
+                if body:
+                    blocks.extend(_body_blocks(body, heading, max_chars))
+                    body = []
+                heading = line.strip()
+                blocks.append(Block(heading, 'heading', heading))
+            else:
+                body.append(line)
+        if body:
+            blocks.extend(_body_blocks(body, heading, max_chars))
+    return blocks
+
+
+def _body_blocks(lines: List[str], heading: str, max_chars: int) -> List[Block]:
+    text = '\n'.join(lines)
+    if len(text) <= max_chars:
+        return [Block(text, 'table' if _is_table(lines) else 'text', heading)]
+
+    if _is_table(lines):
+        header, rows = lines[0], lines[1:]
+        blocks = []
+        current = [header]
+        size = len(header)
+        for row in rows:
+            if size + len(row) + 1 > max_chars and len(current) > 1:
+                blocks.append(Block('\n'.join(current), 'table', heading))
+                current = [header]
+                size = len(header)
+            current.append(row[:max_chars])
+            size += len(row) + 1
+        if len(current) > 1:
+            blocks.append(Block('\n'.join(current), 'table', heading))
+        return blocks
+
+    return [Block(piece, 'text', heading) for piece in _split_long(text, max_chars)]
+
+
+def _overlap_tail(block: Block, overlap: int) -> str:
+    """The end of a block to repeat at the start of the next chunk"""
+    if block.kind != 'text' or overlap <= 0:
+        return ''
+    if len(block.text) <= overlap:
+        return block.text
+    tail = block.text[-overlap:]
+    # Start at a sentence or word boundary
+    match = _SENTENCE_END.search(tail)
+    if match and match.end() < len(tail):
+        return tail[match.end():]
+    space = tail.find(' ')
+    return tail[space + 1:] if space != -1 else tail
+
+
+def chunk_text(text: str, max_chars: int = None, overlap: int = None) -> List[Dict[str, Any]]:
+    """
+    Split a document into chunks
+
+    Args:
+        text: Document text (paragraphs separated by blank lines)
+        max_chars: Target chunk size (default CHUNK_MAX_CHARS); headings and
+            overlap may add a little
+        overlap: Characters repeated between consecutive chunks of a section
+            (default CHUNK_OVERLAP)
+
+    Returns:
+        List of {'index', 'heading', 'content'}
+    """
+    if max_chars is None:
+        max_chars = getattr(settings, 'CHUNK_MAX_CHARS', 2000)
+    if overlap is None:
+        overlap = getattr(settings, 'CHUNK_OVERLAP', 200)
+    min_chars = max_chars // 4
+
+    chunks = []
+    current: List[Block] = []
+    size = 0
+
+    def emit():
+        # Never end a chunk on headings: they move to the next chunk
+        trailing = []
+        while current and current[-1].kind == 'heading':
+            trailing.insert(0, current.pop())
+        if current:
+            first = current[0]
+            parts = [block.text for block in current]
+            if first.kind != 'heading' and first.heading:
+                parts.insert(0, first.heading)
+            chunks.append({
+                'index': len(chunks),
+                'heading': _HEADING.match(first.heading).group(2) if first.heading else '',
+                'content': '\n\n'.join(parts),
+            })
+        return trailing
+
+    for block in split_blocks(text, max_chars):
+        starts_section = block.kind == 'heading'
+        too_big = current and size + len(block.text) > max_chars
+        if too_big or (starts_section and size >= min_chars):
+            last = current[-1] if current else None
+            current[:] = emit()
+            size = sum(len(b.text) for b in current)
+            if too_big and not starts_section and last is not None and last.heading == block.heading:
+                tail = _overlap_tail(last, overlap)
+                if tail and size + len(tail) + len(block.text) <= max_chars + overlap:
+                    current.append(Block(tail, 'text', last.heading))
+                    size += len(tail)
+        current.append(block)
+        size += len(block.text)
+
+    emit()
+    return chunks
@@ -93,7 +93,7 @@ def cleanup_user_data(user: User) -> dict:
 def run_scheduled_cleanup():
     """
     Run cleanup for all users whose retention period has expired.
-    This should be called by a scheduled task (e.g., celery beat, cron job).
+    Runs daily as the periodic 'cleanup.retention' job (see jobs.py).
     """
     now = timezone.now()
     cleanup_results = []
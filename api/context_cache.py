@@ -0,0 +1,162 @@
+"""
+Context Cache - Per-conversation cache of the pieces build_context assembles
+Holds the rendered injected-memory block and the recent-history window so a chat
+turn normally assembles its context without touching the database.
+
+- History is updated incrementally when a message is saved (see signals.py)
+  and dropped when a message is deleted.
+- The memory block is dropped when an injection is added, toggled or removed,
+  or when an injected memory is edited.
+
+Invalidation runs in the process that made the change, so the cache is only
+enabled by default when it is shared (REDIS_URL); with the per-process
+fallback, other web workers and the job worker would keep serving stale
+entries.
+"""
+import logging
+import threading
+from collections import namedtuple
+from typing import List, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = 'default'
+MEMORY_KEY_PREFIX = 'ctx-mem'
+HISTORY_KEY_PREFIX = 'ctx-hist'
+
+# Messages of history sent with each turn
+HISTORY_WINDOW = 5
+
+# Injected memories included in the prompt, and characters kept from each
+MAX_INJECTED_MEMORIES = 5
+MAX_MEMORY_CHARS = 1000
+
+# Lightweight stand-in for ChatMessage in the cached history window
+HistoryMessage = namedtuple('HistoryMessage', ['id', 'role', 'content'])
+
+_append_lock = threading.Lock()
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def is_enabled() -> bool:
+    return getattr(settings, 'CONTEXT_CACHE_ENABLED', False)
+
+
+def _timeout() -> int:
+    return getattr(settings, 'CONTEXT_CACHE_TTL', 1800)
+
+
+def render_memories(items: List[Tuple[str, str]], heading: str = 'Injected Context') -> str:
+    """Render a block of (title, content) memories for the system prompt"""
+    if not items:
+        return ""
+
+    memories_text = f"\n\n=== {heading} ===\n"
+    for title, content in items:
+        # Truncate long memories
+        memories_text += f"\n[{title}]\n{content[:MAX_MEMORY_CHARS]}\n"
+    memories_text += "\n=== End Context ===\n"
+    return memories_text
+
+
+def get_injected(conversation) -> Tuple[List[str], str]:
+    """
+    Get the active injected memory IDs and their rendered block for a conversation
+
+    One query on a cache miss, none on a hit.
+    """
+    key = f"{MEMORY_KEY_PREFIX}:{conversation.id}"
+    if is_enabled():
+        cached = _cache().get(key)
+        if cached is not None:
+            return cached
+
+    # Stable order keeps the system prompt byte-identical across turns, so
+    # providers can serve it from their prompt (prefix) cache
+    links = conversation.injected_memory_links.select_related('memory').filter(
+        is_active=True
+    ).order_by('injected_at', 'id')[:MAX_INJECTED_MEMORIES]
+    memories = [link.memory for link in links]
+    injected = (
+        [memory.id for memory in memories],
+        render_memories([(memory.title, memory.content) for memory in memories])
+    )
+
+    if is_enabled():
+        _cache().set(key, injected, timeout=_timeout())
+    return injected
+
+
+def get_memories_text(conversation) -> str:
+    """Get the rendered injected-memory block for a conversation"""
+    return get_injected(conversation)[1]
+
+
+def get_history(conversation) -> List[HistoryMessage]:
+    """
+    Get the last HISTORY_WINDOW messages of a conversation, oldest first
+
+    One query on a cache miss, none on a hit.
+    """
+    key = f"{HISTORY_KEY_PREFIX}:{conversation.id}"
+    if is_enabled():
+        cached = _cache().get(key)
+        if cached is not None:
+            return cached
+
+    rows = conversation.messages.order_by('-timestamp').values_list('id', 'role', 'content')[:HISTORY_WINDOW]
+    history = [HistoryMessage(*row) for row in reversed(rows)]
+
+    if is_enabled():
+        _cache().set(key, history, timeout=_timeout())
+    return history
+
+
+def append_message(conversation_id: str, message) -> None:
+    """
+    Add a newly saved message to the cached history window (if cached)
+
+    A missing window is left alone: the next turn loads it from the database.
+    """
+    if not is_enabled():
+        return
+
+    key = f"{HISTORY_KEY_PREFIX}:{conversation_id}"
+    with _append_lock:
+        history = _cache().get(key)
+        if history is None:
+            return
+        if any(entry.id == message.id for entry in history):
+            return
+        history = (history + [HistoryMessage(message.id, message.role, message.content)])[-HISTORY_WINDOW:]
+        _cache().set(key, history, timeout=_timeout())
+
+
+def invalidate_history(conversation_id: str) -> None:
+    """Drop the cached history window (after a message is edited or deleted)"""
+    _cache().delete(f"{HISTORY_KEY_PREFIX}:{conversation_id}")
+
+
+def invalidate_memories(conversation_ids) -> None:
+    """Drop the cached memory block of one or more conversations"""
+    if isinstance(conversation_ids, str):
+        conversation_ids = [conversation_ids]
+    keys = [f"{MEMORY_KEY_PREFIX}:{conversation_id}" for conversation_id in conversation_ids]
+    if keys:
+        _cache().delete_many(keys)
+
+
+def invalidate_memory_everywhere(memory_id: str) -> None:
+    """Drop the memory block of every conversation that injects a memory"""
+    from .models import ConversationMemory
+
+    conversation_ids = list(
+        ConversationMemory.objects.filter(memory_id=memory_id).values_list('conversation_id', flat=True)
+    )
+    invalidate_memories(conversation_ids)
@@ -0,0 +1,137 @@
+"""
+Fetch Cache - Conditional GET and parse reuse for basic URL scraping
+Every successful basic scrape stores the response validators (ETag /
+Last-Modified), a hash of the body and the extracted text in UrlFetchCache.
+
+- A repeat fetch of the URL is conditional. A 304, or a body identical to the
+  cached one, skips BeautifulSoup and reuses the stored text.
+- A body seen before under any URL (in any workspace) reuses that parse too.
+- Callers compare content_hash with the memory they created last time to skip
+  creating a duplicate (see import_service).
+
+The cache is best effort: a database error here never fails the import.
+"""
+import hashlib
+import logging
+from datetime import timedelta
+from typing import Dict, Any
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.utils import timezone
+
+from .models import UrlFetchCache
+from .url_scraper import fetch_url, parse_html, content_hash
+
+logger = logging.getLogger(__name__)
+
+
+def url_hash(url: str) -> str:
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+def _cached_result(url: str, entry: UrlFetchCache, cache_status: str) -> Dict[str, Any]:
+    return {
+        'success': True,
+        'title': entry.title,
+        'content': entry.content,
+        'source_url': url,
+        'mode': 'basic',
+        'content_hash': entry.content_hash,
+        'cache': cache_status,
+    }
+
+
+def _validators(fetched: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'etag': (fetched.get('etag') or '')[:255] or None,
+        'last_modified': (fetched.get('last_modified') or '')[:100] or None,
+    }
+
+
+def _touch(entry: UrlFetchCache, **fields) -> None:
+    try:
+        UrlFetchCache.objects.filter(url_hash=entry.url_hash).update(**fields)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not update fetch cache for {entry.url}: {str(e)}")
+
+
+def _save(url: str, fetched: Dict[str, Any], result: Dict[str, Any], now) -> None:
+    try:
+        UrlFetchCache.objects.update_or_create(url_hash=url_hash(url), defaults={
+            'url': url,
+            **_validators(fetched),
+            'body_hash': fetched['body_hash'],
+            'content_hash': result['content_hash'],
+            'title': result['title'][:255],
+            'content': result['content'],
+            'fetched_at': now,
+            'checked_at': now,
+        })
+    except IntegrityError:
+        # Another worker cached the same URL at the same moment
+        pass
+    except Exception as e:
+        logger.warning(f"⚠️ Could not update fetch cache for {url}: {str(e)}")
+
+
+def scrape_with_cache(url: str) -> Dict[str, Any]:
+    """
+    Basic scrape of a URL through the fetch cache
+
+    Returns:
+        The scrape_url result plus content_hash and cache: 'miss', 'not-modified'
+        (304), 'unchanged' (same body) or 'shared' (same body seen at another URL)
+    """
+    now = timezone.now()
+    try:
+        entry = UrlFetchCache.objects.filter(url_hash=url_hash(url)).first()
+    except Exception as e:
+        logger.warning(f"⚠️ Fetch cache unavailable: {str(e)}")
+        entry = None
+
+    if entry:
+        fetched = fetch_url(url, etag=entry.etag, last_modified=entry.last_modified)
+    else:
+        fetched = fetch_url(url)
+
+    if not fetched['success']:
+        return fetched
+
+    if fetched['not_modified']:
+        if entry is None:
+            return {'success': False, 'error': 'Server returned 304 for an unconditional request'}
+        _touch(entry, checked_at=now)
+        return _cached_result(url, entry, 'not-modified')
+
+    if entry and entry.body_hash == fetched['body_hash']:
+        # Same body without a 304: keep whatever validators the server sent this time
+        _touch(entry, checked_at=now, **_validators(fetched))
+        return _cached_result(url, entry, 'unchanged')
+
+    try:
+        shared = UrlFetchCache.objects.filter(body_hash=fetched['body_hash']).first()
+    except Exception as e:
+        logger.warning(f"⚠️ Fetch cache unavailable: {str(e)}")
+        shared = None
+
+    if shared:
+        result = _cached_result(url, shared, 'shared')
+    else:
+        result = parse_html(fetched['html'], url)
+        if not result['success']:
+            return result
+        result['content_hash'] = content_hash(result['content'])
+        result['cache'] = 'miss'
+
+    _save(url, fetched, result, now)
+    return result
+
+
+def prune(max_age_days: int = None) -> int:
+    """Delete cache entries not requested for URL_FETCH_CACHE_DAYS"""
+    if max_age_days is None:
+        max_age_days = getattr(settings, 'URL_FETCH_CACHE_DAYS', 30)
+    cutoff = timezone.now() - timedelta(days=max_age_days)
+    deleted, _ = UrlFetchCache.objects.filter(checked_at__lt=cutoff).delete()
+    return deleted
@@ -1,16 +1,56 @@
 """
 File Parser Service
 Extracts text content from various file formats (PDF, DOCX, TXT, MD, etc.)
+
+Uploads are parsed as a stream: the file is read in FILE_IMPORT_CHUNK_SIZE
+chunks and decoded incrementally, in one pass, with the encoding detected once
+from the start of the file (see detect_encoding). CSV is read row by row, HTML is fed to an
+incremental parser and PDFs are extracted a page at a time (long ones on a
+process pool, see pdf_extract). Text is cleaned as
+it arrives and the result is capped at FILE_IMPORT_MAX_CHARS. Working memory
+therefore stays at a few chunks, whatever the size of the upload. DOCX files and
+small JSON files are still parsed whole. PDF and DOCX results are cached by
+content (see parse_cache), so re-uploads are not parsed again.
 """
-import io
+import codecs
+import csv
+import json
 import re
 import logging
-from typing import Tuple
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from .parse_cache import parse_cache, file_digest, CACHED_EXTENSIONS
 
 logger = logging.getLogger(__name__)
 
-# Maximum file size (10MB)
-MAX_FILE_SIZE = 10 * 1024 * 1024
+# Maximum upload size
+MAX_FILE_SIZE = getattr(settings, 'FILE_IMPORT_MAX_SIZE', 50 * 1024 * 1024)
+
+# Bytes read from the upload at a time
+CHUNK_SIZE = getattr(settings, 'FILE_IMPORT_CHUNK_SIZE', 64 * 1024)
+
+# Extracted text beyond this many characters is dropped
+MAX_CONTENT_CHARS = getattr(settings, 'FILE_IMPORT_MAX_CHARS', 500000)
+
+# Bytes of a text file used to detect its encoding
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+# Bytes of that sample scored per candidate code page when the text is not UTF-8
+ENCODING_SCORE_SIZE = 4 * 1024
+
+# Single-byte code pages tried, in order of preference, for text that is not UTF-8
+FALLBACK_ENCODINGS = getattr(settings, 'FILE_IMPORT_FALLBACK_ENCODINGS', ['cp1252', 'cp1250', 'cp1251', 'koi8_r'])
+
+# JSON files up to this size are parsed and re-serialized (unescaping \u sequences);
+# larger ones are read as plain text
+JSON_PARSE_MAX_SIZE = 2 * 1024 * 1024
 
 # Supported file extensions
 SUPPORTED_EXTENSIONS = {
@@ -26,18 +66,111 @@ SUPPORTED_EXTENSIONS = {
     '.csv': 'text/csv',
 }
 
+HTML_SKIP_TAGS = {'script', 'style', 'nav', 'footer', 'header'}
+HTML_HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+HTML_BLOCK_TAGS = {
+    'p', 'div', 'section', 'article', 'main', 'ul', 'ol', 'table', 'pre', 'blockquote', 'dl', 'figure', 'form',
+}
+HTML_LINE_TAGS = {'li', 'tr', 'dt', 'dd'}  # end with a line break
+
+_WHITESPACE = re.compile(r'\s+')
+_HORIZONTAL_SPACE = re.compile(r'[^\S\n]+')
+_PARAGRAPH_BREAK = re.compile(r' ?\n(?: ?\n)+ ?')
+_LINE_BREAK = re.compile(r' ?\n ?')
+_NON_ASCII = re.compile(r'[^\x00-\x7f]')
+_CONTROL_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]')
+
 
 def clean_text(text: str) -> str:
     """Clean and normalize extracted text."""
     if not text:
         return ''
     # Remove excessive whitespace
-    text = re.sub(r'\s+', ' ', text)
+    text = _WHITESPACE.sub(' ', text)
     # Remove special characters
-    text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', text)
+    text = _CONTROL_CHARS.sub('', text)
     return text.strip()
 
 
+class TextCollector:
+    """
+    Cleans text piece by piece and keeps at most max_chars. Runs of spaces
+    collapse to one space, line breaks are kept and blank lines collapse to a
+    single paragraph break, so later stages (see chunker) can still see the
+    document's structure. Whitespace across piece boundaries is handled as if
+    the text were whole.
+    """
+
+    def __init__(self, max_chars: int = MAX_CONTENT_CHARS):
+        self.max_chars = max_chars
+        self.parts = []
+        self.length = 0
+        self.truncated = False
+        # Set by parsers that gave up part way (e.g. the PDF time budget ran out)
+        self.partial = False
+        self._pending_space = False
+        self._pending_newlines = 0
+        self._after_cr = False
+
+    @property
+    def full(self) -> bool:
+        return self.truncated
+
+    def _separator(self) -> str:
+        if not self.length:
+            return ''
+        if self._pending_newlines:
+            return '\n\n' if self._pending_newlines > 1 else '\n'
+        return ' ' if self._pending_space else ''
+
+    def _add_whitespace(self, whitespace: str) -> None:
+        self._pending_space = True
+        self._pending_newlines += whitespace.count('\n')
+
+    def add(self, text: str) -> None:
+        if not text or self.truncated:
+            return
+        text = _CONTROL_CHARS.sub('', text)
+        if not text:
+            return
+        if self._after_cr and text.startswith('\n'):
+            # The second half of a \r\n split across pieces
+            text = text[1:]
+        self._after_cr = text.endswith('\r')
+        if not text:
+            return
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+
+        body = text.strip()
+        if not body:
+            self._add_whitespace(text)
+            return
+
+        leading = text[:len(text) - len(text.lstrip())]
+        if leading:
+            self._add_whitespace(leading)
+        body = _HORIZONTAL_SPACE.sub(' ', body)
+        body = _PARAGRAPH_BREAK.sub('\n\n', body)
+        body = _LINE_BREAK.sub('\n', body)
+        body = self._separator() + body
+        if self.length + len(body) > self.max_chars:
+            body = body[:self.max_chars - self.length]
+            self.truncated = True
+        self.parts.append(body)
+        self.length += len(body)
+        self._pending_space = False
+        self._pending_newlines = 0
+        trailing = text[len(text.rstrip()):]
+        if trailing:
+            self._add_whitespace(trailing)
+
+    def text(self) -> str:
+        text = ''.join(self.parts)
+        if self.truncated:
+            text += ' [truncated]'
+        return text
+
+
 def get_file_extension(filename: str) -> str:
     """Get lowercase file extension."""
     if '.' in filename:
@@ -51,208 +184,435 @@ def is_supported_file(filename: str) -> bool:
     return ext in SUPPORTED_EXTENSIONS
 
 
-def parse_txt_file(file_content: bytes) -> Tuple[str, str]:
-    """Parse plain text file."""
-    # Try different encodings
-    encodings = ['utf-8', 'utf-16', 'latin-1', 'cp1252']
-    
-    for encoding in encodings:
-        try:
-            text = file_content.decode(encoding)
-            return text, 'text'
-        except UnicodeDecodeError:
+def _cp1252_fallback(error):
+    """Decode bytes that are not valid UTF-8 as cp1252 (mixed-encoding files)"""
+    if not isinstance(error, UnicodeDecodeError):
+        raise error
+    return error.object[error.start:error.end].decode('cp1252', errors='replace'), error.end
+
+
+codecs.register_error('cp1252-fallback', _cp1252_fallback)
+
+
+def _utf16_without_bom(sample: bytes) -> Optional[str]:
+    """
+    utf-16-le/be if the sample looks like BOM-less UTF-16. The high bytes of
+    alphabetic UTF-16 text take very few values (0 for ASCII, one block for
+    other scripts), and one byte lane holds them.
+    """
+    pairs = len(sample) // 2
+    if pairs < 8:
+        return None
+    even = sample[0:pairs * 2:2]
+    odd = sample[1:pairs * 2:2]
+    for high, low, encoding in ((odd, even, 'utf-16-le'), (even, odd, 'utf-16-be')):
+        common = sum(count for _, count in Counter(high).most_common(2))
+        if high.count(0) > pairs * 0.1 and common > pairs * 0.9 and low.count(0) < pairs * 0.05:
+            return encoding
+    return None
+
+
+@lru_cache(maxsize=1024)
+def _script(char: str) -> str:
+    return unicodedata.name(char, 'UNKNOWN').split(' ', 1)[0]
+
+
+def _plausibility(text: str) -> int:
+    """
+    Penalty score (0 is best) for how little the non-ASCII characters of text
+    look like words: controls and stray symbols, symbols between letters, case
+    flips and script changes inside a word, and runs of 3+ accented Latin
+    letters (rare in Western text, but what Cyrillic looks like in the wrong
+    code page).
+    """
+    score = 0
+    latin_run = 0
+    last_index = -2
+    for match in _NON_ASCII.finditer(text):
+        char, index = match.group(), match.start()
+        if index != last_index + 1:
+            latin_run = 0
+        last_index = index
+        previous = text[index - 1] if index else ' '
+        following = text[index + 1] if index + 1 < len(text) else ' '
+
+        if char.isalpha():
+            script = _script(char)
+            for neighbour in (previous, following):
+                # (a non-ASCII following letter is checked when its turn comes)
+                if neighbour.isalpha() and (neighbour < '\x80' or neighbour is previous) and _script(neighbour) != script:
+                    score -= 3
+            if previous.isalpha() and previous.islower() and char.isupper():
+                score -= 2
+            latin_run = latin_run + 1 if script == 'LATIN' else 0
+            if latin_run > 2:
+                score -= 2
             continue
-    
-    # Fallback with error handling
-    return file_content.decode('utf-8', errors='ignore'), 'text'
 
+        latin_run = 0
+        category = unicodedata.category(char)
+        if category in ('Cc', 'Co', 'Cn') or char == '\ufffd':
+            score -= 3
+        elif category in ('So', 'Sm', 'Sk', 'No'):
+            score -= 1
+        if previous.isalpha() and following.isalpha():
+            score -= 2  # punctuation or symbol inside a word
+    return score
+
+
+def detect_encoding(sample: bytes, complete: bool = False) -> str:
+    """
+    Pick a text encoding from the start of a file (run once per file)
 
-def parse_markdown_file(file_content: bytes) -> Tuple[str, str]:
-    """Parse markdown file."""
-    text, _ = parse_txt_file(file_content)
-    return text, 'markdown'
+    1. A byte order mark (UTF-8, UTF-16, UTF-32) decides.
+    2. BOM-less UTF-16 is recognised by its NUL bytes.
+    3. A sample that is valid UTF-8 (including pure ASCII) is UTF-8.
+    4. Otherwise each single-byte code page in FILE_IMPORT_FALLBACK_ENCODINGS
+       decodes the first ENCODING_SCORE_SIZE bytes and the most plausible text
+       wins (the first on a tie).
+
+    Args:
+        sample: The first ENCODING_SAMPLE_SIZE bytes of the file
+        complete: The sample is the whole file (it cannot end mid-character)
+
+    Returns:
+        Codec name for codecs.getincrementaldecoder
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    # UTF-32 LE starts with the UTF-16 LE mark, so check it first
+    if sample.startswith((codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE)):
+        return 'utf-32'
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
 
+    utf16 = _utf16_without_bom(sample)
+    if utf16:
+        return utf16
 
-def parse_pdf_file(file_content: bytes) -> Tuple[str, str]:
-    """Parse PDF file using PyPDF2."""
     try:
-        import PyPDF2
-        
-        pdf_file = io.BytesIO(file_content)
-        reader = PyPDF2.PdfReader(pdf_file)
-        
-        text_parts = []
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text_parts.append(page_text)
-        
-        return '\n\n'.join(text_parts), 'pdf'
-        
+        # Unless complete, a multi-byte character may be cut at the end of the sample
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=complete)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    best, best_score = FALLBACK_ENCODINGS[0], None
+    for encoding in FALLBACK_ENCODINGS:
+        score = _plausibility(sample[:ENCODING_SCORE_SIZE].decode(encoding, errors='replace'))
+        if best_score is None or score > best_score:
+            best, best_score = encoding, score
+    return best
+
+
+def iter_decoded(file, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """
+    Decode a file chunk by chunk in one pass. The encoding is detected once,
+    from the first ENCODING_SAMPLE_SIZE bytes.
+    """
+    chunks = file.chunks(chunk_size)
+    head = []
+    head_size = 0
+    for chunk in chunks:
+        head.append(chunk)
+        head_size += len(chunk)
+        if head_size >= ENCODING_SAMPLE_SIZE:
+            break
+    head = b''.join(head)
+
+    encoding = detect_encoding(head[:ENCODING_SAMPLE_SIZE], complete=len(head) < ENCODING_SAMPLE_SIZE)
+    # A UTF-8 file may still contain a few cp1252 bytes after the sample
+    errors = 'cp1252-fallback' if encoding == 'utf-8' else 'replace'
+    decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+    yield decoder.decode(head)
+    for chunk in chunks:
+        yield decoder.decode(chunk)
+    yield decoder.decode(b'', final=True)
+
+
+def iter_lines(pieces: Iterable[str]) -> Iterator[str]:
+    """Re-split decoded pieces into lines (newlines kept, as csv.reader expects)"""
+    tail = ''
+    for piece in pieces:
+        lines = (tail + piece).split('\n')
+        tail = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    if tail:
+        yield tail
+
+
+def parse_txt_stream(file, collector: TextCollector) -> str:
+    """Parse plain text file."""
+    for piece in iter_decoded(file):
+        collector.add(piece)
+        if collector.full:
+            break
+    return 'text'
+
+
+def parse_csv_stream(file, collector: TextCollector) -> str:
+    """Parse CSV file row by row into ' | ' separated lines."""
+    lines = iter_lines(iter_decoded(file))
+    try:
+        for row in csv.reader(lines):
+            collector.add(' | '.join(row) + '\n')
+            if collector.full:
+                break
+    except csv.Error:
+        # Not really CSV: keep the rest as plain text
+        for line in lines:
+            collector.add(line)
+            if collector.full:
+                break
+    return 'csv'
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """
+    Collects the text of an HTML document outside script/style/navigation.
+    Block elements become paragraph breaks and headings are written as
+    markdown headings; whitespace inside the markup does not matter.
+    """
+
+    def __init__(self, collector: TextCollector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+        self.skip_depth = 0
+        self.row_cells = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in HTML_SKIP_TAGS:
+            self.skip_depth += 1
+        elif self.skip_depth:
+            return
+        elif tag in HTML_HEADING_TAGS:
+            self.collector.add('\n\n' + '#' * int(tag[1]) + ' ')
+        elif tag in HTML_BLOCK_TAGS:
+            self.collector.add('\n\n')
+        elif tag == 'br':
+            self.collector.add('\n')
+        elif tag == 'tr':
+            self.row_cells = 0
+        elif tag in ('td', 'th'):
+            # Table rows read like CSV rows: cells joined with ' | '
+            if self.row_cells:
+                self.collector.add(' | ')
+            self.row_cells += 1
+
+    def handle_endtag(self, tag):
+        if tag in HTML_SKIP_TAGS:
+            if self.skip_depth:
+                self.skip_depth -= 1
+        elif self.skip_depth:
+            return
+        elif tag in HTML_BLOCK_TAGS or tag in HTML_HEADING_TAGS:
+            self.collector.add('\n\n')
+        elif tag in HTML_LINE_TAGS:
+            self.collector.add('\n')
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.collector.add(_WHITESPACE.sub(' ', data))
+
+
+def parse_html_stream(file, collector: TextCollector) -> str:
+    """Parse HTML file incrementally."""
+    parser = _HTMLTextExtractor(collector)
+    for piece in iter_decoded(file):
+        parser.feed(piece)
+        if collector.full:
+            break
+    parser.close()
+    return 'html'
+
+
+def html_to_text(html: str, max_chars: int = MAX_CONTENT_CHARS) -> str:
+    """
+    Text of an HTML document or fragment with its structure kept, as the HTML
+    file parser produces it: headings as '#' lines, paragraphs separated by
+    blank lines and table rows with cells joined by ' | ' (see chunker)
+    """
+    collector = TextCollector(max_chars)
+    parser = _HTMLTextExtractor(collector)
+    parser.feed(html)
+    parser.close()
+    return collector.text()
+
+
+def parse_json_stream(file, collector: TextCollector) -> str:
+    """Parse JSON file and convert to readable text."""
+    if file.size > JSON_PARSE_MAX_SIZE:
+        parse_txt_stream(file, collector)
+        return 'json'
+
+    text = ''.join(iter_decoded(file))
+    try:
+        collector.add(json.dumps(json.loads(text), indent=2, ensure_ascii=False))
+    except json.JSONDecodeError:
+        collector.add(text)
+    return 'json'
+
+
+def parse_pdf_stream(file, collector: TextCollector) -> str:
+    """Parse PDF file using PyPDF2, one page at a time (long PDFs on a process pool, see pdf_extract)."""
+    try:
+        import PyPDF2  # noqa: F401
     except ImportError:
         raise ValueError('PDF parsing requires PyPDF2. Install with: pip install PyPDF2')
+
+    from .pdf_extract import extract_pdf_text
+
+    try:
+        result = extract_pdf_text(file, collector)
     except Exception as e:
         raise ValueError(f'Failed to parse PDF: {str(e)}')
 
+    collector.partial = result['partial']
+    return 'pdf'
+
 
-def parse_docx_file(file_content: bytes) -> Tuple[str, str]:
+def parse_docx_stream(file, collector: TextCollector) -> str:
     """Parse DOCX file using python-docx."""
     try:
         from docx import Document
-        
-        docx_file = io.BytesIO(file_content)
-        doc = Document(docx_file)
-        
-        text_parts = []
+    except ImportError:
+        raise ValueError('DOCX parsing requires python-docx. Install with: pip install python-docx')
+
+    try:
+        file.seek(0)
+        doc = Document(file)
+
         for para in doc.paragraphs:
             if para.text.strip():
-                text_parts.append(para.text)
-        
+                # Keep headings recognisable for chunking
+                style = para.style.name if para.style is not None else ''
+                level = style[len('Heading '):] if style.startswith('Heading ') else ''
+                if level.isdigit():
+                    collector.add('#' * min(int(level), 6) + ' ')
+                collector.add(para.text)
+                collector.add('\n\n')
+            if collector.full:
+                break
+
         # Also extract text from tables
         for table in doc.tables:
             for row in table.rows:
                 row_text = ' | '.join(cell.text.strip() for cell in row.cells if cell.text.strip())
                 if row_text:
-                    text_parts.append(row_text)
-        
-        return '\n\n'.join(text_parts), 'docx'
-        
-    except ImportError:
-        raise ValueError('DOCX parsing requires python-docx. Install with: pip install python-docx')
+                    collector.add(row_text)
+                    collector.add('\n\n')
+            if collector.full:
+                break
+
+        return 'docx'
     except Exception as e:
         raise ValueError(f'Failed to parse DOCX: {str(e)}')
 
 
-def parse_html_file(file_content: bytes) -> Tuple[str, str]:
-    """Parse HTML file."""
-    try:
-        from bs4 import BeautifulSoup
-        
-        text, _ = parse_txt_file(file_content)
-        soup = BeautifulSoup(text, 'html.parser')
-        
-        # Remove script and style elements
-        for element in soup(['script', 'style', 'nav', 'footer', 'header']):
-            element.decompose()
-        
-        return soup.get_text(separator='\n'), 'html'
-        
-    except ImportError:
-        # Fallback: strip HTML tags with regex
-        text, _ = parse_txt_file(file_content)
-        text = re.sub(r'<[^>]+>', '', text)
-        return text, 'html'
-
-
-def parse_json_file(file_content: bytes) -> Tuple[str, str]:
-    """Parse JSON file and convert to readable text."""
-    import json
-    
-    text, _ = parse_txt_file(file_content)
-    
-    try:
-        data = json.loads(text)
-        # Pretty print JSON
-        formatted = json.dumps(data, indent=2, ensure_ascii=False)
-        return formatted, 'json'
-    except json.JSONDecodeError:
-        return text, 'json'
-
-
-def parse_csv_file(file_content: bytes) -> Tuple[str, str]:
-    """Parse CSV file and convert to readable text."""
-    import csv
-    
-    text, _ = parse_txt_file(file_content)
-    
-    try:
-        reader = csv.reader(io.StringIO(text))
-        rows = []
-        for row in reader:
-            rows.append(' | '.join(row))
-        return '\n'.join(rows), 'csv'
-    except Exception:
-        return text, 'csv'
-
-
-def parse_file(filename: str, file_content: bytes) -> dict:
+def parse_upload(uploaded_file, filename: str = None) -> dict:
     """
-    Parse a file and extract its text content.
-    
+    Parse an uploaded file (or any django File) as a stream and extract its text.
+
     Args:
-        filename: Original filename with extension
-        file_content: Raw file bytes
-        
+        uploaded_file: django UploadedFile / File
+        filename: Original filename with extension (defaults to the file's name)
+
     Returns:
-        dict with keys: success, content, file_type, error
+        dict with keys: success, content, file_type, filename, truncated,
+        partial (some pages could not be read in time), cached (served from
+        the parse cache), error
     """
+    filename = filename or uploaded_file.name
     try:
-        # Check file size
-        if len(file_content) > MAX_FILE_SIZE:
+        # Check file size (known before reading anything)
+        if uploaded_file.size > MAX_FILE_SIZE:
             return {
                 'success': False,
                 'error': f'File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB'
             }
-        
+
         # Get file extension
         ext = get_file_extension(filename)
-        
+
         if not ext:
             return {
                 'success': False,
                 'error': 'Could not determine file type. Please ensure the file has an extension.'
             }
-        
+
         if ext not in SUPPORTED_EXTENSIONS:
             return {
                 'success': False,
                 'error': f'Unsupported file type: {ext}. Supported types: {", ".join(SUPPORTED_EXTENSIONS.keys())}'
             }
-        
-        # Parse based on extension
-        if ext in ['.txt']:
-            content, file_type = parse_txt_file(file_content)
-        elif ext in ['.md']:
-            content, file_type = parse_markdown_file(file_content)
-        elif ext in ['.pdf']:
-            content, file_type = parse_pdf_file(file_content)
-        elif ext in ['.docx']:
-            content, file_type = parse_docx_file(file_content)
-        elif ext in ['.doc']:
-            # .doc files are harder to parse, try as binary text
+
+        if ext == '.doc':
             return {
                 'success': False,
                 'error': 'Legacy .doc format is not supported. Please convert to .docx'
             }
-        elif ext in ['.html', '.htm']:
-            content, file_type = parse_html_file(file_content)
-        elif ext in ['.json']:
-            content, file_type = parse_json_file(file_content)
-        elif ext in ['.csv']:
-            content, file_type = parse_csv_file(file_content)
-        elif ext in ['.rtf']:
+
+        # Files parsed before (by content) are served from the parse cache
+        cache_key = None
+        if ext in CACHED_EXTENSIONS and parse_cache.enabled():
+            cache_key = parse_cache.key(file_digest(uploaded_file), ext)
+            cached = parse_cache.get(cache_key)
+            if cached:
+                return {
+                    'success': True,
+                    'content': cached['content'],
+                    'file_type': cached['file_type'],
+                    'filename': filename,
+                    'truncated': cached['truncated'],
+                    'partial': False,
+                    'cached': True
+                }
+
+        collector = TextCollector()
+
+        # Parse based on extension
+        if ext == '.md':
+            parse_txt_stream(uploaded_file, collector)
+            file_type = 'markdown'
+        elif ext == '.rtf':
             # RTF is complex, try basic text extraction
-            content, file_type = parse_txt_file(file_content)
+            parse_txt_stream(uploaded_file, collector)
             file_type = 'rtf'
+        elif ext == '.pdf':
+            file_type = parse_pdf_stream(uploaded_file, collector)
+        elif ext == '.docx':
+            file_type = parse_docx_stream(uploaded_file, collector)
+        elif ext in ['.html', '.htm']:
+            file_type = parse_html_stream(uploaded_file, collector)
+        elif ext == '.json':
+            file_type = parse_json_stream(uploaded_file, collector)
+        elif ext == '.csv':
+            file_type = parse_csv_stream(uploaded_file, collector)
         else:
-            content, file_type = parse_txt_file(file_content)
-        
-        # Clean the content
-        content = clean_text(content)
-        
+            file_type = parse_txt_stream(uploaded_file, collector)
+
+        content = collector.text()
+
         if not content or len(content) < 10:
             return {
                 'success': False,
                 'error': 'Could not extract meaningful content from the file'
             }
-        
-        return {
+
+        result = {
             'success': True,
             'content': content,
             'file_type': file_type,
-            'filename': filename
+            'filename': filename,
+            'truncated': collector.truncated,
+            'partial': collector.partial,
+            'cached': False
         }
-        
+        if cache_key:
+            parse_cache.set(cache_key, result)
+        return result
+
     except ValueError as e:
         return {
             'success': False,
@@ -264,3 +624,18 @@ def parse_file(filename: str, file_content: bytes) -> dict:
             'success': False,
             'error': f'Failed to parse file: {str(e)}'
         }
+
+
+def parse_file(filename: str, file_content: bytes) -> dict:
+    """
+    Parse a file already in memory and extract its text content.
+
+    Args:
+        filename: Original filename with extension
+        file_content: Raw file bytes
+
+    Returns:
+        Same dict as parse_upload
+    """
+    return parse_upload(ContentFile(file_content, name=filename), filename)
+
@@ -0,0 +1,408 @@
+"""
+Import Service - Turn scraped URLs and parsed files into workspace memories
+Shared by the URL import endpoint (inline mode) and the background import jobs.
+
+Scrapes are bounded per process (IMPORT_MAX_CONCURRENT_SCRAPES) and per domain
+(IMPORT_MAX_SCRAPES_PER_DOMAIN), so one slow site cannot take every worker.
+Batch imports fetch on their own pool (IMPORT_BATCH_CONCURRENCY, at most
+IMPORT_BATCH_PER_HOST per host) and insert every memory in one transaction.
+Long documents are stored as a parent memory plus chunk memories (chunk_document).
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, List
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import Memory
+from .activity_service import log_memory_created
+from .memory_service import memory_service
+from . import side_effects
+
+logger = logging.getLogger(__name__)
+
+# Content shorter than this is stored as-is even when summarizing
+SUMMARIZE_MIN_LENGTH = 500
+
+_slots_lock = threading.Lock()
+_process_slots = None
+_domain_slots = defaultdict(lambda: threading.BoundedSemaphore(
+    getattr(settings, 'IMPORT_MAX_SCRAPES_PER_DOMAIN', 2)
+))
+
+
+class ScrapeBusy(Exception):
+    """Raised when no scrape slot for the URL's domain frees up in time"""
+    pass
+
+
+def get_domain(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+@contextmanager
+def scrape_slot(url: str, timeout: float = None):
+    """
+    Hold a process-wide and a per-domain scrape slot while scraping a URL
+
+    Raises:
+        ScrapeBusy: The domain slot did not free up within the timeout
+    """
+    global _process_slots
+    with _slots_lock:
+        if _process_slots is None:
+            _process_slots = threading.BoundedSemaphore(getattr(settings, 'IMPORT_MAX_CONCURRENT_SCRAPES', 4))
+        domain_slot = _domain_slots[get_domain(url)]
+
+    if timeout is None:
+        timeout = getattr(settings, 'IMPORT_DOMAIN_WAIT', 5)
+    if not domain_slot.acquire(timeout=timeout):
+        raise ScrapeBusy(f"Too many concurrent imports from {get_domain(url)}")
+    try:
+        with _process_slots:
+            yield
+    finally:
+        domain_slot.release()
+
+
+def get_url_type(url: str) -> str:
+    """Classify an import source by domain"""
+    domain = get_domain(url)
+    if 'chatgpt.com' in domain or 'chat.openai.com' in domain:
+        return 'chatgpt'
+    elif 'notion.so' in domain or 'notion.site' in domain:
+        return 'notion'
+    elif 'docs.google.com' in domain:
+        return 'google_docs'
+    elif 'github.com' in domain:
+        return 'github'
+    return 'webpage'
+
+
+def get_import_tags(url_type: str, used_mode: str) -> list:
+    """Tags based on URL type and scrape mode"""
+    tags = ['imported', f'source:{url_type}']
+    if used_mode == 'advanced':
+        tags.append('playwright-scraped')
+    if url_type == 'chatgpt':
+        tags.append('ai-conversation')
+    elif url_type == 'notion':
+        tags.append('documentation')
+    elif url_type == 'google_docs':
+        tags.append('document')
+    elif url_type == 'github':
+        tags.append('code')
+    return tags
+
+
+def build_url_memory(workspace, url: str, scrape_result: Dict[str, Any], should_summarize: bool = True) -> Memory:
+    """
+    Build an (unsaved) memory from a successful scrape
+
+    Args:
+        workspace: Workspace model instance
+        url: Imported URL
+        scrape_result: Result of url_scraper.scrape_url
+        should_summarize: Summarize long content
+
+    Returns:
+        Memory instance, ready to save or bulk_create
+    """
+    from .url_scraper import summarize_content
+
+    title = scrape_result['title']
+    content = scrape_result['content']
+    used_mode = scrape_result.get('mode', 'basic')
+    url_type = get_url_type(url)
+
+    was_summarized = bool(should_summarize) and len(content) > SUMMARIZE_MIN_LENGTH
+    if was_summarized:
+        content = summarize_content(content, title)
+
+    now = timezone.now()
+    return Memory(
+        workspace=workspace,
+        title=f"[Imported] {title[:100]}",
+        content=content,
+        tags=get_import_tags(url_type, used_mode),
+        synced_at=now,
+        metadata={
+            'source_url': url,
+            'source_type': url_type,
+            'scrape_mode': used_mode,
+            'imported_at': str(now),
+            'was_summarized': was_summarized,
+            'content_hash': scrape_result.get('content_hash')
+        }
+    )
+
+
+def chunk_document(memory: Memory, content: str) -> List[Memory]:
+    """
+    Split a long document into chunk memories (unsaved, ids filled in)
+
+    If content is at least CHUNKING_MIN_LENGTH characters, memory becomes the
+    parent document record: its content is replaced by a summary and
+    metadata.chunk_count is set. The full text lives in the chunks.
+
+    Args:
+        memory: Built (unsaved or saved) memory for the whole document
+        content: Full document text
+
+    Returns:
+        Chunk memories linked to memory, or [] if the document is short
+    """
+    from .chunker import chunk_text
+    from .url_scraper import summarize_content
+
+    if len(content) < getattr(settings, 'CHUNKING_MIN_LENGTH', 4000):
+        return []
+
+    chunks = chunk_text(content)
+    memory.content = summarize_content(content, memory.title)
+    memory.snippet = ''
+    memory.metadata = {
+        **memory.metadata,
+        'chunk_count': len(chunks),
+        'document_length': len(content),
+        'was_summarized': True,
+    }
+    memory.fill_generated_fields()
+
+    chunk_memories = []
+    for chunk in chunks:
+        label = chunk['heading'] or f"part {chunk['index'] + 1}/{len(chunks)}"
+        chunk_memory = Memory(
+            workspace=memory.workspace,
+            parent=memory,
+            chunk_index=chunk['index'],
+            title=f"{memory.title[:200]} \u203a {label}"[:255],
+            content=chunk['content'],
+            tags=list(memory.tags) + ['chunk'],
+            metadata={
+                'source_type': memory.metadata.get('source_type'),
+                'heading': chunk['heading'],
+            }
+        )
+        chunk_memory.fill_generated_fields()
+        chunk_memories.append(chunk_memory)
+    return chunk_memories
+
+
+def build_url_memories(workspace, url: str, scrape_result: Dict[str, Any], should_summarize: bool = True) -> List[Memory]:
+    """
+    Build the (unsaved) memories for a scraped page: one memory, or a parent
+    document record followed by its chunks for long pages
+
+    Returns:
+        Memories with ids filled in, ready for save_memories
+    """
+    memory = build_url_memory(workspace, url, scrape_result, should_summarize)
+    memory.fill_generated_fields()
+    return [memory] + chunk_document(memory, scrape_result['content'])
+
+
+def build_file_memories(workspace, filename: str, parse_result: Dict[str, Any], file_size: int,
+                        should_summarize: bool = False, extra_metadata: Dict[str, Any] = None) -> List[Memory]:
+    """
+    Build the (unsaved) memories for a parsed file: one memory, or a parent
+    document record followed by its chunks for long files
+
+    Args:
+        workspace: Workspace model instance
+        filename: Original filename (or path inside an archive)
+        parse_result: Successful result of file_parser.parse_upload
+        file_size: Size of the file in bytes
+        should_summarize: Summarize content that is not chunked
+        extra_metadata: Added to the memory's metadata
+
+    Returns:
+        Memories with ids filled in, ready for save_memories
+    """
+    from .url_scraper import summarize_content
+
+    content = parse_result['content']
+    file_type = parse_result['file_type']
+
+    was_summarized = should_summarize and len(content) > SUMMARIZE_MIN_LENGTH
+    if was_summarized:
+        content = summarize_content(content, filename)
+
+    title_base = filename.rsplit('.', 1)[0] if '.' in filename else filename
+
+    memory = Memory(
+        workspace=workspace,
+        title=f"[File] {title_base[:100]}",
+        content=content,
+        tags=['imported', 'file-upload', f'format:{file_type}'],
+        metadata={
+            'source_type': 'file',
+            'original_filename': filename,
+            'file_type': file_type,
+            'file_size': file_size,
+            'imported_at': str(timezone.now()),
+            'truncated': parse_result['truncated'],
+            'partial': parse_result['partial'],
+            'was_summarized': was_summarized,
+            **(extra_metadata or {}),
+        }
+    )
+    memory.fill_generated_fields()
+    return [memory] + chunk_document(memory, parse_result['content'])
+
+
+def find_unchanged_memory(workspace, url: str, content_hash: str):
+    """The workspace's memory imported from this URL with identical content, if any"""
+    if not content_hash:
+        return None
+    return Memory.objects.filter(
+        workspace=workspace, metadata__source_url=url, metadata__content_hash=content_hash
+    ).first()
+
+
+def import_url(workspace, url: str, should_summarize: bool = True, mode: str = 'basic') -> Dict[str, Any]:
+    """
+    Scrape a URL and save it as a memory (the search index is updated by the
+    Memory post_save signal)
+
+    Returns:
+        dict with success, memory and unchanged (True if an identical import of the
+        URL already existed), or error (and retryable for transient failures)
+    """
+    from .url_scraper import scrape_url
+
+    with scrape_slot(url):
+        scrape_result = scrape_url(url, mode=mode)
+
+    if not scrape_result['success']:
+        return scrape_result
+
+    # Same page as the last import into this workspace: point at that memory
+    existing = find_unchanged_memory(workspace, url, scrape_result.get('content_hash'))
+    if existing:
+        logger.info(f"♻️ {url} unchanged since {existing.id}, not importing again")
+        return {'success': True, 'memory': existing, 'unchanged': True}
+
+    memories = build_url_memories(workspace, url, scrape_result, should_summarize)
+    save_memories(workspace, memories)
+    memory = memories[0]
+    logger.info(f"📥 Imported {url} into {workspace.id} as {memory.id} ({len(memories) - 1} chunks)")
+
+    return {'success': True, 'memory': memory}
+
+
+def index_memories(memories: List[Memory]) -> None:
+    for memory in memories:
+        memory_service.store(memory.content, memory.id)
+
+
+def save_memories(workspace, memories: List[Memory]) -> None:
+    """
+    Insert built memories (fill_generated_fields already called) in one transaction.
+    bulk_create skips post_save, so indexing and activity logging are deferred
+    here instead (both run after commit). Chunks are indexed but not logged;
+    their document is. Parents must come before their chunks.
+    """
+    if not memories:
+        return
+    with transaction.atomic():
+        Memory.objects.bulk_create(memories)
+        for memory in memories:
+            if memory.parent_id is None:
+                log_memory_created(workspace, memory, deferred=True)
+        side_effects.defer(index_memories, memories)
+
+
+def import_urls(workspace, urls: List[str], should_summarize: bool = True, mode: str = 'basic',
+                on_progress: Callable[[int, int], None] = None) -> Dict[str, Any]:
+    """
+    Scrape many URLs concurrently and save the successful ones as memories
+
+    Pages are fetched on a thread pool sharing one connection pool, with at most
+    IMPORT_BATCH_PER_HOST requests per host at a time, and parsed as they arrive.
+    All memories are written with a single bulk_create, so the batch costs about
+    as long as its slowest host.
+
+    Args:
+        workspace: Workspace model instance
+        urls: URLs to import (duplicates are imported once)
+        should_summarize: Summarize long content
+        mode: 'basic' or 'advanced'
+        on_progress: Called with (done, total) as each URL finishes
+
+    Returns:
+        dict with imported, unchanged, failed and per-URL results in input order
+        (url, success, and memoryId/title/unchanged or error)
+    """
+    from .url_scraper import scrape_url
+
+    urls = list(dict.fromkeys(urls))
+    per_host = getattr(settings, 'IMPORT_BATCH_PER_HOST', 4)
+    host_slots = defaultdict(lambda: threading.BoundedSemaphore(per_host))
+    host_slots_lock = threading.Lock()
+
+    def scrape(url):
+        with host_slots_lock:
+            slot = host_slots[get_domain(url)]
+        try:
+            with slot:
+                return scrape_url(url, mode=mode)
+        finally:
+            # The fetch cache queries from this pool thread; don't leave its connection open
+            connections.close_all()
+
+    started = time.monotonic()
+    scraped = {}
+    workers = max(1, min(getattr(settings, 'IMPORT_BATCH_CONCURRENCY', 16), len(urls)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='import') as executor:
+        futures = {executor.submit(scrape, url): url for url in urls}
+        for done, future in enumerate(as_completed(futures), 1):
+            url = futures[future]
+            try:
+                scraped[url] = future.result()
+            except Exception as e:
+                scraped[url] = {'success': False, 'error': str(e)[:100]}
+            if on_progress:
+                on_progress(done, len(urls))
+
+    # Previous imports of these URLs, to skip pages that have not changed
+    previous = {
+        (memory.metadata.get('source_url'), memory.metadata.get('content_hash')): memory
+        for memory in Memory.objects.filter(workspace=workspace, metadata__source_url__in=urls).only('id', 'title', 'metadata')
+    }
+
+    results = []
+    memories = []
+    for url in urls:
+        scrape_result = scraped[url]
+        if not scrape_result['success']:
+            results.append({'url': url, 'success': False, 'error': scrape_result['error']})
+            continue
+        existing = previous.get((url, scrape_result.get('content_hash')))
+        if existing:
+            results.append({'url': url, 'success': True, 'memoryId': existing.id, 'title': existing.title, 'unchanged': True})
+            continue
+        built = build_url_memories(workspace, url, scrape_result, should_summarize)
+        memories.extend(built)
+        results.append({'url': url, 'success': True, 'memoryId': built[0].id, 'title': built[0].title, 'chunks': len(built) - 1})
+
+    save_memories(workspace, memories)
+
+    elapsed = time.monotonic() - started
+    imported = sum(1 for memory in memories if memory.parent_id is None)
+    logger.info(f"📥 Imported {imported}/{len(urls)} URLs into {workspace.id} in {elapsed:.2f}s")
+
+    return {
+        'imported': imported,
+        'unchanged': sum(1 for r in results if r.get('unchanged')),
+        'failed': sum(1 for r in results if not r['success']),
+        'elapsedMs': round(elapsed * 1000),
+        'results': results,
+    }
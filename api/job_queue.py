@@ -0,0 +1,372 @@
+"""
+Job Queue - Durable background jobs stored in the application database
+Jobs are rows in the Job table, so enqueueing is part of the caller's transaction
+and nothing is lost when a process restarts. `manage.py run_worker` claims and
+runs them; no broker is needed.
+
+- Claiming uses SELECT ... FOR UPDATE SKIP LOCKED where the database supports it
+  (PostgreSQL), so any number of workers can poll the same table. On SQLite each
+  candidate is claimed with a conditional UPDATE instead.
+- Lower priority values run first, then the oldest run_at.
+- Failed jobs are retried with exponential backoff up to max_attempts. Handlers
+  raise JobFailed for errors that retrying cannot fix, and RetryLater to back off
+  (e.g. from a busy host) without using up an attempt.
+- Jobs registered with `every=` are periodic: a single row per job is rescheduled
+  after each run.
+- A job whose worker died (locked for longer than JOB_LOCK_TIMEOUT without
+  reporting progress) is put back in the queue.
+
+Usage:
+    @register_job('cleanup.retention', every=86400)
+    def retention_cleanup(job):
+        return {'users': len(run_scheduled_cleanup())}
+
+    job = enqueue('imports.url', {'url': url}, user=request.user)
+"""
+import hashlib
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import timedelta
+from typing import Callable, Dict, Any, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction, close_old_connections, IntegrityError
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ['succeeded', 'failed', 'cancelled']
+
+
+class RetryLater(Exception):
+    """Raise from a handler to run the job again later without using up an attempt"""
+
+    def __init__(self, delay: float, reason: str = ''):
+        super().__init__(reason or f"Retry in {delay}s")
+        self.delay = delay
+
+
+class JobFailed(Exception):
+    """Raise from a handler to fail the job without retrying (the error is permanent)"""
+    pass
+
+
+class JobSpec:
+    """A registered job handler and its defaults"""
+
+    def __init__(self, name: str, func: Callable, max_attempts: int, priority: int, every: Optional[int],
+                 on_cancel: Optional[Callable] = None):
+        self.name = name
+        self.func = func
+        self.max_attempts = max_attempts
+        self.priority = priority
+        self.every = every
+        self.on_cancel = on_cancel
+
+
+JOB_REGISTRY: Dict[str, JobSpec] = {}
+
+
+def register_job(name: str, max_attempts: int = 3, priority: int = 0, every: int = None,
+                 on_cancel: Callable = None):
+    """
+    Register a job handler. The handler receives the Job and returns a
+    JSON-serializable result.
+
+    Args:
+        name: Job name used by enqueue()
+        max_attempts: Runs before the job is marked failed
+        priority: Default priority (lower runs first)
+        every: Run periodically, every this many seconds
+        on_cancel: Called with the Job when it is cancelled before running
+            (e.g. to delete what its payload refers to)
+    """
+    def decorator(func):
+        JOB_REGISTRY[name] = JobSpec(name, func, max_attempts, priority, every, on_cancel)
+        return func
+    return decorator
+
+
+def get_spec(name: str) -> JobSpec:
+    if name not in JOB_REGISTRY:
+        raise ValueError(f"Unknown job: {name}")
+    return JOB_REGISTRY[name]
+
+
+def _fit_dedupe_key(key: str) -> str:
+    """Keys longer than the dedupe_key column are replaced by their digest"""
+    if len(key) <= Job._meta.get_field('dedupe_key').max_length:
+        return key
+    return f"sha256:{hashlib.sha256(key.encode('utf-8')).hexdigest()}"
+
+
+def enqueue(name: str, payload: Dict[str, Any] = None, user=None, workspace=None,
+            priority: int = None, delay: float = 0, max_attempts: int = None,
+            dedupe_key: str = None) -> Job:
+    """
+    Add a job to the queue (committed with the caller's transaction)
+
+    Args:
+        name: Registered job name
+        payload: JSON-serializable arguments for the handler
+        user: Owner, who can poll the job's status
+        workspace: Workspace the job works on
+        priority: Overrides the registered priority
+        delay: Seconds before the job may run
+        max_attempts: Overrides the registered max_attempts
+        dedupe_key: If an unfinished job with this key exists, return it instead
+            (keys too long for the column are stored as a digest)
+
+    Returns:
+        The queued (or existing) Job
+    """
+    spec = get_spec(name)
+    if dedupe_key is not None:
+        dedupe_key = _fit_dedupe_key(dedupe_key)
+    job = Job(
+        name=name,
+        payload=payload or {},
+        priority=spec.priority if priority is None else priority,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or spec.max_attempts,
+        dedupe_key=dedupe_key,
+        user=user,
+        workspace=workspace,
+    )
+
+    if dedupe_key is None:
+        job.save()
+        return job
+
+    try:
+        with transaction.atomic():
+            job.save()
+        return job
+    except IntegrityError:
+        return Job.objects.get(dedupe_key=dedupe_key)
+
+
+def cancel(job_id: str) -> bool:
+    """Cancel a job that has not started yet (and run its on_cancel hook)"""
+    cancelled = Job.objects.filter(id=job_id, status='queued').update(
+        status='cancelled', dedupe_key=None, finished_at=timezone.now()
+    ) == 1
+    if cancelled:
+        job = Job.objects.get(id=job_id)
+        spec = JOB_REGISTRY.get(job.name)
+        if spec and spec.on_cancel:
+            try:
+                spec.on_cancel(job)
+            except Exception as e:
+                logger.warning(f"⚠️ Cleanup of cancelled job {job.name} ({job.id}) failed: {str(e)}")
+    return cancelled
+
+
+def ensure_periodic_jobs() -> None:
+    """Make sure every periodic job has its (single) row in the queue"""
+    for spec in JOB_REGISTRY.values():
+        if not spec.every:
+            continue
+        key = f"periodic:{spec.name}"
+        try:
+            with transaction.atomic():
+                job, created = Job.objects.get_or_create(dedupe_key=key, defaults={
+                    'name': spec.name,
+                    'priority': spec.priority,
+                    'max_attempts': spec.max_attempts,
+                    'repeat_interval': spec.every,
+                })
+        except IntegrityError:
+            # Another worker created it first
+            continue
+        if created:
+            logger.info(f"⏰ Scheduled periodic job {spec.name} every {spec.every}s")
+        elif job.repeat_interval != spec.every:
+            Job.objects.filter(id=job.id).update(repeat_interval=spec.every)
+
+
+def claim(worker_id: str, limit: int = 1) -> List[Job]:
+    """
+    Take up to `limit` due jobs for a worker and mark them running
+
+    Returns:
+        The claimed jobs (attempts already incremented)
+    """
+    now = timezone.now()
+    due = Job.objects.filter(status='queued', run_at__lte=now).order_by('priority', 'run_at')
+    claimed_fields = dict(status='running', locked_by=worker_id, locked_at=now, started_at=now)
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            jobs = list(due.select_for_update(skip_locked=True)[:limit])
+            if jobs:
+                Job.objects.filter(id__in=[job.id for job in jobs]).update(
+                    attempts=F('attempts') + 1, **claimed_fields
+                )
+    else:
+        # No row locks (SQLite): claim each candidate only if it is still queued
+        jobs = []
+        for job in due[:limit * 2]:
+            if Job.objects.filter(id=job.id, status='queued').update(attempts=F('attempts') + 1, **claimed_fields):
+                jobs.append(job)
+                if len(jobs) == limit:
+                    break
+
+    for job in jobs:
+        job.attempts += 1
+        for field, value in claimed_fields.items():
+            setattr(job, field, value)
+    return jobs
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter for the given number of attempts so far"""
+    base = getattr(settings, 'JOB_RETRY_BACKOFF', 10)
+    cap = getattr(settings, 'JOB_RETRY_BACKOFF_MAX', 3600)
+    delay = min(cap, base * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _finish(job: Job, **fields) -> bool:
+    """Update a job this worker still holds (it may have been requeued as stale)"""
+    fields.setdefault('locked_by', None)
+    fields.setdefault('locked_at', None)
+    fields.setdefault('finished_at', timezone.now())
+    updated = Job.objects.filter(id=job.id, status='running', locked_by=job.locked_by).update(**fields)
+    if not updated:
+        logger.warning(f"⚠️ Job {job.id} was taken from worker {job.locked_by} before it finished")
+    return updated == 1
+
+
+def execute(job: Job) -> None:
+    """Run a claimed job and record the outcome"""
+    spec = JOB_REGISTRY.get(job.name)
+    if spec is None:
+        _finish(job, status='failed', dedupe_key=None, last_error=f"Unknown job: {job.name}")
+        logger.error(f"❌ No handler registered for job {job.name} ({job.id})")
+        return
+
+    started = time.monotonic()
+    try:
+        result = spec.func(job)
+    except RetryLater as e:
+        _finish(job, status='queued', attempts=job.attempts - 1, last_error=str(e), finished_at=None,
+                run_at=timezone.now() + timedelta(seconds=e.delay))
+        logger.info(f"⏳ Job {job.name} ({job.id}) deferred {e.delay:.0f}s: {str(e)}")
+        return
+    except Exception as e:
+        error = str(e) if isinstance(e, JobFailed) else f"{e.__class__.__name__}: {str(e)}"
+        if job.repeat_interval:
+            _finish(job, status='queued', attempts=0, last_error=error,
+                    run_at=timezone.now() + timedelta(seconds=job.repeat_interval))
+        elif job.attempts < job.max_attempts and not isinstance(e, JobFailed):
+            delay = retry_delay(job.attempts)
+            _finish(job, status='queued', last_error=error, finished_at=None,
+                    run_at=timezone.now() + timedelta(seconds=delay))
+            logger.warning(f"⚠️ Job {job.name} ({job.id}) failed, retrying in {delay:.0f}s: {error}")
+            return
+        else:
+            _finish(job, status='failed', dedupe_key=None, last_error=error)
+        logger.error(f"❌ Job {job.name} ({job.id}) failed after {job.attempts} attempt(s): {error}")
+        return
+
+    elapsed = time.monotonic() - started
+    if job.repeat_interval:
+        _finish(job, status='queued', attempts=0, result=result, last_error=None,
+                run_at=timezone.now() + timedelta(seconds=job.repeat_interval))
+    else:
+        _finish(job, status='succeeded', dedupe_key=None, result=result, last_error=None)
+    logger.info(f"✅ Job {job.name} ({job.id}) finished in {elapsed:.2f}s")
+
+
+def requeue_stale() -> int:
+    """Put back jobs whose worker stopped reporting (counts as a failed attempt)"""
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'JOB_LOCK_TIMEOUT', 900))
+    stale = Job.objects.filter(status='running', locked_at__lt=cutoff)
+    error = 'Worker stopped responding'
+    stale.filter(attempts__gte=F('max_attempts'), repeat_interval__isnull=True).update(
+        status='failed', dedupe_key=None, locked_by=None, locked_at=None, last_error=error, finished_at=timezone.now()
+    )
+    count = stale.update(status='queued', locked_by=None, locked_at=None, last_error=error, run_at=timezone.now())
+    if count:
+        logger.warning(f"⚠️ Requeued {count} stale job(s)")
+    return count
+
+
+def get_metrics() -> Dict[str, Any]:
+    """Job counts by status and the age of the oldest due job"""
+    counts = dict(Job.objects.values_list('status').annotate(count=Count('id')).order_by())
+    oldest = Job.objects.filter(status='queued', run_at__lte=timezone.now()).order_by('run_at').values_list(
+        'run_at', flat=True
+    ).first()
+    return {
+        'counts': counts,
+        'oldestDueSeconds': round((timezone.now() - oldest).total_seconds(), 1) if oldest else 0,
+    }
+
+
+class Worker:
+    """Polls the queue and runs jobs on a thread pool"""
+
+    def __init__(self, concurrency: int = 1, poll_interval: float = 1.0, worker_id: str = None):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.stop_event = threading.Event()
+        self.processed = 0
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def _run(self, job: Job) -> None:
+        close_old_connections()
+        try:
+            execute(job)
+        finally:
+            close_old_connections()
+
+    def run(self, once: bool = False) -> int:
+        """
+        Run jobs until stopped
+
+        Args:
+            once: Exit as soon as no job is due (instead of polling)
+
+        Returns:
+            Number of jobs run
+        """
+        ensure_periodic_jobs()
+        stale_check_at = 0.0
+        running = set()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='job') as executor:
+            while not self.stop_event.is_set():
+                if time.monotonic() >= stale_check_at:
+                    requeue_stale()
+                    stale_check_at = time.monotonic() + 60
+
+                free = self.concurrency - len(running)
+                jobs = claim(self.worker_id, limit=free) if free else []
+                for job in jobs:
+                    logger.info(f"▶️ Running job {job.name} ({job.id}), attempt {job.attempts}/{job.max_attempts}")
+                    running.add(executor.submit(self._run, job))
+                self.processed += len(jobs)
+
+                if once and not jobs and not running:
+                    break
+                if running and (not free or not jobs):
+                    done, running = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    running = set(running)
+                elif not jobs:
+                    self.stop_event.wait(self.poll_interval)
+
+            wait(running)
+        return self.processed
@@ -0,0 +1,179 @@
+"""
+Background job handlers
+Imported when the app is ready so every handler is registered in JOB_REGISTRY
+before `manage.py run_worker` starts claiming jobs.
+"""
+import logging
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .cleanup_service import run_scheduled_cleanup
+from .job_queue import register_job, RetryLater, JobFailed, FINISHED_STATUSES
+from .models import Job, Workspace
+
+logger = logging.getLogger(__name__)
+
+
+@register_job('cleanup.retention', max_attempts=1, every=24 * 3600)
+def retention_cleanup(job):
+    """Delete data of users whose memory retention period has expired"""
+    results = run_scheduled_cleanup()
+    return {
+        'users': len(results),
+        'workspacesDeleted': sum(r['workspaces_deleted'] for r in results),
+    }
+
+
+@register_job('jobs.prune', max_attempts=1, priority=10, every=6 * 3600)
+def prune_jobs(job):
+    """Delete finished jobs older than JOB_RETENTION_DAYS"""
+    cutoff = timezone.now() - timedelta(days=getattr(settings, 'JOB_RETENTION_DAYS', 7))
+    deleted, _ = Job.objects.filter(status__in=FINISHED_STATUSES, finished_at__lt=cutoff).delete()
+    return {'deleted': deleted}
+
+
+@register_job('imports.url', max_attempts=3)
+def import_url_job(job):
+    """Scrape a URL into a memory (queued by import_from_url_view)"""
+    from .import_service import import_url, ScrapeBusy
+
+    payload = job.payload
+    try:
+        workspace = Workspace.objects.get(id=payload['workspace_id'])
+    except Workspace.DoesNotExist:
+        raise JobFailed('Workspace not found')
+
+    try:
+        result = import_url(
+            workspace,
+            payload['url'],
+            should_summarize=payload.get('summarize', True),
+            mode=payload.get('mode', 'basic')
+        )
+    except ScrapeBusy as e:
+        raise RetryLater(getattr(settings, 'IMPORT_DOMAIN_RETRY_DELAY', 10), str(e))
+
+    if not result['success']:
+        if result.get('retryable'):
+            raise RuntimeError(result['error'])
+        raise JobFailed(result['error'])
+
+    memory = result['memory']
+    return {
+        'memoryId': memory.id,
+        'sourceType': memory.metadata['source_type'],
+        'wasSummarized': memory.metadata['was_summarized'],
+        'unchanged': result.get('unchanged', False),
+    }
+
+
+@register_job('imports.url_batch', max_attempts=1)
+def import_url_batch_job(job):
+    """Scrape a list of URLs into memories (queued by import_from_urls_view)"""
+    from .import_service import import_urls
+
+    payload = job.payload
+    try:
+        workspace = Workspace.objects.get(id=payload['workspace_id'])
+    except Workspace.DoesNotExist:
+        raise JobFailed('Workspace not found')
+
+    return import_urls(
+        workspace,
+        payload['urls'],
+        should_summarize=payload.get('summarize', True),
+        mode=payload.get('mode', 'basic'),
+        on_progress=lambda done, total: job.report_progress(done=done, total=total)
+    )
+
+
+@register_job('imports.crawl', max_attempts=1)
+def import_crawl_job(job):
+    """Crawl a site or sitemap into memories (queued by import_crawl_view)"""
+    from .site_crawler import crawl_site
+
+    payload = job.payload
+    try:
+        workspace = Workspace.objects.get(id=payload['workspace_id'])
+    except Workspace.DoesNotExist:
+        raise JobFailed('Workspace not found')
+
+    result = crawl_site(
+        workspace,
+        payload['url'],
+        max_pages=payload.get('max_pages'),
+        max_depth=payload.get('max_depth'),
+        should_summarize=payload.get('summarize', True),
+        on_progress=job.report_progress
+    )
+    if not result['success']:
+        raise JobFailed(result['error'])
+    return result
+
+
+def _delete_archive_upload(job):
+    from .archive_import import delete_archive
+    delete_archive(job.payload.get('upload_id'))
+
+
+@register_job('imports.archive', max_attempts=1, on_cancel=_delete_archive_upload)
+def import_archive_job(job):
+    """Import the files of an uploaded zip or tar archive (queued by import_archive_view)"""
+    from .archive_import import import_archive, spool_archive, delete_archive
+
+    payload = job.payload
+    path = None
+    try:
+        try:
+            workspace = Workspace.objects.get(id=payload['workspace_id'])
+        except Workspace.DoesNotExist:
+            raise JobFailed('Workspace not found')
+
+        try:
+            path = spool_archive(payload['upload_id'])
+        except ValueError as e:
+            raise JobFailed(str(e))
+
+        result = import_archive(
+            workspace,
+            path,
+            payload['filename'],
+            should_summarize=payload.get('summarize', False),
+            on_progress=job.report_progress
+        )
+    finally:
+        # The stored archive is only needed for this single attempt
+        delete_archive(payload.get('upload_id'))
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    if not result['success']:
+        raise JobFailed(result['error'])
+    return result
+
+
+@register_job('imports.prune_archives', max_attempts=1, priority=10, every=24 * 3600)
+def prune_archive_uploads(job):
+    """Delete stored archives whose import job never finished (e.g. the worker died)"""
+    from .archive_import import prune_archives
+    return {'deleted': prune_archives()}
+
+
+@register_job('imports.prune_fetch_cache', max_attempts=1, priority=10, every=24 * 3600)
+def prune_fetch_cache(job):
+    """Delete fetch cache entries not requested for URL_FETCH_CACHE_DAYS"""
+    from .fetch_cache import prune
+    return {'deleted': prune()}
+
+
+@register_job('imports.resync', max_attempts=1, priority=5, every=getattr(settings, 'RESYNC_INTERVAL', 3600))
+def resync_imports(job):
+    """Refresh memories imported from URLs whose pages changed (see url_resync)"""
+    from .url_resync import resync
+
+    if not getattr(settings, 'RESYNC_ENABLED', True):
+        return {'skipped': True}
+    return resync(on_progress=job.report_progress)
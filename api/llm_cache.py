@@ -0,0 +1,134 @@
+"""
+LLM Response Cache - Serves repeated identical LLM requests from cache
+Keys are a canonical hash of (provider, model, messages, generation params),
+scoped per workspace so answers are never shared between workspaces.
+
+Also tracks a fingerprint of each conversation's stable prompt prefix (system
+prompt + injected memories) to report how much of a turn is eligible for the
+provider's prompt cache.
+"""
+import hashlib
+import json
+import logging
+import time
+from typing import Dict, Any, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = 'llm'
+KEY_PREFIX = 'llm-resp'
+PREFIX_KEY_PREFIX = 'llm-prefix'
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def is_enabled() -> bool:
+    """Check if the response cache is enabled in settings"""
+    return getattr(settings, 'LLM_CACHE_ENABLED', False)
+
+
+def make_cache_key(workspace_id: str, provider: str, model: str,
+                   messages: List[Dict[str, str]], params: Dict[str, Any]) -> str:
+    """
+    Build a workspace-scoped cache key from the exact request payload
+
+    Args:
+        workspace_id: Workspace the conversation belongs to
+        provider: Provider name (openai, anthropic, ...)
+        model: Model name sent to the provider
+        messages: Messages payload from build_messages
+        params: Generation params (temperature, max_tokens, ...)
+
+    Returns:
+        Cache key string
+    """
+    payload = json.dumps(
+        {'provider': provider, 'model': model, 'messages': messages, 'params': params},
+        sort_keys=True,
+        separators=(',', ':'),
+        ensure_ascii=False
+    )
+    digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    return f"{KEY_PREFIX}:{workspace_id}:{digest}"
+
+
+def get_cached_response(cache_key: str) -> Optional[Dict[str, Any]]:
+    """
+    Look up a cached LLM response
+
+    Returns:
+        Response dict marked with cached=True, or None on miss
+    """
+    try:
+        entry = _cache().get(cache_key)
+    except Exception as e:
+        logger.warning(f"LLM cache lookup failed: {str(e)}")
+        return None
+
+    if not entry:
+        return None
+
+    response = dict(entry['response'])
+    response['cached'] = True
+    response['cached_at'] = entry['stored_at']
+    return response
+
+
+def store_response(cache_key: str, response: Dict[str, Any]) -> bool:
+    """
+    Store a successful LLM response
+
+    Returns:
+        True if stored
+    """
+    if response.get('status') != 'success':
+        return False
+
+    entry = {
+        'response': {k: v for k, v in response.items() if k not in ('cached', 'cached_at')},
+        'stored_at': time.time(),
+    }
+    try:
+        _cache().set(cache_key, entry, timeout=getattr(settings, 'LLM_CACHE_TTL', 3600))
+        return True
+    except Exception as e:
+        logger.warning(f"LLM cache store failed: {str(e)}")
+        return False
+
+
+
+def track_prompt_prefix(conversation_id: str, prefix: str, prefix_tokens: int) -> Dict[str, Any]:
+    """
+    Compare a conversation's prompt prefix with the one sent on its previous turn
+
+    Args:
+        conversation_id: Conversation ID
+        prefix: Stable prompt prefix (system prompt + injected memories)
+        prefix_tokens: Estimated token count of the prefix
+
+    Returns:
+        Dict with 'fingerprint', 'eligible_tokens' (0 when the prefix is below the
+        provider's minimum cacheable size) and 'prefix_reused' (same prefix as the
+        previous turn, still within the provider's cache lifetime)
+    """
+    fingerprint = hashlib.sha256(prefix.encode('utf-8')).hexdigest()[:16]
+    key = f"{PREFIX_KEY_PREFIX}:{conversation_id}"
+
+    try:
+        previous = _cache().get(key)
+        _cache().set(key, fingerprint, timeout=getattr(settings, 'LLM_PROMPT_CACHE_TTL', 300))
+    except Exception as e:
+        logger.warning(f"Prompt prefix tracking failed: {str(e)}")
+        previous = None
+
+    eligible = prefix_tokens >= getattr(settings, 'LLM_PROMPT_CACHE_MIN_TOKENS', 1024)
+    return {
+        'fingerprint': fingerprint,
+        'eligible_tokens': prefix_tokens if eligible else 0,
+        'prefix_reused': previous == fingerprint,
+    }
@@ -0,0 +1,167 @@
+"""
+LLM Cassette - Record and replay provider HTTP traffic
+In record mode every provider request/response pair is appended to a JSONL
+cassette with its timing. In replay mode responses are served from the cassette
+instead of the network, with the original latency (optionally scaled), so a
+benchmark run of a real conversation workload can be repeated offline and
+compared across commits.
+
+Secrets are never written: request headers (Authorization, x-api-key) are not
+recorded and the Google ?key= parameter is dropped. Requests are matched on
+provider, URL and JSON body.
+
+Settings:
+    LLM_CASSETTE_MODE: 'off' (default), 'record' or 'replay'
+    LLM_CASSETTE_PATH: Cassette file
+    LLM_CASSETTE_LATENCY_SCALE: Replay latency multiplier (0 = no delay)
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Any, List, Optional
+
+import requests
+from django.conf import settings
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+MODES = ['off', 'record', 'replay']
+
+# Response headers worth keeping (everything else may identify the account)
+RECORDED_HEADERS = ['Content-Type', 'Retry-After']
+
+_lock = threading.Lock()
+_overrides: Dict[str, Any] = {}
+_entries: Optional[Dict[str, List[Dict[str, Any]]]] = None
+_positions = defaultdict(int)
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when the cassette has no matching request"""
+    pass
+
+
+def configure(mode: str = None, path: str = None, latency_scale: float = None) -> None:
+    """Override the cassette settings at runtime (e.g. from a benchmark command)"""
+    global _entries
+    if mode is not None and mode not in MODES:
+        raise ValueError(f"Unknown cassette mode: {mode}")
+    with _lock:
+        for name, value in (('mode', mode), ('path', path), ('latency_scale', latency_scale)):
+            if value is not None:
+                _overrides[name] = value
+        _entries = None
+        _positions.clear()
+
+
+def get_mode() -> str:
+    return _overrides.get('mode') or getattr(settings, 'LLM_CASSETTE_MODE', 'off')
+
+
+def get_path() -> str:
+    return _overrides.get('path') or getattr(settings, 'LLM_CASSETTE_PATH', 'llm_cassette.jsonl')
+
+
+def get_latency_scale() -> float:
+    if 'latency_scale' in _overrides:
+        return _overrides['latency_scale']
+    return getattr(settings, 'LLM_CASSETTE_LATENCY_SCALE', 1.0)
+
+
+def _strip_query(url: str) -> str:
+    return url.split('?', 1)[0]
+
+
+def request_key(provider: str, url: str, payload: Dict[str, Any]) -> str:
+    """Match key for a request (secrets are not part of it)"""
+    canonical = json.dumps([provider, _strip_query(url), payload], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def record(provider: str, url: str, payload: Dict[str, Any], response, elapsed: float) -> None:
+    """
+    Append a request/response pair to the cassette
+
+    Args:
+        provider: Provider name
+        url: Request URL (query string is dropped)
+        payload: JSON request body
+        response: requests.Response
+        elapsed: Seconds from sending the request to reading the body
+    """
+    entry = {
+        'key': request_key(provider, url, payload),
+        'provider': provider,
+        'url': _strip_query(url),
+        'request': payload,
+        'status_code': response.status_code,
+        'headers': {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers},
+        'body': response.text,
+        'elapsed': round(elapsed, 4),
+        'recorded_at': time.time(),
+    }
+    path = get_path()
+    line = json.dumps(entry) + '\n'
+
+    with _lock:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+def _load() -> Dict[str, List[Dict[str, Any]]]:
+    global _entries
+    with _lock:
+        if _entries is None:
+            entries = defaultdict(list)
+            path = get_path()
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            entries[entry['key']].append(entry)
+            else:
+                logger.warning(f"⚠️ Cassette {path} not found, every provider call will miss")
+            _entries = entries
+            logger.info(f"📼 Loaded {sum(len(v) for v in entries.values())} cassette entries from {path}")
+        return _entries
+
+
+def replay(provider: str, url: str, payload: Dict[str, Any]) -> requests.Response:
+    """
+    Serve a recorded response for a request
+
+    Repeated identical requests get the recorded responses in order, wrapping
+    around when the recording runs out.
+
+    Raises:
+        CassetteMiss: No recording matches the request
+    """
+    key = request_key(provider, url, payload)
+    recordings = _load().get(key)
+    if not recordings:
+        raise CassetteMiss(f"No cassette entry for {provider} request {key[:12]}")
+
+    with _lock:
+        entry = recordings[_positions[key] % len(recordings)]
+        _positions[key] += 1
+
+    delay = entry.get('elapsed', 0) * get_latency_scale()
+    if delay > 0:
+        time.sleep(delay)
+
+    response = requests.Response()
+    response.status_code = entry['status_code']
+    response.headers = CaseInsensitiveDict(entry.get('headers', {}))
+    response._content = entry['body'].encode('utf-8')
+    response.encoding = 'utf-8'
+    response.url = entry['url']
+    return response
@@ -0,0 +1,297 @@
+"""
+LLM Failover - Routes a chat turn across a user's connected integrations
+Falls back to the next integration (by priority) when a provider fails and can
+hedge slow calls by firing the next provider once the first passes its p95 latency.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, List, Optional, Tuple
+
+from django.conf import settings
+
+from . import llm_cache
+from .llm_router import (
+    get_provider, build_context, build_messages, call_provider, error_response, is_keyless,
+    system_prefix, estimate_tokens, DEFAULT_GENERATION_PARAMS, DEFAULT_PROVIDER_MODELS
+)
+
+logger = logging.getLogger(__name__)
+
+# Rolling window of successful call latencies per provider (seconds)
+LATENCY_WINDOW = 100
+_latencies = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+_latency_lock = threading.Lock()
+
+_hedge_executor = None
+_executor_lock = threading.Lock()
+
+
+def record_latency(provider: str, seconds: float) -> None:
+    """Record the latency of a successful provider call"""
+    with _latency_lock:
+        _latencies[provider].append(seconds)
+
+
+def p95_latency(provider: str) -> Optional[float]:
+    """
+    Get the p95 latency of a provider from recent successful calls
+
+    Returns:
+        Latency in seconds, or None until enough samples are collected
+    """
+    with _latency_lock:
+        samples = sorted(_latencies[provider])
+
+    if len(samples) < getattr(settings, 'LLM_HEDGE_MIN_SAMPLES', 20):
+        return None
+    return samples[int(0.95 * (len(samples) - 1))]
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    with _executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'LLM_HEDGE_WORKERS', 8),
+                thread_name_prefix='llm-hedge'
+            )
+        return _hedge_executor
+
+
+def get_route_candidates(user, conversation) -> List[Dict[str, Any]]:
+    """
+    Build the ordered list of (provider, model, api_key) to try for a conversation.
+    The conversation's own provider always comes first, followed by the user's
+    other connected integrations ordered by priority.
+
+    Args:
+        user: User sending the message
+        conversation: Conversation model instance
+
+    Returns:
+        List of candidate dicts, empty if the primary provider has no connected integration
+    """
+    from .models import Integration
+    from .encryption_service import decrypt_api_key
+
+    model_name = conversation.model_id.replace('model-', '')
+    provider = get_provider(conversation.model_id)
+
+    # Providers that run without an integration (no failover for these)
+    if is_keyless(provider):
+        return [{'provider': provider, 'model': model_name, 'api_key': None}]
+
+    integrations = list(
+        Integration.objects.filter(user=user, status='connected').order_by('priority', 'created_at')
+    )
+    primary = next((i for i in integrations if i.provider == provider), None)
+    if primary is None:
+        return []
+
+    candidates = [{
+        'provider': provider,
+        'model': model_name,
+        'api_key': decrypt_api_key(primary.api_key),
+    }]
+
+    if not getattr(settings, 'LLM_FAILOVER_ENABLED', True):
+        return candidates
+
+    for integration in integrations:
+        if integration.id == primary.id:
+            continue
+        try:
+            api_key = decrypt_api_key(integration.api_key)
+        except Exception as e:
+            logger.warning(f"⚠️ Skipping {integration.provider} for failover: {str(e)}")
+            continue
+
+        fallback_model = (integration.model_id or DEFAULT_PROVIDER_MODELS.get(integration.provider, '')).replace('model-', '')
+        candidates.append({
+            'provider': integration.provider,
+            'model': fallback_model,
+            'api_key': api_key,
+        })
+
+    return candidates
+
+
+def _call(candidate: Dict[str, Any], context: Dict[str, Any], hedged: bool = False) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Call one candidate and describe the attempt for message metadata"""
+    provider = candidate['provider']
+    model = candidate['model']
+
+    start = time.monotonic()
+    try:
+        result = call_provider(provider, model, candidate['api_key'], context)
+    except Exception as e:
+        result = error_response(model, provider, str(e))
+    elapsed = time.monotonic() - start
+
+    if result['status'] == 'success':
+        record_latency(provider, elapsed)
+
+    attempt = {
+        'provider': provider,
+        'model': model,
+        'status': result['status'],
+        'latency_ms': int(elapsed * 1000),
+    }
+    if result['status'] != 'success':
+        attempt['error'] = result.get('error', '')
+    if hedged:
+        attempt['hedged'] = True
+
+    return result, attempt
+
+
+def _finalize(result: Dict[str, Any], attempts: List[Dict[str, Any]], primary: Dict[str, Any]) -> Dict[str, Any]:
+    result = dict(result)
+    result['attempts'] = attempts
+    if result['status'] == 'success' and result.get('provider') != primary['provider']:
+        result['failover'] = True
+    return result
+
+
+def _run_sequential(candidates: List[Dict[str, Any]], context: Dict[str, Any]) -> Dict[str, Any]:
+    """Try candidates one after another until one succeeds"""
+    attempts = []
+    result = None
+
+    for candidate in candidates:
+        result, attempt = _call(candidate, context)
+        attempts.append(attempt)
+        if result['status'] == 'success':
+            break
+        logger.warning(f"⚠️ {candidate['provider']} failed ({attempt['error']}), trying next integration")
+
+    return _finalize(result, attempts, candidates[0])
+
+
+def _run_hedged(candidates: List[Dict[str, Any]], context: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Try candidates in order, firing the next candidate in parallel when the first
+    has not answered within its p95 latency. The first success wins.
+    """
+    executor = _get_executor()
+    attempts = []
+    pending = {}
+    next_index = 0
+    hedged = False
+    last_result = None
+
+    def submit(is_hedge):
+        nonlocal next_index
+        candidate = candidates[next_index]
+        next_index += 1
+        pending[executor.submit(_call, candidate, context, is_hedge)] = candidate
+
+    submit(False)
+
+    while pending:
+        timeout = None
+        if not hedged and next_index < len(candidates):
+            timeout = p95_latency(candidates[0]['provider'])
+            if timeout is None:
+                timeout = getattr(settings, 'LLM_HEDGE_DEFAULT_DELAY', 10)
+
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+        if not done:
+            hedged = True
+            logger.info(f"⏱️ {candidates[0]['provider']} slower than {timeout:.1f}s, hedging with {candidates[next_index]['provider']}")
+            submit(True)
+            continue
+
+        for future in done:
+            pending.pop(future)
+            result, attempt = future.result()
+            attempts.append(attempt)
+
+            if result['status'] == 'success':
+                # Slower in-flight calls finish in the background and are ignored
+                for candidate in pending.values():
+                    attempts.append({
+                        'provider': candidate['provider'],
+                        'model': candidate['model'],
+                        'status': 'abandoned',
+                    })
+                return _finalize(result, attempts, candidates[0])
+
+            last_result = result
+            logger.warning(f"⚠️ {attempt['provider']} failed ({attempt['error']}), trying next integration")
+
+        if not pending and next_index < len(candidates):
+            submit(False)
+
+    return _finalize(last_result, attempts, candidates[0])
+
+
+def route_llm_call(conversation, user_message: str, candidates: List[Dict[str, Any]],
+                   use_cache: bool = None, hedge: bool = None, recall=None) -> Dict[str, Any]:
+    """
+    Get an LLM reply for a conversation, failing over across candidates
+
+    Args:
+        conversation: Conversation model instance
+        user_message: Current user message text
+        candidates: Ordered candidates from get_route_candidates
+        use_cache: Serve identical requests from the response cache
+                   (defaults to settings.LLM_CACHE_ENABLED)
+        hedge: Fire the next candidate when the first is slow
+               (defaults to settings.LLM_HEDGE_ENABLED)
+        recall: RecallTask from auto_recall.start_recall, merged into the context
+
+    Returns:
+        Response dict from the winning provider with an 'attempts' list
+    """
+    recalled = recall.result() if recall else None
+    context = build_context(conversation, user_message, recalled=recalled)
+    primary = candidates[0]
+
+    if use_cache is None:
+        use_cache = llm_cache.is_enabled()
+
+    cache_key = None
+    if use_cache and not is_keyless(primary['provider']):
+        cache_key = llm_cache.make_cache_key(
+            conversation.workspace_id, primary['provider'], primary['model'],
+            build_messages(context), DEFAULT_GENERATION_PARAMS
+        )
+        cached = llm_cache.get_cached_response(cache_key)
+        if cached:
+            logger.info(f"⚡ LLM cache hit: model={primary['model']}, provider={primary['provider']}")
+            cached['attempts'] = [{
+                'provider': primary['provider'],
+                'model': primary['model'],
+                'status': 'cached',
+                'latency_ms': 0,
+            }]
+            return cached
+
+    if hedge is None:
+        hedge = getattr(settings, 'LLM_HEDGE_ENABLED', False)
+
+    logger.info(f"🔍 LLM call: model={primary['model']}, provider={primary['provider']}, candidates={len(candidates)}")
+
+    if hedge and len(candidates) > 1:
+        result = _run_hedged(candidates, context)
+    else:
+        result = _run_sequential(candidates, context)
+
+    # Only cache replies that actually came from the requested provider
+    if cache_key and not result.get('failover'):
+        llm_cache.store_response(cache_key, result)
+
+    if result['status'] == 'success':
+        prefix = system_prefix(context)
+        prompt_cache = llm_cache.track_prompt_prefix(conversation.id, prefix, estimate_tokens(prefix))
+        prompt_cache['cache_read_tokens'] = result.get('cache_read_tokens', 0)
+        result['prompt_cache'] = prompt_cache
+        if context['recalled_ids']:
+            result['recalled_memories'] = context['recalled_ids']
+
+    return result
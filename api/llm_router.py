@@ -1,13 +1,19 @@
 """
 LLM Router - Routes requests to different LLM providers
-Supports: OpenAI, Anthropic, Google Gemini, Groq, DeepSeek
+Supports: OpenAI, Anthropic, Google Gemini, Groq, DeepSeek, plus any
+OpenAI-compatible server registered through settings.LLM_EXTRA_PROVIDERS
 Optimized for low memory usage on free tier hosting
 """
 import os
+import time
 import requests
 import logging
 from typing import Dict, Any, List
 
+from django.conf import settings
+
+from . import context_cache, llm_cassette, llm_scheduler, provider_guard
+
 logger = logging.getLogger(__name__)
 
 # Supported LLM models - Dec 2025
@@ -44,6 +50,21 @@ SUPPORTED_MODELS = {
     'echo': 'echo',
 }
 
+# Default model per provider, used when an integration has no model selected
+DEFAULT_PROVIDER_MODELS = {
+    'openai': 'gpt-4o',
+    'anthropic': 'claude-3.5-sonnet',
+    'google': 'gemini-2.0-flash',
+    'deepseek': 'deepseek-chat',
+    'groq': 'llama-3.3-70b-versatile',
+}
+
+# Generation params sent to every provider
+DEFAULT_GENERATION_PARAMS = {
+    'temperature': 0.7,
+    'max_tokens': 2000,
+}
+
 
 def get_provider(model_name: str) -> str:
     """Get provider for a model name"""
@@ -60,67 +81,106 @@ def get_provider(model_name: str) -> str:
     return 'echo'
 
 
-def build_context(conversation, user_message: str) -> Dict[str, Any]:
-    """Build context for AI model - optimized to limit history"""
-    system_prompt = "You are a helpful AI assistant in the Chimera Protocol system."
+def build_context(conversation, user_message: str, recalled: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Build context for AI model - optimized to limit history
     
-    # Get only active injected memories
-    injected_memories = conversation.injected_memory_links.select_related('memory').filter(is_active=True)
-    memories_text = ""
+    Args:
+        conversation: Conversation model instance
+        user_message: Current user message text
+        recalled: Memories found by auto-recall for this turn (merged with the
+                  manual injections, skipping any already injected)
+    """
+    system_prompt = "You are a helpful AI assistant in the Chimera Protocol system."
     
-    if injected_memories.exists():
-        memories_text = "\n\n=== Injected Context ===\n"
-        for link in injected_memories[:5]:  # Limit to 5 memories
-            memory = link.memory
-            # Truncate long memories
-            content = memory.content[:1000] if len(memory.content) > 1000 else memory.content
-            memories_text += f"\n[{memory.title}]\n{content}\n"
-        memories_text += "\n=== End Context ===\n"
+    # Rendered memory block and recent history come from the per-conversation
+    # context cache (at most one query each on a miss)
+    injected_ids, memories_text = context_cache.get_injected(conversation)
+    history_messages = context_cache.get_history(conversation)
     
-    # Get conversation history (limit to last 5 messages for memory efficiency)
-    history_messages = list(conversation.messages.order_by('-timestamp')[:5])
-    history_messages.reverse()
+    recalled = [m for m in recalled or [] if m['id'] not in injected_ids]
     
     return {
         'system_prompt': system_prompt,
         'memories_text': memories_text,
+        'recalled_text': context_cache.render_memories(
+            [(m['title'], m['content']) for m in recalled], heading='Recalled Context'
+        ),
+        'recalled_ids': [m['id'] for m in recalled],
         'history': history_messages,
-        'user_message': user_message
+        'user_message': user_message,
+        'workspace_id': conversation.workspace_id,
+        'conversation_id': conversation.id
     }
 
 
-def call_llm_with_conversation(conversation, user_message: str, api_key: str) -> Dict[str, Any]:
-    """Route LLM call to appropriate provider with conversation context"""
-    context = build_context(conversation, user_message)
-    model_id = conversation.model_id
-    model_name = model_id.replace('model-', '')
-    provider = get_provider(model_id)
+def system_prefix(context: Dict[str, Any]) -> str:
+    """
+    Stable part of the prompt: system prompt plus injected memories.
+    It only changes when an injection is toggled, so every adapter sends it
+    first and providers can reuse their cached prefix across turns.
+    """
+    system_content = context['system_prompt']
+    if context['memories_text']:
+        system_content += context['memories_text']
+    return system_content
+
+
+def system_suffix(context: Dict[str, Any]) -> str:
+    """
+    Per-turn part of the system prompt (auto-recalled memories).
+    Sent after the stable prefix so it never invalidates the provider's prefix cache.
+    """
+    return context.get('recalled_text', '')
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English text)"""
+    return len(text) // 4
+
+
+def call_provider(provider: str, model_name: str, api_key: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Call a single provider adapter with a prebuilt context.
+    Calls are rejected up front while the provider key is rate limited or its
+    circuit breaker is open, instead of waiting on a request that will fail,
+    then wait for a slot in the provider's fair-share queue.
+    """
+    if not get_adapter(provider).remote:
+        return _dispatch(provider, model_name, api_key, context)
     
-    logger.info(f"🔍 LLM call: model={model_name}, provider={provider}")
+    if api_key:
+        rejection = provider_guard.acquire(provider, api_key)
+        if rejection:
+            logger.warning(f"⛔ {provider} call rejected: {rejection['error']}")
+            return error_response(model_name, provider, **rejection)
+    
+    # Bounded, fair-share concurrency per provider (tenant = workspace)
+    try:
+        with llm_scheduler.provider_slot(provider, context.get('workspace_id')):
+            result = _dispatch(provider, model_name, api_key, context)
+    except llm_scheduler.SchedulerRejected as e:
+        logger.warning(f"⛔ {provider} call not admitted: {str(e)}")
+        if api_key:
+            provider_guard.release(provider, api_key)
+        return error_response(model_name, provider, f"Server busy: {str(e)}. Try again shortly.",
+                              overloaded=True, retry_after=5)
     
-    if provider == 'openai':
-        return call_openai(model_name, api_key, context)
-    elif provider == 'anthropic':
-        return call_anthropic(model_name, api_key, context)
-    elif provider == 'google':
-        return call_google(model_name, api_key, context)
-    elif provider == 'deepseek':
-        return call_deepseek(model_name, api_key, context)
-    elif provider == 'groq':
-        return call_groq(model_name, api_key, context)
-    else:
-        return call_echo(model_name, user_message)
+    if api_key:
+        provider_guard.record_result(provider, api_key, result)
+    return result
+
+
+def _dispatch(provider: str, model_name: str, api_key: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    return get_adapter(provider).call(model_name, api_key, context)
 
 
 def build_messages(context: Dict[str, Any]) -> List[Dict[str, str]]:
     """Build messages array for OpenAI-compatible APIs"""
     messages = []
     
-    # System message with memories
-    system_content = context['system_prompt']
-    if context['memories_text']:
-        system_content += context['memories_text']
-    messages.append({'role': 'system', 'content': system_content})
+    # System message with memories (stable prefix first)
+    messages.append({'role': 'system', 'content': system_prefix(context) + system_suffix(context)})
     
     # History
     for msg in context['history']:
@@ -132,58 +192,137 @@ def build_messages(context: Dict[str, Any]) -> List[Dict[str, str]]:
     return messages
 
 
-def call_openai(model: str, api_key: str, context: Dict[str, Any]) -> Dict[str, Any]:
-    """Call OpenAI API using requests (lightweight)"""
-    if not api_key:
-        return error_response(model, 'openai', 'No API key provided')
+class ProviderAdapter:
+    """
+    Builds requests for one provider and parses its replies.
+    Endpoint, static headers and the model map are prepared once at registration,
+    so a call only fills in the payload and the API key. Each adapter keeps its
+    own requests.Session so connections to the provider are reused.
+    """
+    # Remote adapters go through the rate limiter and the fair-share scheduler
+    remote = True
     
-    try:
-        messages = build_messages(context)
+    def __init__(self, name: str, url: str, model_map: Dict[str, str] = None, timeout: int = 60,
+                 requires_key: bool = True, default_api_key: str = None):
+        self.name = name
+        self.url = url
+        self.model_map = dict(model_map or {})
+        self.timeout = timeout
+        self.requires_key = requires_key
+        self.default_api_key = default_api_key
+        self.headers = {'Content-Type': 'application/json'}
+        self.session = requests.Session()
+    
+    def api_model(self, model: str) -> str:
+        """Map our model name to the provider's model ID"""
+        return self.model_map.get(model, model)
+    
+    def build_request(self, api_model: str, api_key: str, context: Dict[str, Any]):
+        """Return (url, headers, params, payload) for a call"""
+        raise NotImplementedError
+    
+    def parse_reply(self, data: Dict[str, Any], model: str) -> Dict[str, Any]:
+        """Turn a 200 response body into a success dict (None if it has no reply)"""
+        raise NotImplementedError
+    
+    def parse_error(self, response) -> str:
+        """Extract the provider's error message from a non-200 response"""
+        try:
+            return response.json().get('error', {}).get('message', response.text[:200])
+        except Exception:
+            return response.text[:200]
+    
+    def handle_error(self, model: str, api_key: str, context: Dict[str, Any], response) -> Dict[str, Any]:
+        return http_error_response(model, self.name, response, self.parse_error(response))
+    
+    def post(self, url: str, headers: Dict[str, str], params: Dict[str, str], payload: Dict[str, Any]):
+        """Send a request to the provider (single transport point for every adapter)"""
+        mode = llm_cassette.get_mode()
+        if mode == 'replay':
+            return llm_cassette.replay(self.name, url, payload)
         
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {api_key}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': model,
-                'messages': messages,
-                'temperature': 0.7,
-                'max_tokens': 2000
-            },
-            timeout=60
-        )
+        start = time.monotonic()
+        response = self.session.post(url, headers=headers, params=params, json=payload, timeout=self.timeout)
+        if mode == 'record':
+            llm_cassette.record(self.name, url, payload, response, time.monotonic() - start)
+        return response
+    
+    def send(self, api_model: str, api_key: str, context: Dict[str, Any]):
+        url, headers, params, payload = self.build_request(api_model, api_key, context)
+        return self.post(url, headers, params, payload)
+    
+    def call(self, model: str, api_key: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Call the provider and return a standard response dict"""
+        api_key = api_key or self.default_api_key
+        if self.requires_key and not api_key:
+            return error_response(model, self.name, 'No API key provided')
         
-        if response.status_code == 200:
-            data = response.json()
-            return {
-                'reply': data['choices'][0]['message']['content'],
-                'model_used': data.get('model', model),
-                'provider': 'openai',
-                'tokens': data.get('usage', {}).get('total_tokens', 0),
-                'status': 'success'
-            }
-        else:
-            error_msg = response.json().get('error', {}).get('message', response.text[:200])
-            return error_response(model, 'openai', error_msg)
+        try:
+            response = self.send(self.api_model(model), api_key, context)
+            
+            if response.status_code == 200:
+                result = self.parse_reply(response.json(), model)
+                if result:
+                    return result
+                return error_response(model, self.name, 'No response generated')
             
-    except requests.exceptions.Timeout:
-        return error_response(model, 'openai', 'Request timeout')
-    except Exception as e:
-        return error_response(model, 'openai', str(e))
+            return self.handle_error(model, api_key, context, response)
+        
+        except requests.exceptions.Timeout:
+            return error_response(model, self.name, 'Request timeout')
+        except llm_cassette.CassetteMiss as e:
+            # Not a provider failure: keep it out of the circuit breaker
+            return error_response(model, self.name, str(e), status_code=404)
+        except Exception as e:
+            logger.error(f"{self.name} API error: {str(e)}")
+            return error_response(model, self.name, str(e))
+
+
+class OpenAICompatibleAdapter(ProviderAdapter):
+    """OpenAI chat completions API (also used by Groq, DeepSeek and local servers)"""
+    
+    def build_request(self, api_model, api_key, context):
+        headers = dict(self.headers)
+        if api_key:
+            headers['Authorization'] = f'Bearer {api_key}'
+        payload = {
+            'model': api_model,
+            'messages': build_messages(context),
+            'temperature': DEFAULT_GENERATION_PARAMS['temperature'],
+            'max_tokens': DEFAULT_GENERATION_PARAMS['max_tokens']
+        }
+        return self.url, headers, None, payload
+    
+    def parse_reply(self, data, model):
+        usage = data.get('usage') or {}
+        return {
+            'reply': data['choices'][0]['message']['content'],
+            'model_used': data.get('model', model),
+            'provider': self.name,
+            'tokens': usage.get('total_tokens', 0),
+            # OpenAI caches prompt prefixes of 1024+ tokens automatically
+            'cache_read_tokens': (usage.get('prompt_tokens_details') or {}).get('cached_tokens', 0),
+            'status': 'success'
+        }
 
 
-def call_anthropic(model: str, api_key: str, context: Dict[str, Any]) -> Dict[str, Any]:
-    """Call Anthropic Claude API using requests"""
-    if not api_key:
-        return error_response(model, 'anthropic', 'No API key provided')
+class AnthropicAdapter(ProviderAdapter):
+    """Anthropic Messages API"""
     
-    try:
-        # Build system and messages
-        system_content = context['system_prompt']
-        if context['memories_text']:
-            system_content += context['memories_text']
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.headers['anthropic-version'] = '2023-06-01'
+    
+    def build_request(self, api_model, api_key, context):
+        system_content = system_prefix(context)
+        suffix = system_suffix(context)
+        if estimate_tokens(system_content) >= getattr(settings, 'LLM_PROMPT_CACHE_MIN_TOKENS', 1024):
+            # Mark the stable prefix so later turns read it from Anthropic's prompt cache
+            system = [{'type': 'text', 'text': system_content, 'cache_control': {'type': 'ephemeral'}}]
+            if suffix:
+                system.append({'type': 'text', 'text': suffix})
+        else:
+            system = system_content + suffix
         
         messages = []
         for msg in context['history']:
@@ -191,286 +330,124 @@ def call_anthropic(model: str, api_key: str, context: Dict[str, Any]) -> Dict[st
                 messages.append({'role': msg.role, 'content': msg.content})
         messages.append({'role': 'user', 'content': context['user_message']})
         
-        # Map model names to Anthropic format
-        model_map = {
-            'claude-3.5-sonnet': 'claude-3-5-sonnet-20241022',
-            'claude-3-opus': 'claude-3-opus-20240229',
-            'claude-3-sonnet': 'claude-3-sonnet-20240229',
-            'claude-3-haiku': 'claude-3-haiku-20240307',
+        headers = dict(self.headers)
+        if api_key:
+            headers['x-api-key'] = api_key
+        payload = {
+            'model': api_model,
+            'system': system,
+            'messages': messages,
+            'max_tokens': DEFAULT_GENERATION_PARAMS['max_tokens']
+        }
+        return self.url, headers, None, payload
+    
+    def parse_reply(self, data, model):
+        usage = data.get('usage') or {}
+        cache_read = usage.get('cache_read_input_tokens') or 0
+        cache_write = usage.get('cache_creation_input_tokens') or 0
+        return {
+            'reply': data['content'][0]['text'],
+            'model_used': data.get('model', model),
+            'provider': self.name,
+            'tokens': usage.get('input_tokens', 0) + usage.get('output_tokens', 0) + cache_read + cache_write,
+            'cache_read_tokens': cache_read,
+            'cache_write_tokens': cache_write,
+            'status': 'success'
         }
-        api_model = model_map.get(model, model)
-        
-        response = requests.post(
-            'https://api.anthropic.com/v1/messages',
-            headers={
-                'x-api-key': api_key,
-                'anthropic-version': '2023-06-01',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': api_model,
-                'system': system_content,
-                'messages': messages,
-                'max_tokens': 2000
-            },
-            timeout=60
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            return {
-                'reply': data['content'][0]['text'],
-                'model_used': data.get('model', model),
-                'provider': 'anthropic',
-                'tokens': data.get('usage', {}).get('input_tokens', 0) + data.get('usage', {}).get('output_tokens', 0),
-                'status': 'success'
-            }
-        else:
-            error_msg = response.json().get('error', {}).get('message', response.text[:200])
-            return error_response(model, 'anthropic', error_msg)
-            
-    except requests.exceptions.Timeout:
-        return error_response(model, 'anthropic', 'Request timeout')
-    except Exception as e:
-        return error_response(model, 'anthropic', str(e))
 
 
-def call_google(model: str, api_key: str, context: Dict[str, Any]) -> Dict[str, Any]:
+class GoogleAdapter(ProviderAdapter):
     """
-    Call Google Gemini API using REST API (Dec 2025)
+    Google Gemini REST API
     Docs: https://ai.google.dev/gemini-api/docs/text-generation
     """
-    if not api_key:
-        return error_response(model, 'google', 'No API key provided')
+    FALLBACK_MODEL = 'gemini-2.0-flash'
+    RATE_LIMIT_MESSAGE = 'Rate limit exceeded. Try Groq instead (free).'
     
-    try:
-        # Map model names to actual Google API model IDs
-        # Google requires specific model names - use latest stable versions
-        model_map = {
-            'gemini-2.0-flash': 'gemini-2.0-flash',
-            'gemini-2.0-flash-exp': 'gemini-2.0-flash-exp',
-            'gemini-1.5-flash': 'gemini-1.5-flash-latest',
-            'gemini-1.5-pro': 'gemini-1.5-pro-latest',
-        }
-        api_model = model_map.get(model, 'gemini-2.0-flash')
-        
-        # Build system instruction
-        system_text = context['system_prompt']
-        if context['memories_text']:
-            system_text += context['memories_text']
+    def api_model(self, model):
+        # Google requires specific model names; unknown ones use the stable default
+        return self.model_map.get(model, self.FALLBACK_MODEL)
+    
+    def build_request(self, api_model, api_key, context):
+        system_text = system_prefix(context) + system_suffix(context)
         
-        # Build contents for Gemini
         contents = []
-        
-        # Add history
         for msg in context['history']:
             role = 'user' if msg.role == 'user' else 'model'
-            contents.append({
-                'role': role,
-                'parts': [{'text': msg.content}]
-            })
-        
-        # Add current message
-        contents.append({
-            'role': 'user',
-            'parts': [{'text': context['user_message']}]
-        })
-        
-        # Use v1beta API endpoint with system instruction
-        url = f'https://generativelanguage.googleapis.com/v1beta/models/{api_model}:generateContent?key={api_key}'
+            contents.append({'role': role, 'parts': [{'text': msg.content}]})
+        contents.append({'role': 'user', 'parts': [{'text': context['user_message']}]})
         
-        request_body = {
+        payload = {
             'contents': contents,
-            'systemInstruction': {
-                'parts': [{'text': system_text}]
-            },
+            'systemInstruction': {'parts': [{'text': system_text}]},
             'generationConfig': {
-                'temperature': 0.7,
-                'maxOutputTokens': 2000,
+                'temperature': DEFAULT_GENERATION_PARAMS['temperature'],
+                'maxOutputTokens': DEFAULT_GENERATION_PARAMS['max_tokens'],
             }
         }
-        
-        response = requests.post(
-            url,
-            headers={'Content-Type': 'application/json'},
-            json=request_body,
-            timeout=60
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            
-            # Extract text from response
-            if 'candidates' in data and data['candidates']:
-                candidate = data['candidates'][0]
-                if 'content' in candidate and 'parts' in candidate['content']:
-                    text = candidate['content']['parts'][0].get('text', '')
-                    return {
-                        'reply': text,
-                        'model_used': model,
-                        'provider': 'google',
-                        'tokens': 0,
-                        'status': 'success'
-                    }
-            
-            return error_response(model, 'google', 'No response generated')
-        
-        elif response.status_code == 429:
-            return error_response(model, 'google', 'Rate limit exceeded. Try Groq instead (free).')
-        elif response.status_code == 404:
-            # Model not found - try fallback
-            logger.warning(f"Model {api_model} not found, trying gemini-2.0-flash")
-            return call_google_fallback(api_key, context)
-        else:
-            try:
-                error_data = response.json()
-                error_msg = error_data.get('error', {}).get('message', response.text[:200])
-                # Check for quota/rate limit errors in message (Google sometimes uses 400/403)
-                if any(word in error_msg.lower() for word in ['quota', 'rate', 'limit', 'exceeded']):
-                    return error_response(model, 'google', 'Rate limit exceeded. Try Groq instead (free).')
-            except:
-                error_msg = response.text[:200]
-            logger.error(f"Google API error {response.status_code}: {error_msg}")
-            return error_response(model, 'google', error_msg)
-            
-    except requests.exceptions.Timeout:
-        return error_response(model, 'google', 'Request timeout')
-    except Exception as e:
-        logger.error(f"Google API error: {str(e)}")
-        return error_response(model, 'google', str(e))
-
-
-def call_google_fallback(api_key: str, context: Dict[str, Any]) -> Dict[str, Any]:
-    """Fallback to gemini-2.0-flash if other models fail"""
-    try:
-        system_text = context['system_prompt']
-        if context['memories_text']:
-            system_text += context['memories_text']
-        
-        contents = []
-        for msg in context['history']:
-            role = 'user' if msg.role == 'user' else 'model'
-            contents.append({'role': role, 'parts': [{'text': msg.content}]})
-        contents.append({'role': 'user', 'parts': [{'text': context['user_message']}]})
-        
-        url = f'https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}'
-        
-        response = requests.post(
-            url,
-            headers={'Content-Type': 'application/json'},
-            json={
-                'contents': contents,
-                'systemInstruction': {'parts': [{'text': system_text}]},
-                'generationConfig': {'temperature': 0.7, 'maxOutputTokens': 2000}
-            },
-            timeout=60
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            if 'candidates' in data and data['candidates']:
-                text = data['candidates'][0].get('content', {}).get('parts', [{}])[0].get('text', '')
-                return {'reply': text, 'model_used': 'gemini-2.0-flash', 'provider': 'google', 'tokens': 0, 'status': 'success'}
-        
-        return error_response('gemini-2.0-flash', 'google', 'Fallback also failed')
-    except Exception as e:
-        return error_response('gemini-2.0-flash', 'google', str(e))
-        return error_response(model, 'google', str(e))
-
-
-def call_groq(model: str, api_key: str, context: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Call Groq API (FREE, fast inference) - Dec 2025
-    Docs: https://console.groq.com/docs/api-reference
-    Uses OpenAI-compatible API
-    """
-    if not api_key:
-        return error_response(model, 'groq', 'No API key provided')
+        return self.url.format(model=api_model), self.headers, {'key': api_key}, payload
     
-    try:
-        messages = build_messages(context)
-        
-        response = requests.post(
-            'https://api.groq.com/openai/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {api_key}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': model,
-                'messages': messages,
-                'temperature': 0.7,
-                'max_tokens': 2000
-            },
-            timeout=30  # Groq is fast
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            return {
-                'reply': data['choices'][0]['message']['content'],
-                'model_used': data.get('model', model),
-                'provider': 'groq',
-                'tokens': data.get('usage', {}).get('total_tokens', 0),
-                'status': 'success'
-            }
-        else:
-            try:
-                error_msg = response.json().get('error', {}).get('message', response.text[:200])
-            except:
-                error_msg = response.text[:200]
-            return error_response(model, 'groq', error_msg)
-            
-    except requests.exceptions.Timeout:
-        return error_response(model, 'groq', 'Request timeout')
-    except Exception as e:
-        logger.error(f"Groq API error: {str(e)}")
-        return error_response(model, 'groq', str(e))
-
-
-def call_deepseek(model: str, api_key: str, context: Dict[str, Any]) -> Dict[str, Any]:
-    """Call DeepSeek API (OpenAI-compatible)"""
-    if not api_key:
-        return error_response(model, 'deepseek', 'No API key provided')
+    def parse_reply(self, data, model):
+        candidates = data.get('candidates')
+        if not candidates:
+            return None
+        parts = candidates[0].get('content', {}).get('parts')
+        if not parts:
+            return None
+        return {
+            'reply': parts[0].get('text', ''),
+            'model_used': model,
+            'provider': self.name,
+            'tokens': data.get('usageMetadata', {}).get('totalTokenCount', 0),
+            'cache_read_tokens': data.get('usageMetadata', {}).get('cachedContentTokenCount', 0),
+            'status': 'success'
+        }
     
-    try:
-        messages = build_messages(context)
+    def handle_error(self, model, api_key, context, response):
+        if response.status_code == 429:
+            return http_error_response(model, self.name, response, self.RATE_LIMIT_MESSAGE)
         
-        response = requests.post(
-            'https://api.deepseek.com/chat/completions',
-            headers={
-                'Authorization': f'Bearer {api_key}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': model,
-                'messages': messages,
-                'temperature': 0.7,
-                'max_tokens': 2000
-            },
-            timeout=60
-        )
+        if response.status_code == 404:
+            logger.warning(f"Model {self.api_model(model)} not found, trying {self.FALLBACK_MODEL}")
+            return self.call_fallback(api_key, context)
         
-        if response.status_code == 200:
-            data = response.json()
-            return {
-                'reply': data['choices'][0]['message']['content'],
-                'model_used': data.get('model', model),
-                'provider': 'deepseek',
-                'tokens': data.get('usage', {}).get('total_tokens', 0),
-                'status': 'success'
-            }
-        else:
-            try:
-                error_msg = response.json().get('error', {}).get('message', response.text[:200])
-            except:
-                error_msg = response.text[:200]
-            return error_response(model, 'deepseek', error_msg)
-            
-    except requests.exceptions.Timeout:
-        return error_response(model, 'deepseek', 'Request timeout')
-    except Exception as e:
-        return error_response(model, 'deepseek', str(e))
+        try:
+            error_data = response.json().get('error', {})
+            error_msg = error_data.get('message', response.text[:200])
+            # Google reports quota errors as RESOURCE_EXHAUSTED (sometimes with 400/403)
+            if error_data.get('status') == 'RESOURCE_EXHAUSTED':
+                result = http_error_response(model, self.name, response, self.RATE_LIMIT_MESSAGE)
+                result['rate_limited'] = True
+                result['retry_after'] = result.get('retry_after') or _google_retry_delay(error_data)
+                return result
+        except Exception:
+            error_msg = response.text[:200]
+        logger.error(f"Google API error {response.status_code}: {error_msg}")
+        return http_error_response(model, self.name, response, error_msg)
+    
+    def call_fallback(self, api_key: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Fallback to gemini-2.0-flash if the requested model is not available"""
+        model = self.FALLBACK_MODEL
+        try:
+            response = self.send(model, api_key, context)
+            if response.status_code == 200:
+                result = self.parse_reply(response.json(), model)
+                if result:
+                    return result
+            return error_response(model, self.name, 'Fallback also failed')
+        except Exception as e:
+            return error_response(model, self.name, str(e))
+
+
+class EchoAdapter(ProviderAdapter):
+    """Echo mode for demo/testing"""
+    remote = False
+    
+    def __init__(self, name: str = 'echo'):
+        super().__init__(name, url='', requires_key=False)
+    
+    def call(self, model, api_key, context):
+        return call_echo(model, context['user_message'])
 
 
 def call_echo(model: str, user_message: str) -> Dict[str, Any]:
@@ -484,9 +461,96 @@ def call_echo(model: str, user_message: str) -> Dict[str, Any]:
     }
 
 
-def error_response(model: str, provider: str, error: str) -> Dict[str, Any]:
-    """Standard error response"""
-    return {
+PROVIDER_REGISTRY: Dict[str, ProviderAdapter] = {}
+
+
+def register_provider(adapter: ProviderAdapter, models: List[str] = None) -> ProviderAdapter:
+    """
+    Register a provider adapter (replaces any adapter with the same name)
+    
+    Args:
+        adapter: Adapter instance
+        models: Model names served by this provider, added to SUPPORTED_MODELS
+    """
+    PROVIDER_REGISTRY[adapter.name] = adapter
+    for model in models or []:
+        SUPPORTED_MODELS[model] = adapter.name
+    return adapter
+
+
+def get_adapter(provider: str) -> ProviderAdapter:
+    """Get the adapter for a provider (unknown providers fall back to echo)"""
+    return PROVIDER_REGISTRY.get(provider) or PROVIDER_REGISTRY['echo']
+
+
+def is_keyless(provider: str) -> bool:
+    """True if the provider runs without a user integration"""
+    return not get_adapter(provider).requires_key
+
+
+register_provider(OpenAICompatibleAdapter('openai', 'https://api.openai.com/v1/chat/completions'))
+register_provider(AnthropicAdapter('anthropic', 'https://api.anthropic.com/v1/messages', model_map={
+    'claude-3.5-sonnet': 'claude-3-5-sonnet-20241022',
+    'claude-3-opus': 'claude-3-opus-20240229',
+    'claude-3-sonnet': 'claude-3-sonnet-20240229',
+    'claude-3-haiku': 'claude-3-haiku-20240307',
+}))
+register_provider(GoogleAdapter(
+    'google', 'https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent',
+    model_map={
+        'gemini-2.0-flash': 'gemini-2.0-flash',
+        'gemini-2.0-flash-exp': 'gemini-2.0-flash-exp',
+        'gemini-1.5-flash': 'gemini-1.5-flash-latest',
+        'gemini-1.5-pro': 'gemini-1.5-pro-latest',
+    }
+))
+register_provider(OpenAICompatibleAdapter('deepseek', 'https://api.deepseek.com/chat/completions'))
+register_provider(OpenAICompatibleAdapter('groq', 'https://api.groq.com/openai/v1/chat/completions', timeout=30))  # Groq is fast
+register_provider(EchoAdapter())
+
+
+def register_extra_providers(config: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Register extra providers from configuration (settings.LLM_EXTRA_PROVIDERS),
+    e.g. a local OpenAI-compatible server or the mock server for load tests:
+    
+        {"local": {"base_url": "http://127.0.0.1:8089/v1", "models": ["local-model"]}}
+    
+    Optional keys: api ("openai" or "anthropic" request format, default "openai"),
+    api_key (sent when the user has no integration), model_map, timeout,
+    requires_key (default false: usable without an integration)
+    """
+    for name, options in config.items():
+        base_url = options['base_url'].rstrip('/')
+        if options.get('api', 'openai') == 'anthropic':
+            adapter_class, url = AnthropicAdapter, base_url + '/messages'
+        else:
+            adapter_class, url = OpenAICompatibleAdapter, base_url + '/chat/completions'
+        
+        register_provider(
+            adapter_class(
+                name,
+                url,
+                model_map=options.get('model_map'),
+                timeout=options.get('timeout', 60),
+                requires_key=options.get('requires_key', False),
+                default_api_key=options.get('api_key')
+            ),
+            models=options.get('models', [])
+        )
+        logger.info(f"🔌 Registered LLM provider '{name}' at {base_url}")
+
+
+register_extra_providers(getattr(settings, 'LLM_EXTRA_PROVIDERS', {}))
+
+
+def error_response(model: str, provider: str, error: str, **details) -> Dict[str, Any]:
+    """
+    Standard error response
+    
+    Optional details: status_code, retry_after, rate_limited, circuit_open, overloaded
+    """
+    result = {
         'reply': f"[{provider.upper()} Error] {error}",
         'model_used': model,
         'provider': provider,
@@ -494,6 +558,25 @@ def error_response(model: str, provider: str, error: str) -> Dict[str, Any]:
         'status': 'error',
         'error': error
     }
+    result.update(details)
+    return result
+
+
+def http_error_response(model: str, provider: str, response, error: str) -> Dict[str, Any]:
+    """Error response for a non-200 provider reply, keeping status and Retry-After"""
+    details = {'status_code': response.status_code}
+    if response.status_code == 429:
+        details['rate_limited'] = True
+        details['retry_after'] = provider_guard.parse_retry_after(response.headers.get('Retry-After'))
+    return error_response(model, provider, error, **details)
+
+
+def _google_retry_delay(error_data: Dict[str, Any]):
+    """Extract retryDelay from a Google RetryInfo error detail"""
+    for detail in error_data.get('details', []):
+        if detail.get('@type', '').endswith('RetryInfo'):
+            return provider_guard.parse_retry_after(detail.get('retryDelay'))
+    return None
 
 
 # Legacy function for backward compatibility
@@ -513,7 +596,7 @@ def call_llm(model_name: str, prompt: str, context: str = "") -> Dict[str, Any]:
     if provider == 'echo':
         return call_echo(model_name, prompt)
     
-    return error_response(model_name, provider, 'Use call_llm_with_conversation for full functionality')
+    return error_response(model_name, provider, 'Use llm_failover.route_llm_call for full functionality')
 
 
 def is_model_supported(model_name: str) -> bool:
@@ -0,0 +1,222 @@
+"""
+LLM Scheduler - Bounded, fair-share admission for outbound LLM calls
+Each provider gets its own queue with a concurrency cap, so a slow provider
+never blocks calls to another. Waiting calls are granted slots by weighted
+fair queuing across tenants (workspaces): a workspace flooding the queue only
+delays its own requests. Calls that wait past their deadline are rejected.
+
+This is per process. Across gunicorn workers the effective cap is
+max_concurrency * workers.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Number of recent wait times kept per provider for metrics
+WAIT_SAMPLE_WINDOW = 500
+
+
+class SchedulerRejected(Exception):
+    """Raised when a call cannot be admitted (queue full or deadline passed)"""
+    pass
+
+
+class _Ticket:
+    __slots__ = ('tenant', 'enqueued_at', 'granted', 'cancelled')
+
+    def __init__(self, tenant: str):
+        self.tenant = tenant
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        self.cancelled = False
+
+
+class ProviderQueue:
+    """
+    Admission queue for one provider
+
+    Waiting tickets are ordered by virtual finish tag:
+        tag = max(virtual_time, tenant's last tag) + 1 / weight
+    so tenants with many queued calls fall behind tenants with few.
+    """
+
+    def __init__(self, provider: str, max_concurrency: int, max_queue: int):
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._depth = 0
+        self._heap = []
+        self._seq = itertools.count()
+        self._tenant_tags = {}
+        self._virtual_time = 0.0
+
+        self._wait_samples = deque(maxlen=WAIT_SAMPLE_WINDOW)
+        self._admitted = 0
+        self._timeouts = 0
+        self._rejected = 0
+
+    def acquire(self, tenant: str, weight: float = 1.0, timeout: float = None) -> float:
+        """
+        Wait for a slot
+
+        Args:
+            tenant: Fair-share key (workspace id)
+            weight: Relative share of the tenant (higher gets more slots)
+            timeout: Max seconds to wait in the queue
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            SchedulerRejected: Queue is full or the deadline passed
+        """
+        with self._cond:
+            if self._active < self.max_concurrency and not self._depth:
+                self._active += 1
+                self._record_wait(0.0)
+                return 0.0
+
+            if self._depth >= self.max_queue:
+                self._rejected += 1
+                raise SchedulerRejected(f"{self.provider} queue is full ({self._depth} waiting)")
+
+            tag = max(self._virtual_time, self._tenant_tags.get(tenant, 0.0)) + 1.0 / max(weight, 0.01)
+            self._tenant_tags[tenant] = tag
+            ticket = _Ticket(tenant)
+            heapq.heappush(self._heap, (tag, next(self._seq), ticket))
+            self._depth += 1
+
+            deadline = None if timeout is None else ticket.enqueued_at + timeout
+            while not ticket.granted:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    ticket.cancelled = True
+                    self._depth -= 1
+                    self._timeouts += 1
+                    raise SchedulerRejected(f"{self.provider} queue wait exceeded {timeout:g}s")
+                self._cond.wait(remaining)
+
+            waited = time.monotonic() - ticket.enqueued_at
+            self._record_wait(waited)
+            return waited
+
+    def release(self) -> None:
+        """Free a slot and grant it to the next ticket in fair order"""
+        with self._cond:
+            self._active -= 1
+            self._grant_next()
+
+    def _grant_next(self) -> None:
+        granted = False
+        while self._active < self.max_concurrency and self._heap:
+            tag, _, ticket = heapq.heappop(self._heap)
+            if ticket.cancelled:
+                continue
+            self._virtual_time = tag
+            ticket.granted = True
+            self._depth -= 1
+            self._active += 1
+            granted = True
+
+        if not self._heap:
+            # Idle queue: start fairness accounting afresh
+            self._tenant_tags.clear()
+            self._virtual_time = 0.0
+
+        if granted:
+            self._cond.notify_all()
+
+    def _record_wait(self, seconds: float) -> None:
+        self._admitted += 1
+        self._wait_samples.append(seconds)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of queue depth and wait-time statistics"""
+        with self._cond:
+            samples = sorted(self._wait_samples)
+            data = {
+                'active': self._active,
+                'maxConcurrency': self.max_concurrency,
+                'queueDepth': self._depth,
+                'admitted': self._admitted,
+                'timeouts': self._timeouts,
+                'rejected': self._rejected,
+            }
+
+        if samples:
+            data['waitMs'] = {
+                'avg': round(sum(samples) / len(samples) * 1000, 1),
+                'p50': round(samples[int(0.50 * (len(samples) - 1))] * 1000, 1),
+                'p95': round(samples[int(0.95 * (len(samples) - 1))] * 1000, 1),
+                'p99': round(samples[int(0.99 * (len(samples) - 1))] * 1000, 1),
+                'max': round(samples[-1] * 1000, 1),
+            }
+        return data
+
+
+_queues: Dict[str, ProviderQueue] = {}
+_queues_lock = threading.Lock()
+
+
+def get_queue(provider: str) -> ProviderQueue:
+    """Get (or create) the admission queue for a provider"""
+    queue = _queues.get(provider)
+    if queue is None:
+        with _queues_lock:
+            queue = _queues.get(provider)
+            if queue is None:
+                limits = getattr(settings, 'LLM_SCHEDULER_CONCURRENCY', {})
+                queue = ProviderQueue(
+                    provider,
+                    max_concurrency=int(limits.get(provider, getattr(settings, 'LLM_SCHEDULER_DEFAULT_CONCURRENCY', 4))),
+                    max_queue=getattr(settings, 'LLM_SCHEDULER_MAX_QUEUE', 32)
+                )
+                _queues[provider] = queue
+    return queue
+
+
+def tenant_weight(tenant: str) -> float:
+    """Fair-share weight of a tenant (settings.LLM_SCHEDULER_WEIGHTS, default 1)"""
+    return float(getattr(settings, 'LLM_SCHEDULER_WEIGHTS', {}).get(tenant, 1.0))
+
+
+@contextmanager
+def provider_slot(provider: str, tenant: Optional[str] = None, timeout: float = None):
+    """
+    Hold a concurrency slot for a provider call
+
+    Usage:
+        with provider_slot('openai', workspace_id):
+            ...call the provider...
+
+    Raises:
+        SchedulerRejected: No slot became available in time
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'LLM_SCHEDULER_QUEUE_TIMEOUT', 15)
+
+    queue = get_queue(provider)
+    waited = queue.acquire(tenant or 'default', tenant_weight(tenant), timeout)
+    if waited > 1:
+        logger.info(f"⏳ {provider} call for {tenant} waited {waited:.1f}s in queue")
+    try:
+        yield waited
+    finally:
+        queue.release()
+
+
+def get_metrics() -> Dict[str, Any]:
+    """Queue metrics for every provider seen by this process"""
+    return {provider: queue.metrics() for provider, queue in list(_queues.items())}
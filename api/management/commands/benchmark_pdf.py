@@ -0,0 +1,97 @@
+"""
+Management command to benchmark PDF text extraction, serial vs the process pool.
+Usage: python manage.py benchmark_pdf --pages 300 --workers 4
+
+A text-only PDF with the requested number of pages is generated in memory and
+extracted both ways with the production code path (pdf_extract). The pool is
+started before timing, so the parallel figure is steady-state; pool startup
+is reported separately.
+"""
+import time
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+
+from api import pdf_extract
+from api.file_parser import TextCollector
+
+WORDS = 'memory context retrieval agent protocol workspace document extraction benchmark'.split()
+
+
+def make_sample_pdf(pages: int, lines_per_page: int = 45) -> bytes:
+    """A minimal PDF with `pages` pages of Helvetica text"""
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        ('<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            ' '.join(f'{4 + 2 * i} 0 R' for i in range(pages)), pages
+        )).encode(),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    for page in range(pages):
+        lines = ''.join(
+            '(%s) Tj T* ' % ' '.join(WORDS[(page + line + i) % len(WORDS)] for i in range(12))
+            for line in range(lines_per_page)
+        )
+        stream = f'BT /F1 10 Tf 14 TL 40 800 Td (Page {page + 1}) Tj T* {lines}ET'.encode()
+        objects.append((
+            '<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] '
+            f'/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * page} 0 R >>'
+        ).encode())
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref_at = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        out += b'%010d 00000 n \n' % offset
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref_at)
+    return bytes(out)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark serial vs process-pool PDF text extraction on a generated PDF'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=300, help='Pages in the generated PDF')
+        parser.add_argument('--workers', type=int, help='Pool processes (default PDF_EXTRACT_WORKERS)')
+        parser.add_argument('--pages-per-task', type=int, help='Pages per pool task (default PDF_PAGES_PER_TASK)')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per mode; the best is reported')
+
+    def handle(self, *args, **options):
+        if options['workers']:
+            settings.PDF_EXTRACT_WORKERS = options['workers']
+        if options['pages_per_task']:
+            settings.PDF_PAGES_PER_TASK = options['pages_per_task']
+
+        pdf = ContentFile(make_sample_pdf(options['pages']), name='benchmark.pdf')
+        self.stdout.write(f"Generated a {options['pages']}-page PDF ({pdf.size / 1024:.0f} KB)")
+
+        started = time.monotonic()
+        pdf_extract.get_pool().submit(int).result()
+        self.stdout.write(f'  Pool startup: {(time.monotonic() - started) * 1000:.0f} ms')
+
+        results = {}
+        for mode, parallel in [('serial', False), ('parallel', True)]:
+            best = None
+            for _ in range(options['repeat']):
+                collector = TextCollector(max_chars=10 ** 9)
+                started = time.monotonic()
+                info = pdf_extract.extract_pdf_text(pdf, collector, parallel=parallel, time_budget=3600)
+                elapsed = time.monotonic() - started
+                best = elapsed if best is None else min(best, elapsed)
+            results[mode] = (best, collector.text(), info)
+            self.stdout.write(
+                f"  {mode.capitalize():9} {best * 1000:8.0f} ms  {info['extracted'] / best:7.1f} pages/s"
+            )
+
+        serial, parallel = results['serial'], results['parallel']
+        self.stdout.write(self.style.SUCCESS(
+            f"Speedup: {serial[0] / parallel[0]:.2f}x with {settings.PDF_EXTRACT_WORKERS} worker(s)"
+        ))
+        if serial[1] != parallel[1]:
+            self.stdout.write(self.style.ERROR('Serial and parallel text differ'))
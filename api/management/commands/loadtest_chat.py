@@ -0,0 +1,182 @@
+"""
+Management command to load test the chat path (send_message_view -> llm_router)
+against the mock LLM server, without spending provider quota.
+Usage: python manage.py loadtest_chat --rps 20 --duration 30 --latency-ms 400
+
+Requests are sent open-loop at the target rate through the full Django stack
+(JWT auth, view, router, scheduler, HTTP to the provider). Latency is measured
+from each request's scheduled send time, so a saturated server shows up as
+growing latency instead of a lower request rate.
+"""
+import json
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api import llm_scheduler, side_effects
+from api.llm_router import register_extra_providers
+from api.mock_llm_server import MockLLMServer
+from api.models import Workspace, Conversation
+from api.management.commands.mock_llm_server import add_mock_arguments, mock_config_from_options
+
+User = get_user_model()
+
+LOADTEST_PROVIDER = 'mock'
+LOADTEST_MODEL = 'mock-model'
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[int(pct / 100.0 * (len(ordered) - 1))]
+
+
+class Command(BaseCommand):
+    help = 'Load test send_message_view against the mock LLM server and report latency percentiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rps', type=float, default=10, help='Target requests per second')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to send requests for')
+        parser.add_argument('--concurrency', type=int, default=64, help='Max requests in flight')
+        parser.add_argument('--workspaces', type=int, default=4, help='Workspaces (fair-share tenants) to spread load over')
+        parser.add_argument('--conversations', type=int, default=4, help='Conversations per workspace')
+        parser.add_argument('--api', choices=['openai', 'anthropic'], default='openai', help='Mock provider API format')
+        parser.add_argument('--base-url', help='Use an already running mock server instead of starting one')
+        parser.add_argument('--keep', action='store_true', help='Keep the load-test user and its data')
+        add_mock_arguments(parser)
+
+    def handle(self, *args, **options):
+        server = None
+        base_url = options['base_url']
+        if not base_url:
+            server = MockLLMServer(('127.0.0.1', 0), mock_config_from_options(options)).start()
+            base_url = server.base_url
+
+        register_extra_providers({
+            LOADTEST_PROVIDER: {'base_url': base_url, 'api': options['api'], 'models': [LOADTEST_MODEL]}
+        })
+
+        user, conversations = self.create_fixtures(options['workspaces'], options['conversations'])
+        token = str(RefreshToken.for_user(user).access_token)
+
+        self.stdout.write(
+            f"Sending {options['rps']:g} req/s for {options['duration']:g}s to {len(conversations)} conversations "
+            f"(mock provider at {base_url})"
+        )
+
+        try:
+            results, elapsed = self.run_load(conversations, token, options)
+        finally:
+            # Let deferred side effects finish before the fixtures go away
+            side_effects.pipeline.flush(timeout=30)
+            if server:
+                server.stop()
+            if not options['keep']:
+                user.delete()
+
+        self.report(results, elapsed)
+
+    def create_fixtures(self, workspace_count, conversations_per_workspace):
+        user = User.objects.create(
+            username=f'loadtest-{uuid.uuid4().hex[:8]}',
+            email=f'loadtest-{uuid.uuid4().hex[:8]}@example.com',
+        )
+        conversations = []
+        for i in range(workspace_count):
+            workspace = Workspace.objects.create(name=f'Load test {i + 1}', owner=user)
+            for j in range(conversations_per_workspace):
+                conversations.append(Conversation.objects.create(
+                    workspace=workspace,
+                    title=f'Load test conversation {j + 1}',
+                    model_id=f'model-{LOADTEST_MODEL}'
+                ))
+        return user, conversations
+
+    def run_load(self, conversations, token, options):
+        results = []
+        results_lock = threading.Lock()
+        local = threading.local()
+
+        def send(index, scheduled_at):
+            if not hasattr(local, 'client'):
+                local.client = Client(HTTP_AUTHORIZATION=f'Bearer {token}', HTTP_HOST='localhost')
+
+            conversation = conversations[index % len(conversations)]
+            started = time.monotonic()
+            with CaptureQueriesContext(connection) as queries:
+                try:
+                    response = local.client.post(
+                        f'/api/conversations/{conversation.id}/messages',
+                        data=json.dumps({'content': f'Load test message {index}'}),
+                        content_type='application/json'
+                    )
+                    status_code = response.status_code
+                except Exception as e:
+                    self.stderr.write(f'Request {index} raised {e.__class__.__name__}: {e}')
+                    status_code = 0
+            finished = time.monotonic()
+
+            with results_lock:
+                results.append({
+                    'status': status_code,
+                    'latency': finished - scheduled_at,
+                    'service_time': finished - started,
+                    'queries': len(queries),
+                })
+
+        total = int(options['rps'] * options['duration'])
+        interval = 1.0 / options['rps']
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['concurrency'], thread_name_prefix='loadtest') as executor:
+            for i in range(total):
+                scheduled_at = start + i * interval
+                delay = scheduled_at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(send, i, scheduled_at)
+        elapsed = time.monotonic() - start
+
+        return results, elapsed
+
+    def report(self, results, elapsed):
+        if not results:
+            self.stdout.write(self.style.WARNING('No requests completed'))
+            return
+
+        statuses = Counter(r['status'] for r in results)
+        ok = [r for r in results if r['status'] == 201]
+        latencies = [r['latency'] * 1000 for r in ok]
+        service_times = [r['service_time'] * 1000 for r in ok]
+        queries = [r['queries'] for r in results]
+
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(f'Completed {len(results)} requests in {elapsed:.1f}s'))
+        self.stdout.write(f'  Throughput:   {len(ok) / elapsed:.1f} successful req/s')
+        self.stdout.write(f'  Status codes: {dict(sorted(statuses.items()))}')
+        if latencies:
+            self.stdout.write(
+                f'  Latency ms:   p50={percentile(latencies, 50):.0f} p95={percentile(latencies, 95):.0f} '
+                f'p99={percentile(latencies, 99):.0f} max={max(latencies):.0f}'
+            )
+            self.stdout.write(
+                f'  Service ms:   p50={percentile(service_times, 50):.0f} p95={percentile(service_times, 95):.0f} '
+                f'p99={percentile(service_times, 99):.0f}'
+            )
+        self.stdout.write(
+            f'  DB queries:   avg={sum(queries) / len(queries):.1f} max={max(queries)} per request'
+        )
+
+        scheduler = llm_scheduler.get_metrics().get(LOADTEST_PROVIDER)
+        if scheduler:
+            self.stdout.write(f'  Scheduler:    {json.dumps(scheduler)}')
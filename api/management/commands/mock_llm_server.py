@@ -0,0 +1,57 @@
+"""
+Management command to run the mock LLM provider server.
+Usage: python manage.py mock_llm_server --port 8089 --latency-ms 400 --error-rate 0.02
+
+Point the app at it with:
+    LLM_EXTRA_PROVIDERS='{"mock": {"base_url": "http://127.0.0.1:8089/v1", "models": ["mock-model"]}}'
+"""
+from django.core.management.base import BaseCommand
+
+from api.mock_llm_server import MockConfig, MockLLMServer, LATENCY_DISTRIBUTIONS
+
+
+def add_mock_arguments(parser):
+    """Mock server behaviour options (shared with loadtest_chat)"""
+    parser.add_argument('--latency-ms', type=float, default=300, help='Median time to first token')
+    parser.add_argument('--jitter-ms', type=float, default=100, help='Spread of the latency distribution')
+    parser.add_argument('--distribution', choices=LATENCY_DISTRIBUTIONS, default='lognormal')
+    parser.add_argument('--tokens-per-sec', type=float, default=0, help='Output token rate (0 = instant)')
+    parser.add_argument('--reply-tokens', type=int, default=50, help='Words per reply')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests that fail')
+    parser.add_argument('--error-status', type=int, action='append', dest='error_statuses',
+                        help='Status to inject (repeatable; 0 = hang until the client times out)')
+
+
+def mock_config_from_options(options) -> MockConfig:
+    return MockConfig(
+        latency_ms=options['latency_ms'],
+        jitter_ms=options['jitter_ms'],
+        distribution=options['distribution'],
+        tokens_per_sec=options['tokens_per_sec'],
+        reply_tokens=options['reply_tokens'],
+        error_rate=options['error_rate'],
+        error_statuses=options['error_statuses'],
+    )
+
+
+class Command(BaseCommand):
+    help = 'Run a local OpenAI/Anthropic-compatible mock LLM server for load tests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8089)
+        add_mock_arguments(parser)
+
+    def handle(self, *args, **options):
+        server = MockLLMServer((options['host'], options['port']), mock_config_from_options(options))
+        self.stdout.write(self.style.SUCCESS(f'Mock LLM server listening on {server.base_url}'))
+        self.stdout.write('  OpenAI:    POST /v1/chat/completions')
+        self.stdout.write('  Anthropic: POST /v1/messages')
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f'Served {server.requests_served} requests ({server.errors_injected} injected errors)')
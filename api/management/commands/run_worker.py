@@ -0,0 +1,43 @@
+"""
+Management command to run background jobs from the database queue.
+Usage: python manage.py run_worker --concurrency 4
+
+Run one or more of these next to the web process. Workers coordinate through the
+Job table, so they can be started on any number of machines.
+"""
+import signal
+
+from django.core.management.base import BaseCommand
+
+from api.job_queue import Worker, JOB_REGISTRY
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (imports, cleanup, periodic jobs)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2, help='Jobs to run at the same time')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between queue polls when idle')
+        parser.add_argument('--once', action='store_true', help='Run the jobs that are due, then exit')
+        parser.add_argument('--worker-id', help='Name recorded on claimed jobs (default host:pid)')
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            concurrency=options['concurrency'],
+            poll_interval=options['poll_interval'],
+            worker_id=options['worker_id'],
+        )
+
+        def shutdown(signum, frame):
+            self.stdout.write('Stopping after running jobs finish...')
+            worker.stop()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        self.stdout.write(
+            f"Worker {worker.worker_id} running {options['concurrency']} at a time "
+            f"({len(JOB_REGISTRY)} job types: {', '.join(sorted(JOB_REGISTRY))})"
+        )
+        processed = worker.run(once=options['once'])
+        self.stdout.write(self.style.SUCCESS(f'Worker stopped after {processed} job(s)'))
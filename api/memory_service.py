@@ -3,7 +3,11 @@ Memory service for text-based search
 Optimized for low memory usage - uses simple keyword matching instead of TF-IDF
 """
 import re
+import time
 from typing import List, Dict
+
+from django.db.models import Q
+
 from .models import Memory
 
 
@@ -13,7 +17,8 @@ class MemoryService:
     No heavy dependencies (scikit-learn, numpy removed)
     """
     
-    def search(self, query: str, top_k: int = 5, workspace_id: str = None) -> List[Dict]:
+    def search(self, query: str, top_k: int = 5, workspace_id: str = None,
+               time_budget: float = None) -> List[Dict]:
         """
         Search for similar memories using keyword matching
         
@@ -21,31 +26,44 @@ class MemoryService:
             query: Search query text
             top_k: Number of top results to return
             workspace_id: Optional filter by workspace
+            time_budget: Optional max seconds to spend; scoring stops when it
+                         runs out and the best matches found so far are returned
             
         Returns:
             List of dicts with memory data and relevance scores
         """
+        deadline = time.monotonic() + time_budget if time_budget else None
         try:
-            # Get memories from database
-            memories_qs = Memory.objects.all()
+            # Tokenize query
+            query_tokens = self._tokenize(query.lower())
+            
+            if not query_tokens:
+                return []
+            
+            # Get memories from database. Documents split into chunks are
+            # searched through their chunks, not the summarized parent.
+            memories_qs = Memory.objects.exclude(metadata__has_key='chunk_count')
             
             if workspace_id:
                 memories_qs = memories_qs.filter(workspace_id=workspace_id)
             
+            # Only memories mentioning a query word can score, so prefilter in
+            # the database before the limit (chunks can be numerous)
+            mentions = Q()
+            for token in query_tokens:
+                mentions |= Q(title__icontains=token) | Q(content__icontains=token)
+            memories_qs = memories_qs.filter(mentions)
+            
             memories = list(memories_qs[:100])  # Limit to 100 for performance
             
             if not memories:
                 return []
             
-            # Tokenize query
-            query_tokens = self._tokenize(query.lower())
-            
-            if not query_tokens:
-                return []
-            
             # Score each memory
             scored_memories = []
             for memory in memories:
+                if deadline and time.monotonic() > deadline:
+                    break
                 score = self._calculate_score(query_tokens, memory)
                 if score > 0:
                     scored_memories.append((memory, score))
@@ -64,6 +82,8 @@ class MemoryService:
                     'score': score,
                     'tags': memory.tags,
                     'workspace_id': memory.workspace_id,
+                    'parent_id': memory.parent_id,
+                    'chunk_index': memory.chunk_index,
                     'created_at': memory.created_at.isoformat()
                 })
             
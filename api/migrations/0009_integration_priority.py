@@ -0,0 +1,18 @@
+# Generated by Django 4.2.26 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_integration_model_id_integration_model_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='integration',
+            name='priority',
+            field=models.IntegerField(default=0, help_text="Failover order across the user's integrations (lower is tried first)"),
+        ),
+    ]
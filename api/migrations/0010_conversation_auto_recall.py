@@ -0,0 +1,18 @@
+# Generated by Django 4.2.26 on 2026-10-19 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_integration_priority'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='auto_recall',
+            field=models.BooleanField(default=False, help_text='Automatically add relevant workspace memories to each turn'),
+        ),
+    ]
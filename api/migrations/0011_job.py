@@ -0,0 +1,45 @@
+# Generated by Django 4.2.26 on 2026-10-19 10:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_conversation_auto_recall'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.CharField(editable=False, max_length=50, primary_key=True, serialize=False)),
+                ('name', models.CharField(help_text='Registered job handler name', max_length=100)),
+                ('payload', models.JSONField(blank=True, default=dict, help_text='Arguments for the handler')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='queued', max_length=20)),
+                ('priority', models.IntegerField(default=0, help_text='Lower runs first')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Not picked up before this time')),
+                ('attempts', models.IntegerField(default=0)),
+                ('max_attempts', models.IntegerField(default=3)),
+                ('repeat_interval', models.IntegerField(blank=True, help_text='Seconds between runs of a periodic job', null=True)),
+                ('dedupe_key', models.CharField(blank=True, help_text='At most one job per key', max_length=255, null=True, unique=True)),
+                ('progress', models.JSONField(blank=True, default=dict)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('locked_by', models.CharField(blank=True, help_text='Worker running the job', max_length=100, null=True)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to=settings.AUTH_USER_MODEL)),
+                ('workspace', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='api.workspace')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'priority', 'run_at'], name='api_job_status_9f135c_idx'), models.Index(fields=['user', '-created_at'], name='api_job_user_id_eabe83_idx')],
+            },
+        ),
+    ]
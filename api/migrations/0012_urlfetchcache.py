@@ -0,0 +1,31 @@
+# Generated by Django 4.2.26 on 2026-10-19 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UrlFetchCache',
+            fields=[
+                ('url_hash', models.CharField(help_text='sha256 of the URL', max_length=64, primary_key=True, serialize=False)),
+                ('url', models.TextField()),
+                ('etag', models.CharField(blank=True, max_length=255, null=True)),
+                ('last_modified', models.CharField(blank=True, max_length=100, null=True)),
+                ('body_hash', models.CharField(db_index=True, help_text='sha256 of the response body', max_length=64)),
+                ('content_hash', models.CharField(help_text='sha256 of the extracted text', max_length=64)),
+                ('title', models.CharField(max_length=255)),
+                ('content', models.TextField(help_text='Extracted text')),
+                ('fetched_at', models.DateTimeField(help_text='Last time the body was downloaded')),
+                ('checked_at', models.DateTimeField(help_text='Last time the URL was requested')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['checked_at'], name='api_urlfetc_checked_e0ac69_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.26 on 2026-10-19 09:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_urlfetchcache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='memory',
+            name='chunk_index',
+            field=models.IntegerField(blank=True, help_text='Position of the chunk in its document', null=True),
+        ),
+        migrations.AddField(
+            model_name='memory',
+            name='parent',
+            field=models.ForeignKey(blank=True, help_text='Document this memory is a chunk of (long imports are split into chunks)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='api.memory'),
+        ),
+        migrations.AddIndex(
+            model_name='memory',
+            index=models.Index(fields=['parent', 'chunk_index'], name='api_memory_parent__2a0d8a_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.26 on 2026-10-19 10:05
+
+from django.db import migrations, models
+from django.utils.dateparse import parse_datetime
+
+
+def backfill_synced_at(apps, schema_editor):
+    """Copy the last sync time of URL imports out of metadata"""
+    Memory = apps.get_model('api', 'Memory')
+    batch = []
+    for memory in Memory.objects.filter(metadata__has_key='source_url').only('id', 'metadata', 'created_at').iterator(chunk_size=500):
+        stamp = memory.metadata.get('synced_at') or memory.metadata.get('imported_at')
+        memory.synced_at = (parse_datetime(stamp) if stamp else None) or memory.created_at
+        batch.append(memory)
+        if len(batch) >= 500:
+            Memory.objects.bulk_update(batch, ['synced_at'])
+            batch = []
+    if batch:
+        Memory.objects.bulk_update(batch, ['synced_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_memory_chunks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='memory',
+            name='synced_at',
+            field=models.DateTimeField(blank=True, help_text='Last time the source URL was imported or re-checked (URL imports only)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='memory',
+            index=models.Index(fields=['synced_at'], name='api_memory_synced__8aadb1_idx'),
+        ),
+        migrations.RunPython(backfill_synced_at, migrations.RunPython.noop),
+    ]
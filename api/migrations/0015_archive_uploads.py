@@ -0,0 +1,38 @@
+# Generated by Django 4.2.26 on 2026-10-19 10:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_memory_synced_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveUpload',
+            fields=[
+                ('id', models.CharField(editable=False, max_length=50, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.BigIntegerField(default=0, help_text='Bytes stored')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archive_uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchiveUploadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.IntegerField(help_text='Position of the chunk in the archive')),
+                ('data', models.BinaryField()),
+                ('upload', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='api.archiveupload')),
+            ],
+            options={
+                'ordering': ['upload', 'index'],
+                'unique_together': {('upload', 'index')},
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.26 on 2026-10-19 11:20
+
+from django.db import migrations
+
+
+def clear_fetch_cache(apps, schema_editor):
+    """Cached pages hold text parsed before line and heading structure was kept; fetch them again"""
+    apps.get_model('api', 'UrlFetchCache').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_archive_uploads'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_fetch_cache, migrations.RunPython.noop),
+    ]
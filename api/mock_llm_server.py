@@ -0,0 +1,246 @@
+"""
+Mock LLM Server - Local OpenAI- and Anthropic-compatible endpoints for load tests
+Serves POST /v1/chat/completions (OpenAI format) and POST /v1/messages (Anthropic
+format) with configurable latency, token rate, streaming and error injection, so
+the full chat path can be exercised without spending provider quota.
+
+Register it as a provider with settings.LLM_EXTRA_PROVIDERS, e.g.
+    {"mock": {"base_url": "http://127.0.0.1:8089/v1", "models": ["mock-model"]}}
+or run `python manage.py loadtest_chat`, which starts and registers it for you.
+"""
+import json
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+LATENCY_DISTRIBUTIONS = ['fixed', 'uniform', 'normal', 'lognormal']
+
+
+class MockConfig:
+    """
+    Behaviour of the mock server
+
+    Args:
+        latency_ms: Median time before the first token
+        jitter_ms: Spread of the latency distribution
+        distribution: One of LATENCY_DISTRIBUTIONS
+        tokens_per_sec: Output generation rate (0 = instant)
+        reply_tokens: Words in each reply
+        error_rate: Fraction of requests that fail
+        error_statuses: Statuses to inject (429, 5xx, or 0 for a hung request)
+        retry_after: Retry-After sent with injected 429s
+        hang_seconds: How long a hung request holds the connection
+    """
+
+    def __init__(self, latency_ms: float = 300, jitter_ms: float = 100, distribution: str = 'lognormal',
+                 tokens_per_sec: float = 0, reply_tokens: int = 50, error_rate: float = 0.0,
+                 error_statuses: List[int] = None, retry_after: int = 1, hang_seconds: float = 120):
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.distribution = distribution
+        self.tokens_per_sec = tokens_per_sec
+        self.reply_tokens = reply_tokens
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses or [500]
+        self.retry_after = retry_after
+        self.hang_seconds = hang_seconds
+
+    def sample_latency(self) -> float:
+        """Time to first token in seconds"""
+        base = self.latency_ms / 1000.0
+        spread = self.jitter_ms / 1000.0
+        if self.distribution == 'fixed' or spread <= 0:
+            value = base
+        elif self.distribution == 'uniform':
+            value = random.uniform(base - spread, base + spread)
+        elif self.distribution == 'normal':
+            value = random.gauss(base, spread)
+        else:
+            # Long right tail like real providers: median = latency_ms and
+            # standard deviation = jitter_ms
+            ratio = spread / base if base > 0 else 1.0
+            sigma = math.sqrt(math.log((1 + math.sqrt(1 + 4 * ratio * ratio)) / 2))
+            value = random.lognormvariate(0, sigma) * base
+        return max(0.0, value)
+
+
+def _reply_words(count: int) -> List[str]:
+    return [f"token{i}" for i in range(count)]
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    @property
+    def config(self) -> MockConfig:
+        return self.server.config
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self._send_json(400, {'error': {'message': 'Invalid JSON'}})
+
+        if self.path.rstrip('/').endswith('/chat/completions'):
+            api = 'openai'
+        elif self.path.rstrip('/').endswith('/messages'):
+            api = 'anthropic'
+        else:
+            return self._send_json(404, {'error': {'message': f'Unknown path {self.path}'}})
+
+        self.server.record_request()
+
+        if self.config.error_rate and random.random() < self.config.error_rate:
+            return self._send_error(random.choice(self.config.error_statuses))
+
+        time.sleep(self.config.sample_latency())
+
+        model = body.get('model', 'mock-model')
+        words = _reply_words(self.config.reply_tokens)
+        if body.get('stream'):
+            return self._stream(api, model, words)
+
+        self._generate_delay(len(words))
+        text = ' '.join(words)
+        prompt_tokens = sum(len(str(m.get('content', '')).split()) for m in body.get('messages', []))
+        if api == 'openai':
+            self._send_json(200, {
+                'id': f'chatcmpl-{uuid.uuid4().hex[:12]}',
+                'object': 'chat.completion',
+                'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}],
+                'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': len(words),
+                          'total_tokens': prompt_tokens + len(words)},
+            })
+        else:
+            self._send_json(200, {
+                'id': f'msg_{uuid.uuid4().hex[:12]}',
+                'type': 'message',
+                'role': 'assistant',
+                'model': model,
+                'content': [{'type': 'text', 'text': text}],
+                'stop_reason': 'end_turn',
+                'usage': {'input_tokens': prompt_tokens, 'output_tokens': len(words)},
+            })
+
+    def _generate_delay(self, tokens: int) -> None:
+        if self.config.tokens_per_sec > 0:
+            time.sleep(tokens / self.config.tokens_per_sec)
+
+    def _stream(self, api: str, model: str, words: List[str]) -> None:
+        """Server-sent events, one word per chunk, paced by tokens_per_sec"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        interval = 1.0 / self.config.tokens_per_sec if self.config.tokens_per_sec > 0 else 0
+        try:
+            if api == 'anthropic':
+                self._event('message_start', {'type': 'message_start', 'message': {'model': model, 'role': 'assistant'}})
+            for i, word in enumerate(words):
+                chunk = word if i == 0 else ' ' + word
+                if api == 'openai':
+                    self._event(None, {'model': model, 'choices': [{'index': 0, 'delta': {'content': chunk}}]})
+                else:
+                    self._event('content_block_delta', {'type': 'content_block_delta', 'index': 0,
+                                                        'delta': {'type': 'text_delta', 'text': chunk}})
+                if interval:
+                    time.sleep(interval)
+            if api == 'openai':
+                self.wfile.write(b'data: [DONE]\n\n')
+            else:
+                self._event('message_stop', {'type': 'message_stop'})
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _event(self, name, data) -> None:
+        payload = f"data: {json.dumps(data)}\n\n"
+        if name:
+            payload = f"event: {name}\n" + payload
+        self.wfile.write(payload.encode('utf-8'))
+        self.wfile.flush()
+
+    def _send_error(self, status_code: int) -> None:
+        self.server.record_error()
+        if not status_code:
+            # Simulate a hung provider (client sees a timeout)
+            time.sleep(self.config.hang_seconds)
+            self.close_connection = True
+            return
+
+        headers = {}
+        if status_code == 429:
+            headers['Retry-After'] = str(self.config.retry_after)
+        self._send_json(status_code, {'error': {'message': f'Injected error {status_code}', 'type': 'mock_error'}}, headers)
+
+    def _send_json(self, status_code: int, data, headers=None) -> None:
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """
+    Threaded mock provider server
+
+    Usage:
+        server = MockLLMServer(('127.0.0.1', 0), MockConfig(latency_ms=200))
+        server.start()
+        ...server.base_url...
+        server.stop()
+    """
+    daemon_threads = True
+
+    def __init__(self, address, config: MockConfig = None):
+        super().__init__(address, MockLLMHandler)
+        self.config = config or MockConfig()
+        self.requests_served = 0
+        self.errors_injected = 0
+        self._counter_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def record_request(self) -> None:
+        with self._counter_lock:
+            self.requests_served += 1
+
+    def record_error(self) -> None:
+        with self._counter_lock:
+            self.errors_injected += 1
+
+    def start(self) -> 'MockLLMServer':
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, name='mock-llm-server', daemon=True)
+        self._thread.start()
+        logger.info(f"🧪 Mock LLM server listening on {self.base_url}")
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
@@ -2,6 +2,7 @@
 Database models for Chimera Protocol API
 """
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 import uuid
 
@@ -157,6 +158,7 @@ class Integration(models.Model):
     model_id = models.CharField(max_length=100, null=True, blank=True)  # e.g., "llama-3.3-70b-versatile"
     model_name = models.CharField(max_length=100, null=True, blank=True)  # e.g., "Llama 3.3 70B"
     api_key = models.TextField()  # Encrypted API key (can be longer than 255 chars)
+    priority = models.IntegerField(default=0, help_text="Failover order across the user's integrations (lower is tried first)")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='disconnected')
     last_tested = models.DateTimeField(null=True, blank=True)
     error_message = models.TextField(null=True, blank=True)
@@ -194,6 +196,7 @@ class Conversation(models.Model):
     title = models.CharField(max_length=255, default='New Conversation')
     model_id = models.CharField(max_length=50, help_text="ID of the cognitive model used")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
+    auto_recall = models.BooleanField(default=False, help_text="Automatically add relevant workspace memories to each turn")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -235,6 +238,20 @@ class Memory(models.Model):
         help_text="Additional metadata (source, conversationId, modelUsed)"
     )
     version = models.IntegerField(default=1, help_text="Version number for tracking updates")
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='chunks',
+        help_text="Document this memory is a chunk of (long imports are split into chunks)"
+    )
+    chunk_index = models.IntegerField(null=True, blank=True, help_text="Position of the chunk in its document")
+    synced_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Last time the source URL was imported or re-checked (URL imports only)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -243,18 +260,24 @@ class Memory(models.Model):
         indexes = [
             models.Index(fields=['workspace', '-created_at']),
             models.Index(fields=['-created_at']),
+            models.Index(fields=['parent', 'chunk_index']),
+            models.Index(fields=['synced_at']),
         ]
 
     def __str__(self):
         return f"Memory: {self.title} ({self.workspace.name})"
 
     def save(self, *args, **kwargs):
+        self.fill_generated_fields()
+        super().save(*args, **kwargs)
+
+    def fill_generated_fields(self):
+        """Set the id and snippet (called by save(); call it yourself before bulk_create)"""
         if not self.id:
             self.id = f"memory-{uuid.uuid4().hex[:12]}"
         # Auto-generate snippet from content
         if not self.snippet and self.content:
             self.snippet = self.content[:150] + ('...' if len(self.content) > 150 else '')
-        super().save(*args, **kwargs)
 
 
 class ChatMessage(models.Model):
@@ -370,3 +393,117 @@ class Activity(models.Model):
         if not self.id:
             self.id = f"activity-{uuid.uuid4().hex[:12]}"
         super().save(*args, **kwargs)
+
+
+class UrlFetchCache(models.Model):
+    """
+    Last fetch of a URL: HTTP validators for conditional requests and the parsed
+    result, reused when the page (or an identical page elsewhere) is unchanged
+    """
+    url_hash = models.CharField(max_length=64, primary_key=True, help_text="sha256 of the URL")
+    url = models.TextField()
+    etag = models.CharField(max_length=255, null=True, blank=True)
+    last_modified = models.CharField(max_length=100, null=True, blank=True)
+    body_hash = models.CharField(max_length=64, db_index=True, help_text="sha256 of the response body")
+    content_hash = models.CharField(max_length=64, help_text="sha256 of the extracted text")
+    title = models.CharField(max_length=255)
+    content = models.TextField(help_text="Extracted text")
+    fetched_at = models.DateTimeField(help_text="Last time the body was downloaded")
+    checked_at = models.DateTimeField(help_text="Last time the URL was requested")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['checked_at']),
+        ]
+
+    def __str__(self):
+        return f"Fetch cache: {self.url[:80]}"
+
+
+class Job(models.Model):
+    """
+    Background job stored in the database and run by `manage.py run_worker`
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    ]
+    
+    id = models.CharField(max_length=50, primary_key=True, editable=False)
+    name = models.CharField(max_length=100, help_text="Registered job handler name")
+    payload = models.JSONField(default=dict, blank=True, help_text="Arguments for the handler")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    priority = models.IntegerField(default=0, help_text="Lower runs first")
+    run_at = models.DateTimeField(default=timezone.now, help_text="Not picked up before this time")
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    repeat_interval = models.IntegerField(null=True, blank=True, help_text="Seconds between runs of a periodic job")
+    dedupe_key = models.CharField(max_length=255, null=True, blank=True, unique=True, help_text="At most one job per key")
+    progress = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, null=True, blank=True, help_text="Worker running the job")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='jobs')
+    workspace = models.ForeignKey(Workspace, on_delete=models.CASCADE, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'priority', 'run_at']),
+            models.Index(fields=['user', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"Job {self.name} ({self.status})"
+
+    def save(self, *args, **kwargs):
+        if not self.id:
+            self.id = f"job-{uuid.uuid4().hex[:12]}"
+        super().save(*args, **kwargs)
+
+    def report_progress(self, **progress):
+        """
+        Store progress for status polling (e.g. done=3, total=10) without touching
+        other fields. Also tells the queue the worker is still alive.
+        """
+        self.progress = {**self.progress, **progress}
+        Job.objects.filter(id=self.id, status='running').update(progress=self.progress, locked_at=timezone.now())
+
+
+class ArchiveUpload(models.Model):
+    """
+    Zip or tar archive waiting to be imported by the imports.archive job.
+    Stored in the database (in ArchiveUploadChunk rows) so the worker service
+    can read what the web service received.
+    """
+    id = models.CharField(max_length=50, primary_key=True, editable=False)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField(default=0, help_text="Bytes stored")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='archive_uploads')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archive upload {self.filename}"
+
+    def save(self, *args, **kwargs):
+        if not self.id:
+            self.id = f"archive-{uuid.uuid4().hex[:12]}"
+        super().save(*args, **kwargs)
+
+
+class ArchiveUploadChunk(models.Model):
+    """One piece of an ArchiveUpload's bytes"""
+    upload = models.ForeignKey(ArchiveUpload, on_delete=models.CASCADE, related_name='chunks')
+    index = models.IntegerField(help_text="Position of the chunk in the archive")
+    data = models.BinaryField()
+
+    class Meta:
+        ordering = ['upload', 'index']
+        unique_together = ['upload', 'index']
@@ -0,0 +1,182 @@
+"""
+Parse Cache - Extracted text of uploaded files, keyed by the file's content
+The same PDFs and DOCX files are uploaded again and again, often to several
+workspaces. Their text is stored on disk under the sha256 of the file bytes, so
+a re-upload skips PyPDF2 / python-docx entirely.
+
+- Only the expensive binary formats (CACHED_EXTENSIONS) are cached; text
+  formats parse about as fast as a cache entry is read.
+- Entries are gzipped JSON files in PARSE_CACHE_DIR, shared by every process
+  on the host. A hit refreshes the entry's mtime; once the directory grows
+  past PARSE_CACHE_MAX_BYTES the least recently used entries are deleted.
+- Partial results (PDF time budget) are not cached, so a re-upload tries again.
+- The key includes CACHE_VERSION and FILE_IMPORT_MAX_CHARS; bump the version
+  when a parser's output changes.
+
+The cache is best effort: a disk error here never fails an import.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+CACHED_EXTENSIONS = ('.pdf', '.docx')
+ENTRY_SUFFIX = '.json.gz'
+EVICT_TO = 0.9  # fraction of PARSE_CACHE_MAX_BYTES left after an eviction
+
+
+def file_digest(file) -> str:
+    """sha256 of a django File's bytes, read in chunks"""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """Content-addressed disk cache of parse results, with size-based LRU eviction"""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None  # bytes on disk, counted on first store
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'errors': 0}
+
+    def enabled(self) -> bool:
+        return getattr(settings, 'PARSE_CACHE_ENABLED', True)
+
+    def key(self, digest: str, ext: str) -> str:
+        max_chars = getattr(settings, 'FILE_IMPORT_MAX_CHARS', 500000)
+        return f"{digest}-{ext.lstrip('.')}-{max_chars}-v{CACHE_VERSION}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ENTRY_SUFFIX)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The cached parse result for key, or None"""
+        path = self._path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as handle:
+                entry = json.load(handle)
+            os.utime(path)
+        except FileNotFoundError:
+            self._count('misses')
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Parse cache read failed for {key}: {str(e)}")
+            self._count('errors')
+            self._count('misses')
+            return None
+
+        self._count('hits')
+        return entry
+
+    def set(self, key: str, result: Dict[str, Any]) -> bool:
+        """
+        Store a successful parse result
+
+        Returns:
+            True if stored
+        """
+        if not result.get('success') or result.get('partial'):
+            return False
+
+        entry = {
+            'content': result['content'],
+            'file_type': result['file_type'],
+            'truncated': result['truncated'],
+            'stored_at': time.time(),
+        }
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write under a temporary name so readers never see half an entry
+            handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with gzip.open(os.fdopen(handle, 'wb'), 'wt', encoding='utf-8') as out:
+                json.dump(entry, out, ensure_ascii=False)
+            size = os.path.getsize(temporary)
+            os.replace(temporary, path)
+        except OSError as e:
+            logger.warning(f"⚠️ Parse cache write failed for {key}: {str(e)}")
+            self._count('errors')
+            return False
+
+        self._count('stores')
+        with self._lock:
+            if self._size is None:
+                self._size = self._disk_usage()
+            else:
+                self._size += size
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+        return True
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(ENTRY_SUFFIX):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue  # evicted by another process
+                    yield stat.st_mtime, stat.st_size, path
+
+    def _disk_usage(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the cache is below EVICT_TO of its limit"""
+        with self._lock:
+            entries = sorted(self._entries())
+            size = sum(entry_size for _, entry_size, _ in entries)
+            target = self.max_bytes * EVICT_TO
+            evicted = 0
+            for _, entry_size, path in entries:
+                if size <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                size -= entry_size
+                evicted += 1
+            self._size = size
+            self.stats['evictions'] += evicted
+
+        if evicted:
+            logger.info(f"🧹 Evicted {evicted} parse cache entries ({size / (1024 * 1024):.1f}MB left)")
+        return evicted
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'hitRate': round(self.stats['hits'] / lookups, 3) if lookups else None,
+                'bytes': self._size,
+                'maxBytes': self.max_bytes,
+            }
+
+
+parse_cache = ParseCache(
+    directory=getattr(settings, 'PARSE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'chimera-parse-cache')),
+    max_bytes=getattr(settings, 'PARSE_CACHE_MAX_BYTES', 256 * 1024 * 1024),
+)
@@ -0,0 +1,165 @@
+"""
+PDF Extraction - Page text extraction on a process pool
+PyPDF2's extract_text() is pure Python and CPU bound. Run in a request thread,
+a long PDF holds the GIL for seconds and stalls every other request in the
+process. Long PDFs are therefore split into page ranges, extracted in worker
+processes and joined in page order.
+
+- The pool (PDF_EXTRACT_WORKERS processes) is started on first use with the
+  spawn method, because forking a server process that runs threads is unsafe.
+  Workers only import this module and PyPDF2.
+- PDFs with fewer than PDF_PARALLEL_MIN_PAGES pages are extracted in the
+  calling thread, since starting tasks would cost more than it saves.
+- Each document gets PDF_TIME_BUDGET seconds. The pages extracted by then (in
+  order) are kept and the result is flagged partial. Ranges already running
+  cannot be interrupted; they finish in the background, at most
+  PDF_PAGES_PER_TASK pages each.
+"""
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def extract_page_range(path: str, start: int, end: int) -> List[str]:
+    """Text of pages [start, end) of the PDF at path (runs in a worker process)"""
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(path)
+    return [reader.pages[i].extract_text() or '' for i in range(start, end)]
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = getattr(settings, 'PDF_EXTRACT_WORKERS', min(2, os.cpu_count() or 1))
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            logger.info(f"📄 Started PDF extraction pool with {workers} worker(s)")
+        return _pool
+
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _spooled_path(file):
+    """Path of the file on disk, writing it to a temporary file if needed. Returns (path, is_temporary)."""
+    if hasattr(file, 'temporary_file_path'):
+        return file.temporary_file_path(), False
+
+    handle = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+    with handle:
+        for chunk in file.chunks():
+            handle.write(chunk)
+    return handle.name, True
+
+
+def extract_pdf_text(file, collector, parallel: bool = None, time_budget: float = None) -> Dict[str, Any]:
+    """
+    Extract the text of a PDF page by page into a collector (see file_parser.TextCollector)
+
+    Args:
+        file: django File holding the PDF
+        collector: Receives page texts in order; extraction stops once it is full
+        parallel: Force (True) or disable (False) the process pool; by default
+            used from PDF_PARALLEL_MIN_PAGES pages
+        time_budget: Seconds for the whole document (default PDF_TIME_BUDGET)
+
+    Returns:
+        dict with pages, extracted (pages), partial and parallel
+    """
+    import PyPDF2
+
+    if time_budget is None:
+        time_budget = getattr(settings, 'PDF_TIME_BUDGET', 30)
+    deadline = time.monotonic() + time_budget
+
+    file.seek(0)
+    reader = PyPDF2.PdfReader(file)
+    page_count = len(reader.pages)
+    if parallel is None:
+        parallel = page_count >= getattr(settings, 'PDF_PARALLEL_MIN_PAGES', 16)
+
+    if parallel:
+        extracted, partial = _extract_parallel(file, page_count, collector, deadline)
+    else:
+        extracted, partial = 0, False
+        for page in reader.pages:
+            if time.monotonic() > deadline:
+                partial = True
+                break
+            _add_page(collector, page.extract_text())
+            extracted += 1
+            if collector.full:
+                break
+
+    if partial:
+        logger.warning(f"⚠️ PDF extraction stopped after {extracted}/{page_count} pages ({time_budget}s budget)")
+    return {'pages': page_count, 'extracted': extracted, 'partial': partial, 'parallel': parallel}
+
+
+def _add_page(collector, page_text: str) -> None:
+    if page_text:
+        collector.add(page_text)
+        collector.add('\n\n')
+
+
+def _extract_parallel(file, page_count: int, collector, deadline: float):
+    size = getattr(settings, 'PDF_PAGES_PER_TASK', 16)
+    ranges = [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+    path, is_temporary = _spooled_path(file)
+
+    extracted = 0
+    partial = False
+    futures = []
+    try:
+        pool = get_pool()
+        futures = [pool.submit(extract_page_range, path, start, end) for start, end in ranges]
+
+        # Consume in page order; later ranges keep running in the meantime
+        for (start, end), future in zip(ranges, futures):
+            try:
+                texts = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeout:
+                partial = True
+                break
+            except BrokenProcessPool:
+                logger.error("❌ PDF extraction pool died; restarting it on next use")
+                _reset_pool()
+                partial = True
+                break
+            except Exception as e:
+                logger.warning(f"⚠️ Could not extract PDF pages {start + 1}-{end}: {str(e)}")
+                partial = True
+                continue
+
+            for page_text in texts:
+                _add_page(collector, page_text)
+            extracted += end - start
+            if collector.full:
+                break
+    finally:
+        for future in futures:
+            future.cancel()
+        if is_temporary:
+            # Workers still reading it keep their open handle
+            os.unlink(path)
+
+    return extracted, partial
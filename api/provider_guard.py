@@ -0,0 +1,223 @@
+"""
+Provider Guard - Per-(provider, API key) rate limiter and circuit breaker
+State lives in the Django cache so every gunicorn worker sees the same limits
+(use REDIS_URL in production; the in-memory fallback is per process).
+
+- Token bucket: refills at the provider's configured rate. A 429 halves the rate
+  and blocks the key until Retry-After; successes slowly restore the rate.
+- Circuit breaker: opens after consecutive server errors or timeouts, then lets
+  a single probe request through once the cooldown has passed.
+
+Cache updates are read-modify-write without locking, so limits are approximate
+under heavy contention. That is fine for protecting provider quotas.
+"""
+import hashlib
+import logging
+import time
+from typing import Dict, Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'llm-guard'
+STATE_TIMEOUT = 24 * 3600
+
+# Requests per minute when a provider has no entry in settings.LLM_RATE_LIMITS
+DEFAULT_RATE_PER_MINUTE = 60
+
+# Lowest rate the limiter backs off to after repeated 429s
+MIN_RATE_PER_MINUTE = 2
+
+# Block time after a 429 without a Retry-After header
+DEFAULT_RETRY_AFTER = 20
+
+
+def _key_id(provider: str, api_key: str) -> str:
+    """Identify a (provider, api key) pair without storing the key"""
+    digest = hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:16]
+    return f"{KEY_PREFIX}:{provider}:{digest}"
+
+
+def _configured_rate(provider: str) -> float:
+    """Configured requests per minute for a provider"""
+    limits = getattr(settings, 'LLM_RATE_LIMITS', {})
+    return float(limits.get(provider, DEFAULT_RATE_PER_MINUTE))
+
+
+def _get_bucket(key_id: str, provider: str, now: float) -> Dict[str, Any]:
+    bucket = cache.get(f"{key_id}:bucket")
+    configured = _configured_rate(provider)
+    if bucket is None:
+        return {'tokens': configured, 'rate': configured, 'updated': now, 'blocked_until': 0}
+
+    # Refill since last update (capacity is one minute worth of requests)
+    elapsed = max(0.0, now - bucket['updated'])
+    bucket['tokens'] = min(bucket['rate'], bucket['tokens'] + elapsed * bucket['rate'] / 60.0)
+    bucket['updated'] = now
+    return bucket
+
+
+def _get_breaker(key_id: str) -> Dict[str, Any]:
+    return cache.get(f"{key_id}:breaker") or {'failures': 0, 'opened_until': 0, 'cooldown': 0}
+
+
+def acquire(provider: str, api_key: str) -> Optional[Dict[str, Any]]:
+    """
+    Ask permission to call a provider
+
+    Args:
+        provider: Provider name
+        api_key: Decrypted API key used for the call
+
+    Returns:
+        None if the call may proceed, otherwise a rejection dict with
+        'error', 'retry_after' and either 'rate_limited' or 'circuit_open'
+    """
+    key_id = _key_id(provider, api_key)
+    now = time.time()
+
+    breaker = _get_breaker(key_id)
+    if now < breaker['opened_until']:
+        retry_after = int(breaker['opened_until'] - now) + 1
+        return {
+            'error': f"{provider} is temporarily unavailable after repeated failures. Retry in {retry_after}s.",
+            'retry_after': retry_after,
+            'circuit_open': True,
+        }
+
+    bucket = _get_bucket(key_id, provider, now)
+    if now < bucket['blocked_until']:
+        retry_after = int(bucket['blocked_until'] - now) + 1
+        return {
+            'error': f"Rate limit exceeded for {provider}. Retry in {retry_after}s.",
+            'retry_after': retry_after,
+            'rate_limited': True,
+        }
+
+    if bucket['tokens'] < 1:
+        retry_after = int((1 - bucket['tokens']) * 60.0 / bucket['rate']) + 1
+        cache.set(f"{key_id}:bucket", bucket, timeout=STATE_TIMEOUT)
+        return {
+            'error': f"Rate limit exceeded for {provider}. Retry in {retry_after}s.",
+            'retry_after': retry_after,
+            'rate_limited': True,
+        }
+
+    # Half-open: only one caller gets to probe the provider. Claimed last, so a
+    # call the limiter rejects never holds the probe.
+    if breaker['opened_until'] and not cache.add(
+        f"{key_id}:probe", 1, timeout=getattr(settings, 'LLM_CIRCUIT_PROBE_TIMEOUT', 60)
+    ):
+        return {
+            'error': f"{provider} is recovering from repeated failures. Retry shortly.",
+            'retry_after': 5,
+            'circuit_open': True,
+        }
+
+    bucket['tokens'] -= 1
+    cache.set(f"{key_id}:bucket", bucket, timeout=STATE_TIMEOUT)
+    return None
+
+
+def release(provider: str, api_key: str) -> None:
+    """
+    Undo an acquire whose call never reached the provider (e.g. the scheduler
+    refused it): returns the token and, while half-open, frees the probe
+    so the next caller can test the provider
+
+    Args:
+        provider: Provider name
+        api_key: Decrypted API key used for the call
+    """
+    key_id = _key_id(provider, api_key)
+    now = time.time()
+
+    if _get_breaker(key_id)['opened_until']:
+        cache.delete(f"{key_id}:probe")
+
+    bucket = _get_bucket(key_id, provider, now)
+    bucket['tokens'] = min(bucket['rate'], bucket['tokens'] + 1)
+    cache.set(f"{key_id}:bucket", bucket, timeout=STATE_TIMEOUT)
+
+
+def record_result(provider: str, api_key: str, result: Dict[str, Any]) -> None:
+    """
+    Update limiter and breaker state from a provider response
+
+    Args:
+        provider: Provider name
+        api_key: Decrypted API key used for the call
+        result: Response dict from the provider adapter
+    """
+    key_id = _key_id(provider, api_key)
+    now = time.time()
+
+    if _get_breaker(key_id)['opened_until']:
+        # The half-open probe is over whatever the outcome (a 429 or client
+        # error neither closes nor re-opens the breaker)
+        cache.delete(f"{key_id}:probe")
+
+    if result.get('status') == 'success':
+        _record_success(key_id, provider, now)
+    elif result.get('rate_limited'):
+        _record_rate_limited(key_id, provider, now, result.get('retry_after'))
+    elif result.get('status_code') is None or result['status_code'] >= 500:
+        # Timeouts, connection errors and server errors count towards the breaker.
+        # Client errors (bad key, bad request) say nothing about provider health.
+        _record_failure(key_id, provider, now)
+
+
+def _record_success(key_id: str, provider: str, now: float) -> None:
+    breaker = _get_breaker(key_id)
+    if breaker['failures'] or breaker['opened_until']:
+        cache.delete_many([f"{key_id}:breaker", f"{key_id}:probe"])
+        if breaker['opened_until']:
+            logger.info(f"✅ Circuit closed for {provider}")
+
+    # Additive increase back towards the configured rate
+    configured = _configured_rate(provider)
+    bucket = cache.get(f"{key_id}:bucket")
+    if bucket and bucket['rate'] < configured:
+        bucket = _get_bucket(key_id, provider, now)
+        bucket['rate'] = min(configured, bucket['rate'] + configured * 0.05)
+        cache.set(f"{key_id}:bucket", bucket, timeout=STATE_TIMEOUT)
+
+
+def _record_rate_limited(key_id: str, provider: str, now: float, retry_after: Optional[float]) -> None:
+    bucket = _get_bucket(key_id, provider, now)
+
+    # Multiplicative decrease, and honour Retry-After
+    bucket['rate'] = max(MIN_RATE_PER_MINUTE, bucket['rate'] / 2)
+    bucket['tokens'] = 0
+    bucket['blocked_until'] = now + (retry_after or DEFAULT_RETRY_AFTER)
+    cache.set(f"{key_id}:bucket", bucket, timeout=STATE_TIMEOUT)
+
+    logger.warning(f"⚠️ {provider} rate limited, backing off to {bucket['rate']:.0f} req/min")
+
+
+def _record_failure(key_id: str, provider: str, now: float) -> None:
+    breaker = _get_breaker(key_id)
+    breaker['failures'] += 1
+
+    threshold = getattr(settings, 'LLM_CIRCUIT_FAILURE_THRESHOLD', 5)
+    if breaker['opened_until'] or breaker['failures'] >= threshold:
+        # Open (or re-open after a failed probe) with exponential cooldown
+        base = getattr(settings, 'LLM_CIRCUIT_COOLDOWN', 30)
+        breaker['cooldown'] = min(base * 8, breaker['cooldown'] * 2) if breaker['cooldown'] else base
+        breaker['opened_until'] = now + breaker['cooldown']
+        cache.delete(f"{key_id}:probe")
+        logger.warning(f"⚠️ Circuit open for {provider} for {breaker['cooldown']}s after {breaker['failures']} failures")
+
+    cache.set(f"{key_id}:breaker", breaker, timeout=STATE_TIMEOUT)
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """Parse a Retry-After header (seconds form) or a Google retryDelay ('37s')"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(str(value).strip().rstrip('s')))
+    except ValueError:
+        return None
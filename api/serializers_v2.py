@@ -4,7 +4,7 @@ Updated serializers for frontend integration with camelCase conversion
 from rest_framework import serializers
 from .models import (
     User, Workspace, TeamMember, Integration, Conversation, 
-    ChatMessage, Memory, ConversationMemory
+    ChatMessage, Memory, ConversationMemory, Job
 )
 import re
 
@@ -124,7 +124,7 @@ class WorkspaceSerializer(serializers.ModelSerializer):
     
     def get_stats(self, obj):
         # Calculate workspace statistics
-        total_memories = obj.memories.count()
+        total_memories = obj.memories.filter(parent__isnull=True).count()
         total_conversations = obj.conversations.count()
         
         # System load calculation (0-100)
@@ -164,10 +164,11 @@ class IntegrationSerializer(serializers.ModelSerializer):
     apiKey = serializers.SerializerMethodField()
     modelId = serializers.CharField(source='model_id', allow_null=True, required=False)
     modelName = serializers.CharField(source='model_name', allow_null=True, required=False)
+    priority = serializers.IntegerField(required=False)
     
     class Meta:
         model = Integration
-        fields = ['id', 'provider', 'modelId', 'modelName', 'apiKey', 'status', 'lastTested', 'errorMessage']
+        fields = ['id', 'provider', 'modelId', 'modelName', 'apiKey', 'priority', 'status', 'lastTested', 'errorMessage']
         read_only_fields = ['id', 'status', 'lastTested', 'errorMessage']
     
     def get_apiKey(self, obj):
@@ -186,6 +187,7 @@ class IntegrationCreateSerializer(serializers.Serializer):
     apiKey = serializers.CharField(min_length=10, max_length=500)
     modelId = serializers.CharField(required=False, allow_null=True, allow_blank=True)
     modelName = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    priority = serializers.IntegerField(required=False, default=0)
 
 
 # Message Serializers
@@ -220,12 +222,13 @@ class ConversationSerializer(serializers.ModelSerializer):
     modelId = serializers.CharField(source='model_id')
     messages = MessageSerializer(many=True, read_only=True)
     injectedMemories = serializers.SerializerMethodField()
+    autoRecall = serializers.BooleanField(source='auto_recall', required=False)
     createdAt = serializers.DateTimeField(source='created_at', read_only=True)
     updatedAt = serializers.DateTimeField(source='updated_at', read_only=True)
     
     class Meta:
         model = Conversation
-        fields = ['id', 'workspaceId', 'title', 'modelId', 'messages', 'injectedMemories', 'status', 'createdAt', 'updatedAt']
+        fields = ['id', 'workspaceId', 'title', 'modelId', 'messages', 'injectedMemories', 'autoRecall', 'status', 'createdAt', 'updatedAt']
         read_only_fields = ['id', 'workspaceId', 'createdAt', 'updatedAt']
     
     def get_injectedMemories(self, obj):
@@ -243,6 +246,7 @@ class ConversationCreateSerializer(serializers.Serializer):
     """Serializer for creating a conversation"""
     title = serializers.CharField(max_length=255, required=False, default='New Conversation')
     modelId = serializers.CharField()
+    autoRecall = serializers.BooleanField(required=False, default=False)
 
 
 class ConversationListSerializer(serializers.ModelSerializer):
@@ -250,12 +254,13 @@ class ConversationListSerializer(serializers.ModelSerializer):
     workspaceId = serializers.CharField(source='workspace.id', read_only=True)
     modelId = serializers.CharField(source='model_id')
     messageCount = serializers.SerializerMethodField()
+    autoRecall = serializers.BooleanField(source='auto_recall', read_only=True)
     lastUpdated = serializers.DateTimeField(source='updated_at', read_only=True)
     createdAt = serializers.DateTimeField(source='created_at', read_only=True)
     
     class Meta:
         model = Conversation
-        fields = ['id', 'workspaceId', 'title', 'modelId', 'status', 'messageCount', 'lastUpdated', 'createdAt']
+        fields = ['id', 'workspaceId', 'title', 'modelId', 'status', 'autoRecall', 'messageCount', 'lastUpdated', 'createdAt']
         read_only_fields = ['id', 'workspaceId', 'createdAt', 'lastUpdated']
     
     def get_messageCount(self, obj):
@@ -268,12 +273,14 @@ class MemorySerializer(serializers.ModelSerializer):
     workspaceId = serializers.CharField(source='workspace.id', read_only=True)
     createdAt = serializers.DateTimeField(source='created_at', read_only=True)
     updatedAt = serializers.DateTimeField(source='updated_at', read_only=True)
+    parentId = serializers.CharField(source='parent_id', read_only=True, allow_null=True)
+    chunkIndex = serializers.IntegerField(source='chunk_index', read_only=True, allow_null=True)
     embedding = serializers.SerializerMethodField()
     
     class Meta:
         model = Memory
-        fields = ['id', 'workspaceId', 'title', 'content', 'snippet', 'tags', 'embedding', 'metadata', 'version', 'createdAt', 'updatedAt']
-        read_only_fields = ['id', 'workspaceId', 'snippet', 'version', 'createdAt', 'updatedAt']
+        fields = ['id', 'workspaceId', 'title', 'content', 'snippet', 'tags', 'embedding', 'metadata', 'version', 'parentId', 'chunkIndex', 'createdAt', 'updatedAt']
+        read_only_fields = ['id', 'workspaceId', 'snippet', 'version', 'parentId', 'chunkIndex', 'createdAt', 'updatedAt']
     
     def get_embedding(self, obj):
         """Generate a visual signature from the memory content using a hash-based approach"""
@@ -321,6 +328,26 @@ class MemorySearchSerializer(serializers.Serializer):
     top_k = serializers.IntegerField(default=5, min_value=1, max_value=50)
 
 
+# Job Serializers
+class JobSerializer(serializers.ModelSerializer):
+    """Serializer for background job status polling"""
+    workspaceId = serializers.CharField(source='workspace_id', read_only=True, allow_null=True)
+    maxAttempts = serializers.IntegerField(source='max_attempts', read_only=True)
+    runAt = serializers.DateTimeField(source='run_at', read_only=True)
+    lastError = serializers.CharField(source='last_error', read_only=True, allow_null=True)
+    createdAt = serializers.DateTimeField(source='created_at', read_only=True)
+    startedAt = serializers.DateTimeField(source='started_at', read_only=True, allow_null=True)
+    finishedAt = serializers.DateTimeField(source='finished_at', read_only=True, allow_null=True)
+    
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'name', 'status', 'workspaceId', 'progress', 'result', 'lastError',
+            'attempts', 'maxAttempts', 'runAt', 'createdAt', 'startedAt', 'finishedAt'
+        ]
+        read_only_fields = fields
+
+
 # Dashboard Serializers
 class TimeSeriesDataSerializer(serializers.Serializer):
     """Serializer for time series data"""
@@ -0,0 +1,183 @@
+"""
+Side Effects - Post-commit pipeline for work that does not belong in the response
+Activity logging, memory extraction, load snapshots and search index updates are
+queued with transaction.on_commit and run by a small pool of background workers,
+so a chat turn only pays for its own inserts and the LLM call.
+
+- Work is only queued once the surrounding transaction commits (nothing runs for
+  rolled-back requests).
+- The queue is bounded. When it is full the task runs inline in the caller, so
+  load backs up into request latency instead of memory, and nothing is dropped.
+- Activity records are batched into a single bulk_create per worker pass.
+- Set SIDE_EFFECTS_ASYNC=False to run everything inline (after commit).
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, Any, List
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction, close_old_connections
+
+logger = logging.getLogger(__name__)
+
+# How long a worker waits for more items to fill a batch
+BATCH_WAIT = 0.05
+
+
+class SideEffectPipeline:
+    """Bounded queue of deferred tasks drained by background worker threads"""
+
+    def __init__(self, workers: int, max_queue: int, batch_size: int):
+        self.workers = workers
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._threads: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+        self.inline = 0
+
+    def _ensure_started(self) -> None:
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'side-effects-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            atexit.register(self.flush)
+
+    def submit(self, task: Dict[str, Any]) -> None:
+        """Queue a task, or run it inline if the queue is full"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(task)
+        except queue.Full:
+            with self._stats_lock:
+                self.inline += 1
+            logger.warning("⚠️ Side-effect queue full, running task inline")
+            self._run_batch([task])
+
+    def _work(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + BATCH_WAIT
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            close_old_connections()
+            try:
+                self._run_batch(batch)
+            finally:
+                close_old_connections()
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _run_batch(self, batch: List[Dict[str, Any]]) -> None:
+        from .models import Activity
+
+        activities = [task['activity'] for task in batch if 'activity' in task]
+        if activities:
+            try:
+                Activity.objects.bulk_create(activities)
+                self._count(processed=len(activities))
+            except Exception as e:
+                self._count(failed=len(activities))
+                logger.error(f"❌ Failed to write {len(activities)} activities: {str(e)}")
+
+        for task in batch:
+            if 'func' not in task:
+                continue
+            try:
+                task['func'](*task['args'], **task['kwargs'])
+                self._count(processed=1)
+            except Exception as e:
+                self._count(failed=1)
+                logger.error(f"❌ Side effect {task['name']} failed: {str(e)}")
+
+    def _count(self, processed: int = 0, failed: int = 0) -> None:
+        with self._stats_lock:
+            self.processed += processed
+            self.failed += failed
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait for queued tasks to finish (used at shutdown and by commands)
+
+        Returns:
+            True if the queue drained within the timeout
+        """
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                logger.warning(f"⚠️ {self._queue.unfinished_tasks} side effects still pending at flush")
+                return False
+            time.sleep(0.01)
+        return True
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                'queueDepth': self._queue.qsize(),
+                'maxQueue': self._queue.maxsize,
+                'workers': len(self._threads),
+                'processed': self.processed,
+                'failed': self.failed,
+                'ranInline': self.inline,
+            }
+
+
+pipeline = SideEffectPipeline(
+    workers=getattr(settings, 'SIDE_EFFECTS_WORKERS', 2),
+    max_queue=getattr(settings, 'SIDE_EFFECTS_MAX_QUEUE', 1000),
+    batch_size=getattr(settings, 'SIDE_EFFECTS_BATCH_SIZE', 50),
+)
+
+
+def _dispatch(task: Dict[str, Any]) -> None:
+    if getattr(settings, 'SIDE_EFFECTS_ASYNC', True):
+        pipeline.submit(task)
+    else:
+        pipeline._run_batch([task])
+
+
+def defer(func: Callable, *args, **kwargs) -> None:
+    """
+    Run func(*args, **kwargs) in the background once the current transaction commits
+
+    Usage:
+        side_effects.defer(auto_extract_and_save, user_message, reply, conversation)
+    """
+    task = {'name': getattr(func, '__name__', repr(func)), 'func': func, 'args': args, 'kwargs': kwargs}
+    transaction.on_commit(lambda: _dispatch(task))
+
+
+def defer_activity(activity) -> None:
+    """Insert an unsaved Activity (with its id set) in the next batch after commit"""
+    task = {'name': 'activity', 'activity': activity}
+    transaction.on_commit(lambda: _dispatch(task))
+
+
+def defer_load_snapshot(workspace) -> None:
+    """
+    Record a load snapshot for a workspace in the background, at most once per
+    SIDE_EFFECTS_SNAPSHOT_INTERVAL seconds per workspace
+    """
+    from .workspace_service import record_load_snapshot
+
+    interval = getattr(settings, 'SIDE_EFFECTS_SNAPSHOT_INTERVAL', 300)
+    if cache.add(f"load-snapshot:{workspace.id}", 1, timeout=interval):
+        defer(record_load_snapshot, workspace)
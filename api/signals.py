@@ -1,16 +1,19 @@
 """
-Django signals for automatic memory indexing
+Django signals for automatic memory indexing and context cache upkeep
 """
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Memory
+from .models import Memory, ChatMessage, ConversationMemory
 from .memory_service import memory_service
+from . import context_cache, side_effects
 
 
 @receiver(post_save, sender=Memory)
 def memory_created_or_updated(sender, instance, created, **kwargs):
     """
     Signal handler: When a memory is created or updated, update the search index
+    The index update runs in the side-effect pipeline after the transaction commits.
     
     Args:
         sender: Model class (Memory)
@@ -18,32 +21,56 @@ def memory_created_or_updated(sender, instance, created, **kwargs):
         created: Boolean indicating if this is a new instance
         kwargs: Additional keyword arguments
     """
-    try:
-        if created:
-            # New memory created - add to index
-            memory_service.store(instance.text, instance.id)
-            print(f"✅ Memory {instance.id} added to search index")
-        else:
-            # Memory updated - rebuild index to reflect changes
-            memory_service.rebuild_index()
-            print(f"✅ Memory {instance.id} updated - index rebuilt")
-    except Exception as e:
-        print(f"⚠️ Error updating search index: {e}")
+    side_effects.defer(memory_service.store, instance.content, instance.id)
 
 
 @receiver(post_delete, sender=Memory)
 def memory_deleted(sender, instance, **kwargs):
     """
-    Signal handler: When a memory is deleted, rebuild the search index
+    Signal handler: When a memory is deleted, remove it from the search index
     
     Args:
         sender: Model class (Memory)
         instance: The memory instance that was deleted
         kwargs: Additional keyword arguments
     """
-    try:
-        # Rebuild index to remove deleted memory
-        memory_service.rebuild_index()
-        print(f"✅ Memory {instance.id} deleted - index rebuilt")
-    except Exception as e:
-        print(f"⚠️ Error rebuilding search index: {e}")
+    side_effects.defer(memory_service.remove, instance.id)
+
+
+@receiver(post_save, sender=ChatMessage)
+def message_saved(sender, instance, created, **kwargs):
+    """
+    Signal handler: Keep the cached history window of the conversation current
+    New messages are appended; edited messages drop the window.
+    """
+    conversation_id = instance.conversation_id
+    if created:
+        transaction.on_commit(lambda: context_cache.append_message(conversation_id, instance))
+    else:
+        transaction.on_commit(lambda: context_cache.invalidate_history(conversation_id))
+
+
+@receiver(post_delete, sender=ChatMessage)
+def message_deleted(sender, instance, **kwargs):
+    """Signal handler: Drop the cached history window of the conversation"""
+    conversation_id = instance.conversation_id
+    transaction.on_commit(lambda: context_cache.invalidate_history(conversation_id))
+
+
+@receiver(post_save, sender=ConversationMemory)
+@receiver(post_delete, sender=ConversationMemory)
+def injection_changed(sender, instance, **kwargs):
+    """
+    Signal handler: A memory was injected, toggled or removed, so the
+    conversation's rendered memory block is stale
+    """
+    conversation_id = instance.conversation_id
+    transaction.on_commit(lambda: context_cache.invalidate_memories(conversation_id))
+
+
+@receiver(post_save, sender=Memory)
+def memory_edited(sender, instance, created, **kwargs):
+    """Signal handler: Drop the memory block of conversations that inject an edited memory"""
+    if not created:
+        memory_id = instance.id
+        transaction.on_commit(lambda: context_cache.invalidate_memory_everywhere(memory_id))
@@ -0,0 +1,381 @@
+"""
+Site Crawler - Import a whole documentation site (or a sitemap) as memories
+Starting from a root URL, same-site links are followed breadth-first up to a
+depth and page budget. Starting from a sitemap, only the pages it lists are
+imported.
+
+- Pages are fetched on a thread pool (CRAWL_CONCURRENCY) sharing the scraper's
+  connection pool. Each host gets at most CRAWL_PER_HOST requests in flight,
+  spaced CRAWL_HOST_DELAY seconds apart (or the robots.txt Crawl-delay).
+- robots.txt is honoured; a host whose robots.txt is forbidden is not crawled.
+- Links are followed only on the root's host and below the root's directory.
+- Pages are deduplicated by canonical URL (rel=canonical, fragments, tracking
+  parameters, trailing slashes) and by content hash, within the crawl and
+  against memories already in the workspace.
+- New memories are written every CRAWL_BATCH_SIZE pages (see
+  import_service.save_memories), so a long crawl shows progress and a failure
+  late in the crawl keeps what was already imported.
+"""
+import html
+import logging
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Any, Optional
+from urllib.parse import urljoin, urldefrag, urlparse, urlencode, parse_qsl, urlunparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+from django.conf import settings
+
+from .models import Memory
+from .import_service import build_url_memories, save_memories
+from .url_scraper import get_session, fetch_url, parse_html, content_hash, REQUEST_TIMEOUT, USER_AGENT
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PAGES = 100
+DEFAULT_MAX_DEPTH = 3
+MAX_DEPTH_LIMIT = 10
+MAX_CRAWL_DELAY = 10  # seconds; a larger robots.txt Crawl-delay is capped
+MAX_SITEMAPS = 10  # child sitemaps read from a sitemap index
+
+SKIP_EXTENSIONS = (
+    '.pdf', '.zip', '.gz', '.tar', '.tgz', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.ico',
+    '.css', '.js', '.json', '.xml', '.txt', '.mp3', '.mp4', '.webm', '.woff', '.woff2', '.ttf',
+)
+TRACKING_PARAMS = ('utm_', 'fbclid', 'gclid')
+
+_SITEMAP_LOC = re.compile(r'<loc>\s*(.*?)\s*</loc>', re.IGNORECASE | re.DOTALL)
+
+
+def canonicalize(url: str) -> Optional[str]:
+    """
+    Dedupe key for a URL: lowercase host, no default port, fragment, tracking
+    parameters or trailing slash, sorted query. None for non-HTTP URLs.
+    """
+    try:
+        parsed = urlparse(url)
+        port = parsed.port
+    except ValueError:
+        return None
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        return None
+
+    host = parsed.hostname.lower()
+    if port and port != {'http': 80, 'https': 443}[parsed.scheme]:
+        host = f'{host}:{port}'
+    path = re.sub(r'/{2,}', '/', parsed.path).rstrip('/') or '/'
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    ))
+    return urlunparse((parsed.scheme, host, path, '', query, ''))
+
+
+def is_sitemap(url: str) -> bool:
+    path = urlparse(url).path.lower()
+    return path.endswith('.xml') or 'sitemap' in path
+
+
+def read_sitemap(url: str) -> Dict[str, Any]:
+    """
+    Page URLs listed in a sitemap (or in the sitemaps of a sitemap index)
+
+    Returns:
+        dict with success and urls, or error
+    """
+    urls = []
+    sitemaps = deque([url])
+    read = 0
+    while sitemaps and read < MAX_SITEMAPS:
+        fetched = fetch_url(sitemaps.popleft())
+        read += 1
+        if not fetched['success']:
+            if read == 1:
+                return fetched
+            continue
+        body = fetched['html']
+        locs = [html.unescape(loc) for loc in _SITEMAP_LOC.findall(body)]
+        if '<sitemapindex' in body[:1000]:
+            sitemaps.extend(locs)
+        else:
+            urls.extend(locs)
+    return {'success': True, 'urls': urls}
+
+
+class HostPolicy:
+    """robots.txt rules and request spacing for one host"""
+
+    def __init__(self, origin: str, per_host: int, delay: float):
+        self.origin = origin
+        self.slots = threading.BoundedSemaphore(per_host)
+        self.delay = delay
+        self.rules = RobotFileParser()
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def load_robots(self) -> None:
+        """Fetch robots.txt (a missing file allows everything, a forbidden one nothing)"""
+        try:
+            resp = get_session().get(f'{self.origin}/robots.txt', timeout=REQUEST_TIMEOUT)
+            if resp.status_code in (401, 403):
+                self.rules.disallow_all = True
+            elif resp.status_code >= 400:
+                self.rules.allow_all = True
+            else:
+                self.rules.parse(resp.text.splitlines())
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"⚠️ Could not read {self.origin}/robots.txt: {str(e)[:80]}")
+            self.rules.allow_all = True
+
+        crawl_delay = self.rules.crawl_delay(USER_AGENT)
+        if crawl_delay:
+            self.delay = max(self.delay, min(float(crawl_delay), MAX_CRAWL_DELAY))
+
+    def allows(self, url: str) -> bool:
+        return self.rules.can_fetch(USER_AGENT, url)
+
+    def wait_turn(self) -> None:
+        """Block until this host may be requested again"""
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next_at)
+            self._next_at = at + self.delay
+        if at > now:
+            time.sleep(at - now)
+
+
+class SiteCrawl:
+    """One crawl of a site into a workspace"""
+
+    def __init__(self, workspace, url: str, max_pages: int = None, max_depth: int = None,
+                 should_summarize: bool = True, on_progress: Callable[..., None] = None):
+        self.workspace = workspace
+        self.root = urldefrag(url)[0]
+        self.max_pages = min(DEFAULT_MAX_PAGES if max_pages is None else max_pages, getattr(settings, 'CRAWL_MAX_PAGES', 500))
+        self.max_depth = min(DEFAULT_MAX_DEPTH if max_depth is None else max_depth, MAX_DEPTH_LIMIT)
+        self.should_summarize = should_summarize
+        self.on_progress = on_progress
+
+        root = urlparse(self.root)
+        self.host = root.netloc.lower()
+        self.path_prefix = root.path[:root.path.rfind('/') + 1] or '/'
+
+        self.concurrency = getattr(settings, 'CRAWL_CONCURRENCY', 8)
+        self.batch_size = getattr(settings, 'CRAWL_BATCH_SIZE', 25)
+        self.policies: Dict[str, HostPolicy] = {}
+
+        self.frontier = deque()
+        self.seen = set()  # canonical URLs queued or fetched
+        self.seen_hashes = set()
+        self.pending = []  # (url, scrape result) waiting for the next batch insert
+        self.results = []
+        self.stats = {
+            'fetched': 0, 'imported': 0, 'unchanged': 0, 'duplicates': 0,
+            'failed': 0, 'skipped': 0, 'blockedByRobots': 0,
+        }
+
+    def policy(self, url: str) -> HostPolicy:
+        parsed = urlparse(url)
+        host = parsed.netloc.lower()
+        if host not in self.policies:
+            policy = HostPolicy(
+                f'{parsed.scheme}://{parsed.netloc}',
+                per_host=getattr(settings, 'CRAWL_PER_HOST', 4),
+                delay=getattr(settings, 'CRAWL_HOST_DELAY', 0.1),
+            )
+            policy.load_robots()
+            self.policies[host] = policy
+        return self.policies[host]
+
+    def in_scope(self, url: str) -> bool:
+        parsed = urlparse(url)
+        if parsed.netloc.lower() != self.host or not parsed.path.startswith(self.path_prefix):
+            return False
+        return not parsed.path.lower().endswith(SKIP_EXTENSIONS)
+
+    def add(self, url: str, depth: int) -> None:
+        url = urldefrag(url)[0]
+        key = canonicalize(url)
+        if key and key not in self.seen:
+            self.seen.add(key)
+            self.frontier.append((url, depth))
+
+    def fetch_page(self, url: str, policy: HostPolicy) -> Dict[str, Any]:
+        """Runs on the pool: fetch and parse one page (no database access)"""
+        with policy.slots:
+            policy.wait_turn()
+            fetched = fetch_url(url)
+        if not fetched['success']:
+            return fetched
+        content_type = fetched.get('content_type', '')
+        if content_type and 'html' not in content_type:
+            return {'success': False, 'skipped': True, 'error': f'Not an HTML page ({content_type[:50]})'}
+
+        result = parse_html(fetched['html'], fetched.get('url') or url, with_links=True)
+        result['final_url'] = fetched.get('url') or url
+        if result['success']:
+            result['content_hash'] = content_hash(result['content'])
+        return result
+
+    def handle(self, url: str, depth: int, result: Dict[str, Any], follow_links: bool) -> None:
+        if 'links' not in result:
+            # Fetch failed or not HTML
+            self.stats['skipped' if result.get('skipped') else 'failed'] += 1
+            if not result.get('skipped'):
+                self.results.append({'url': url, 'success': False, 'error': result['error']})
+            return
+
+        self.stats['fetched'] += 1
+        final_url = result['final_url']
+        self.seen.add(canonicalize(final_url))
+
+        if follow_links and depth < self.max_depth and len(self.frontier) < self.max_pages * 2:
+            for href in result['links']:
+                link = urljoin(final_url, href)
+                if self.in_scope(link):
+                    self.add(link, depth + 1)
+
+        if not result['success']:
+            # An index page without text of its own
+            self.stats['skipped'] += 1
+            return
+
+        # Pages that declare an already imported page as canonical are duplicates
+        canonical = canonicalize(urljoin(final_url, result['canonical'])) if result.get('canonical') else None
+        if canonical and canonical != canonicalize(final_url):
+            if canonical in self.seen:
+                self.stats['duplicates'] += 1
+                return
+            self.seen.add(canonical)
+
+        if result['content_hash'] in self.seen_hashes:
+            self.stats['duplicates'] += 1
+            return
+        self.seen_hashes.add(result['content_hash'])
+
+        self.pending.append((final_url, result))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Save the pending pages, skipping content the workspace already has"""
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+
+        hashes = [result['content_hash'] for _, result in batch]
+        existing = {
+            memory.metadata.get('content_hash'): memory
+            for memory in Memory.objects.filter(
+                workspace=self.workspace, metadata__content_hash__in=hashes
+            ).only('id', 'title', 'metadata')
+        }
+
+        memories = []
+        for url, result in batch:
+            memory = existing.get(result['content_hash'])
+            if memory:
+                self.stats['unchanged'] += 1
+                self.results.append({'url': url, 'success': True, 'memoryId': memory.id, 'title': memory.title, 'unchanged': True})
+                continue
+            built = build_url_memories(self.workspace, url, result, self.should_summarize)
+            built[0].metadata['crawl_root'] = self.root
+            memories.extend(built)
+            self.stats['imported'] += 1
+            self.results.append({'url': url, 'success': True, 'memoryId': built[0].id, 'title': built[0].title})
+
+        save_memories(self.workspace, memories)
+
+    def report_progress(self) -> None:
+        if self.on_progress:
+            self.on_progress(queued=len(self.frontier), **self.stats)
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Crawl and import
+
+        Returns:
+            dict with page counts (fetched, imported, unchanged, duplicates, failed,
+            skipped, blockedByRobots), elapsedMs, pagesPerSecond and per-page results
+        """
+        started = time.monotonic()
+
+        follow_links = True
+        if is_sitemap(self.root):
+            sitemap = read_sitemap(self.root)
+            if not sitemap['success']:
+                return {'success': False, 'error': sitemap['error']}
+            follow_links = False
+            for url in sitemap['urls']:
+                if urlparse(url).netloc.lower() == self.host:
+                    self.add(url, 0)
+        else:
+            self.add(self.root, 0)
+
+        scheduled = 0
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='crawl') as executor:
+            while True:
+                while self.frontier and len(in_flight) < self.concurrency and scheduled < self.max_pages:
+                    url, depth = self.frontier.popleft()
+                    policy = self.policy(url)
+                    if not policy.allows(url):
+                        self.stats['blockedByRobots'] += 1
+                        continue
+                    in_flight[executor.submit(self.fetch_page, url, policy)] = (url, depth)
+                    scheduled += 1
+
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, depth = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {'success': False, 'error': str(e)[:100]}
+                    self.handle(url, depth, result, follow_links)
+                self.report_progress()
+
+        self.flush()
+        self.report_progress()
+
+        elapsed = time.monotonic() - started
+        pages_per_second = self.stats['fetched'] / elapsed if elapsed else 0
+        logger.info(
+            f"🕸️ Crawled {self.stats['fetched']} pages of {self.root} in {elapsed:.2f}s "
+            f"({pages_per_second:.1f} pages/s): {self.stats['imported']} imported, "
+            f"{self.stats['duplicates']} duplicates, {self.stats['failed']} failed"
+        )
+
+        return {
+            'success': True,
+            **self.stats,
+            'elapsedMs': round(elapsed * 1000),
+            'pagesPerSecond': round(pages_per_second, 2),
+            'results': self.results,
+        }
+
+
+def crawl_site(workspace, url: str, max_pages: int = None, max_depth: int = None,
+               should_summarize: bool = True, on_progress: Callable[..., None] = None) -> Dict[str, Any]:
+    """
+    Crawl a site (or the pages of a sitemap) into memories
+
+    Args:
+        workspace: Workspace model instance
+        url: Root page or sitemap URL
+        max_pages: Page budget (capped at CRAWL_MAX_PAGES)
+        max_depth: Link depth from the root page (ignored for sitemaps)
+        should_summarize: Summarize long pages
+        on_progress: Called with keyword counts as pages finish
+
+    Returns:
+        See SiteCrawl.run, or success False and error if the sitemap is unreadable
+    """
+    return SiteCrawl(workspace, url, max_pages, max_depth, should_summarize, on_progress).run()
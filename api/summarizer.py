@@ -0,0 +1,290 @@
+"""
+Summarizer - Extractive summaries of imported documents
+Picks the sentences that best represent the whole document instead of keeping
+its first paragraphs, so a summarized memory still covers everything the
+document talks about.
+
+1. The text is split into sentences (each list item or table row counts as
+   one; headings are left out).
+2. Each sentence becomes a TF-IDF vector; cosine similarities to its most
+   similar sentences form a graph, ranked with TextRank (PageRank over the
+   similarity graph).
+3. Scores get a small boost for sentences similar to the title and for the
+   opening of the document.
+4. Sentences are taken best first until the budget is used, skipping
+   near-duplicates of sentences already taken, and printed in document order.
+
+With NumPy installed the similarity graph and the ranking are vectorized;
+without it an inverted-index implementation gives the same ranking. Documents
+with too few sentences (tables, code, lists) fall back to their opening.
+"""
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import List, Tuple
+
+from django.conf import settings
+
+try:
+    import numpy as np
+except ImportError:  # optional: pure-Python fallback below
+    np = None
+
+CHARS_PER_TOKEN = 4  # same estimate as llm_router.estimate_tokens
+MIN_SENTENCES = 4  # fewer candidates than this: keep the opening instead
+MAX_SENTENCES = 1500  # candidates ranked; later sentences are ignored
+DAMPING = 0.85
+NEIGHBOURS = 20  # graph edges kept per sentence, so ranking is linear in sentences
+ITERATIONS = 50
+TOLERANCE = 1e-6
+TITLE_WEIGHT = 0.5
+LEAD_WEIGHT = 0.3  # bonus of the first sentence, fading over the first LEAD_SENTENCES
+LEAD_SENTENCES = 5
+REDUNDANCY = 0.6  # skip sentences this similar to one already selected
+
+STOP_WORDS = {
+    'the', 'a', 'an', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had',
+    'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'shall',
+    'can', 'to', 'of', 'in', 'for', 'on', 'with', 'at', 'by', 'from', 'as', 'into', 'through',
+    'during', 'before', 'after', 'above', 'below', 'between', 'under', 'again', 'further',
+    'then', 'once', 'here', 'there', 'when', 'where', 'why', 'how', 'all', 'each', 'few', 'more',
+    'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only', 'own', 'same', 'so', 'than',
+    'too', 'very', 'just', 'and', 'but', 'if', 'or', 'because', 'until', 'while', 'this', 'that',
+    'these', 'those', 'it', 'its', 'me', 'my', 'we', 'our', 'you', 'your', 'he', 'him', 'his',
+    'she', 'her', 'they', 'them', 'their', 'also', 'which', 'what', 'who', 'any', 'about',
+}
+
+_WORD = re.compile(r'\w+')
+_SENTENCE_END = re.compile(r'(?<=[.!?])["\')\]]*\s+(?=["\'(\[]?[A-Z0-9])')
+_HEADING = re.compile(r'^#{1,6}\s')
+_LIST_ITEM = re.compile(r'^(?:[-*\u2022]|\d+[.)]|\([a-z0-9]+\))\s')
+
+
+def split_sentences(text: str) -> List[Tuple[int, str]]:
+    """
+    (paragraph number, sentence) for each sentence. Wrapped lines of a
+    paragraph are joined; headings, list items and table rows stay separate.
+    """
+    sentences = []
+
+    def add(number, running):
+        sentences.extend((number, sentence.strip()) for sentence in _SENTENCE_END.split(running) if sentence.strip())
+
+    for number, paragraph in enumerate(re.split(r'\n\s*\n', text)):
+        running = ''
+        for line in paragraph.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            if _HEADING.match(line) or _LIST_ITEM.match(line) or ' | ' in line:
+                add(number, running)
+                running = ''
+                if _HEADING.match(line):
+                    sentences.append((number, line))
+                    continue
+            running = f'{running} {line}' if running else line
+        add(number, running)
+    return sentences
+
+
+def tokenize(text: str) -> List[str]:
+    return [word for word in _WORD.findall(text.lower()) if len(word) > 2 and word not in STOP_WORDS and not word.isdigit()]
+
+
+def _tfidf(token_lists: List[List[str]]):
+    """Unit-length TF-IDF vectors as {term: weight} dicts, and the idf table"""
+    df = Counter()
+    for tokens in token_lists:
+        df.update(set(tokens))
+    count = len(token_lists)
+    idf = {term: math.log((1 + count) / (1 + freq)) + 1 for term, freq in df.items()}
+
+    vectors = []
+    for tokens in token_lists:
+        vector = {term: (1 + math.log(tf)) * idf[term] for term, tf in Counter(tokens).items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        vectors.append({term: weight / norm for term, weight in vector.items()})
+    return vectors, idf
+
+
+def _cosine(a: dict, b: dict) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(term, 0.0) for term, weight in a.items())
+
+
+def _rank_numpy(vectors: List[dict]):
+    """TextRank scores (over each sentence's NEIGHBOURS most similar) and the similarity matrix, vectorized"""
+    terms = {}
+    rows, cols, values = [], [], []
+    for row, vector in enumerate(vectors):
+        for term, weight in vector.items():
+            rows.append(row)
+            cols.append(terms.setdefault(term, len(terms)))
+            values.append(weight)
+    matrix = np.zeros((len(vectors), len(terms)))
+    matrix[rows, cols] = values
+
+    similarity = matrix @ matrix.T
+    np.fill_diagonal(similarity, 0.0)
+
+    graph = similarity
+    if len(vectors) > NEIGHBOURS:
+        nearest = np.argpartition(-similarity, NEIGHBOURS - 1, axis=1)[:, :NEIGHBOURS]
+        keep = np.zeros(similarity.shape, dtype=bool)
+        np.put_along_axis(keep, nearest, True, axis=1)
+        graph = np.where(keep | keep.T, similarity, 0.0)
+
+    out_weight = graph.sum(axis=1)
+    out_weight[out_weight == 0] = 1.0
+    transition = (graph / out_weight[:, None]).T
+
+    count = len(vectors)
+    scores = np.full(count, 1.0 / count)
+    for _ in range(ITERATIONS):
+        updated = (1 - DAMPING) / count + DAMPING * (transition @ scores)
+        converged = np.abs(updated - scores).sum() < TOLERANCE
+        scores = updated
+        if converged:
+            break
+    return scores.tolist(), similarity
+
+
+def _rank_python(vectors: List[dict]):
+    """TextRank scores (over each sentence's NEIGHBOURS most similar) and a similarity lookup, via an inverted index"""
+    postings = defaultdict(list)
+    for index, vector in enumerate(vectors):
+        for term, weight in vector.items():
+            postings[term].append((index, weight))
+
+    # Only pairs sharing a term have non-zero similarity
+    edges = [defaultdict(float) for _ in vectors]
+    for entries in postings.values():
+        for position, (i, weight_i) in enumerate(entries):
+            for j, weight_j in entries[position + 1:]:
+                product = weight_i * weight_j
+                edges[i][j] += product
+                edges[j][i] += product
+
+    count = len(vectors)
+    graph = edges
+    if count > NEIGHBOURS:
+        graph = [{} for _ in vectors]
+        for i, neighbours in enumerate(edges):
+            for j, weight in heapq.nlargest(NEIGHBOURS, neighbours.items(), key=lambda item: (item[1], -item[0])):
+                graph[i][j] = graph[j][i] = weight
+
+    out_weight = [sum(neighbours.values()) or 1.0 for neighbours in graph]
+    scores = [1.0 / count] * count
+    for _ in range(ITERATIONS):
+        updated = [(1 - DAMPING) / count] * count
+        for i, neighbours in enumerate(graph):
+            share = DAMPING * scores[i] / out_weight[i]
+            for j, weight in neighbours.items():
+                updated[j] += share * weight
+        converged = sum(abs(a - b) for a, b in zip(updated, scores)) < TOLERANCE
+        scores = updated
+        if converged:
+            break
+    return scores, edges
+
+
+def _lead(text: str, max_chars: int) -> str:
+    """The opening paragraphs of text that fit in max_chars"""
+    parts = []
+    length = 0
+    for paragraph in (p.strip() for p in text.split('\n') if p.strip()):
+        if length + len(paragraph) > max_chars:
+            remaining = max_chars - length
+            if remaining > 100:
+                parts.append(paragraph[:remaining] + '...')
+            break
+        parts.append(paragraph)
+        length += len(paragraph) + 2
+    return '\n\n'.join(parts) if parts else text[:max_chars]
+
+
+def summarize(text: str, title: str = '', max_chars: int = None, max_tokens: int = None) -> str:
+    """
+    Extractive summary of a document
+
+    Args:
+        text: Document text (paragraphs separated by blank lines)
+        title: Document title; sentences about it rank higher
+        max_chars: Summary budget in characters (default SUMMARY_MAX_CHARS)
+        max_tokens: Budget in tokens instead (about 4 characters each)
+
+    Returns:
+        The text itself if it fits the budget, else selected sentences in
+        document order followed by a note with the original length
+    """
+    if not text:
+        return ''
+    if max_tokens is not None:
+        max_chars = max_tokens * CHARS_PER_TOKEN
+    elif max_chars is None:
+        max_chars = getattr(settings, 'SUMMARY_MAX_CHARS', 2000)
+    if len(text) <= max_chars:
+        return text
+
+    note = f'\n\n[Summarized from {len(text)} characters]'
+    budget = max(max_chars - len(note), max_chars // 2)
+
+    candidates = []
+    for paragraph, sentence in split_sentences(text)[:MAX_SENTENCES]:
+        if _HEADING.match(sentence):
+            continue
+        tokens = tokenize(sentence)
+        if len(tokens) >= 2 and len(sentence) <= budget:
+            candidates.append((paragraph, sentence, tokens))
+    if len(candidates) < MIN_SENTENCES:
+        return _lead(text, budget) + note
+
+    vectors, idf = _tfidf([tokens for _, _, tokens in candidates])
+    if np is not None:
+        scores, similarity = _rank_numpy(vectors)
+
+        def similar(i, j):
+            return similarity[i, j]
+    else:
+        scores, edges = _rank_python(vectors)
+
+        def similar(i, j):
+            return edges[i].get(j, 0.0)
+
+    title_tokens = Counter(tokenize(title))
+    title_vector = {term: idf[term] for term in title_tokens if term in idf}
+    norm = math.sqrt(sum(weight * weight for weight in title_vector.values())) or 1.0
+    title_vector = {term: weight / norm for term, weight in title_vector.items()}
+
+    ranked = sorted(
+        range(len(candidates)),
+        key=lambda i: scores[i]
+        * (1 + TITLE_WEIGHT * _cosine(vectors[i], title_vector))
+        * (1 + LEAD_WEIGHT * max(0.0, 1 - i / LEAD_SENTENCES)),
+        reverse=True,
+    )
+
+    selected = []
+    used = 0
+    for i in ranked:
+        cost = len(candidates[i][1]) + 2  # separator
+        if used + cost > budget:
+            continue
+        if any(similar(i, j) > REDUNDANCY for j in selected):
+            continue
+        selected.append(i)
+        used += cost
+
+    # Document order; sentences of one paragraph stay on one line
+    parts = []
+    last_paragraph = None
+    for i in sorted(selected):
+        paragraph, sentence, _ = candidates[i]
+        if paragraph == last_paragraph:
+            parts[-1] += ' ' + sentence
+        else:
+            parts.append(sentence)
+        last_paragraph = paragraph
+    return '\n\n'.join(parts) + note
@@ -0,0 +1,199 @@
+"""
+Site crawler tests against a local HTTP server
+
+The fixture site is a binary tree of pages under /docs/: /docs/ is page 0 and
+page i links to pages 2i+1 and 2i+2. Pages also link out of scope (another
+directory, another host, a PDF), robots.txt disallows page 4, page 5 repeats
+the text of page 3 and page 7 declares page 1 as its canonical URL.
+"""
+import http.server
+import threading
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.models import User, Workspace, Memory
+from api.site_crawler import crawl_site, canonicalize
+
+PAGES = 9  # p0 .. p8
+
+
+def page_html(i: int) -> str:
+    links = ''.join(f'<a href="/docs/p{j}#section">p{j}</a> ' for j in (i * 2 + 1, i * 2 + 2) if j < PAGES)
+    if i == 0:
+        links += '<a href="/docs/p1/?utm_source=nav">p1 again</a> '
+    links += '<a href="/private/x">private</a> <a href="https://elsewhere.test/">external</a> <a href="/docs/manual.pdf">pdf</a>'
+    topic = 3 if i == 5 else i
+    body = f'Page {topic} explains topic {topic} in detail. ' * 10
+    canonical = '<link rel="canonical" href="/docs/p1/">' if i == 7 else ''
+    return (f'<html><head><title>Page {i}</title>{canonical}</head>'
+            f'<body><nav>{links}</nav><main>{body}</main></body></html>')
+
+
+class FixtureSite(http.server.BaseHTTPRequestHandler):
+    hits = []
+    base = ''
+
+    def do_GET(self):
+        self.hits.append(self.path)
+        if self.path == '/robots.txt':
+            self.reply(b'User-agent: *\nDisallow: /docs/p4\n', 'text/plain')
+        elif self.path == '/sitemap.xml':
+            locs = [f'{self.base}/docs/p{i}' for i in range(6)] + ['https://elsewhere.test/page']
+            body = '<?xml version="1.0"?><urlset>' + ''.join(f'<url><loc>{loc}</loc></url>' for loc in locs) + '</urlset>'
+            self.reply(body.encode(), 'application/xml')
+        elif self.path.rstrip('/') == '/docs':
+            self.reply(page_html(0).encode(), 'text/html; charset=utf-8')
+        elif self.path.startswith('/docs/p'):
+            self.reply(page_html(int(self.path[len('/docs/p'):].split('/')[0].split('?')[0])).encode(), 'text/html')
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def reply(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(CRAWL_HOST_DELAY=0, CRAWL_BATCH_SIZE=3, CRAWL_CONCURRENCY=4)
+class SiteCrawlerTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), FixtureSite)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        FixtureSite.base = f'http://127.0.0.1:{cls.server.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        FixtureSite.hits.clear()
+        self.user = User.objects.create(username='crawler', email='crawler@example.com')
+        self.workspace = Workspace.objects.create(name='Docs', owner=self.user)
+        self.root = f'{FixtureSite.base}/docs/'
+
+    def page_hits(self):
+        return [path for path in FixtureSite.hits if path.startswith('/docs/p')]
+
+    def test_canonicalize(self):
+        self.assertEqual(
+            canonicalize('HTTP://Example.com:80//a/b/?utm_source=x&b=2&a=1#frag'),
+            'http://example.com/a/b?a=1&b=2',
+        )
+        self.assertEqual(canonicalize('https://example.com:8443/'), 'https://example.com:8443/')
+        self.assertIsNone(canonicalize('mailto:someone@example.com'))
+
+    def test_crawl_imports_site(self):
+        result = crawl_site(self.workspace, self.root, max_pages=50, max_depth=5)
+
+        self.assertTrue(result['success'])
+        # p0-p8 except p4 (robots.txt)
+        self.assertEqual(result['fetched'], 8)
+        self.assertEqual(result['blockedByRobots'], 1)
+        # p5 repeats p3's text, p7 is canonically p1
+        self.assertEqual(result['duplicates'], 2)
+        self.assertEqual(result['imported'], 6)
+        self.assertEqual(Memory.objects.filter(workspace=self.workspace).count(), 6)
+        for memory in Memory.objects.filter(workspace=self.workspace):
+            self.assertEqual(memory.metadata['crawl_root'], self.root)
+            self.assertIsNotNone(memory.synced_at)
+
+    def test_robots_txt_is_honoured(self):
+        result = crawl_site(self.workspace, self.root, max_pages=50, max_depth=5)
+
+        self.assertEqual(result['blockedByRobots'], 1)
+        self.assertNotIn('/docs/p4', FixtureSite.hits)
+        self.assertEqual(FixtureSite.hits.count('/robots.txt'), 1)
+
+    def test_links_stay_in_scope(self):
+        crawl_site(self.workspace, self.root, max_pages=50, max_depth=5)
+
+        self.assertFalse([path for path in FixtureSite.hits if path.startswith('/private') or path.endswith('.pdf')])
+
+    def test_urls_are_deduplicated_by_canonical_form(self):
+        crawl_site(self.workspace, self.root, max_pages=50, max_depth=5)
+
+        # Linked as /docs/p1#section and /docs/p1/?utm_source=nav, fetched once
+        self.assertEqual([path for path in FixtureSite.hits if path.startswith('/docs/p1')], ['/docs/p1'])
+        titles = set(Memory.objects.filter(workspace=self.workspace).values_list('title', flat=True))
+        self.assertNotIn('[Imported] Page 7', titles)
+
+    def test_pages_are_deduplicated_by_content_hash(self):
+        crawl_site(self.workspace, self.root, max_pages=50, max_depth=5)
+
+        hashes = list(Memory.objects.filter(workspace=self.workspace).values_list('metadata__content_hash', flat=True))
+        self.assertEqual(len(hashes), len(set(hashes)))
+        titles = set(Memory.objects.filter(workspace=self.workspace).values_list('title', flat=True))
+        self.assertEqual(len(titles & {'[Imported] Page 3', '[Imported] Page 5'}), 1)
+
+    def test_recrawl_keeps_existing_memories(self):
+        crawl_site(self.workspace, self.root, max_pages=50, max_depth=5)
+        result = crawl_site(self.workspace, self.root, max_pages=50, max_depth=5)
+
+        self.assertEqual(result['imported'], 0)
+        self.assertEqual(result['unchanged'], 6)
+        self.assertEqual(Memory.objects.filter(workspace=self.workspace).count(), 6)
+
+    def test_depth_budget(self):
+        result = crawl_site(self.workspace, self.root, max_pages=50, max_depth=1)
+
+        self.assertEqual(result['fetched'], 3)
+        self.assertEqual(sorted(self.page_hits()), ['/docs/p1', '/docs/p2'])
+
+    def test_zero_depth_fetches_only_the_root(self):
+        result = crawl_site(self.workspace, self.root, max_pages=50, max_depth=0)
+
+        self.assertEqual(result['fetched'], 1)
+        self.assertEqual(self.page_hits(), [])
+
+    def test_page_budget(self):
+        result = crawl_site(self.workspace, self.root, max_pages=3, max_depth=5)
+
+        self.assertEqual(result['fetched'], 3)
+        self.assertEqual(len(self.page_hits()), 2)
+
+    @override_settings(CRAWL_MAX_PAGES=2)
+    def test_page_budget_is_capped_by_settings(self):
+        result = crawl_site(self.workspace, self.root, max_pages=50, max_depth=5)
+
+        self.assertEqual(result['fetched'], 2)
+
+    def test_sitemap_imports_listed_pages_only(self):
+        result = crawl_site(self.workspace, f'{FixtureSite.base}/sitemap.xml', max_pages=50)
+
+        self.assertTrue(result['success'])
+        # p0-p5 except p4 (robots.txt); the external URL is ignored, links are not followed
+        self.assertEqual(result['fetched'], 5)
+        self.assertEqual(result['blockedByRobots'], 1)
+        self.assertEqual(result['duplicates'], 1)
+        self.assertEqual(result['imported'], 4)
+        self.assertNotIn('/docs/p6', FixtureSite.hits)
+
+    def test_unreadable_sitemap(self):
+        result = crawl_site(self.workspace, f'{FixtureSite.base}/missing-sitemap.xml')
+
+        self.assertFalse(result['success'])
+        self.assertIn('error', result)
+
+    def test_crawl_view_validates_budgets(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        endpoint = f'/api/workspaces/{self.workspace.id}/memories/import-crawl'
+
+        response = client.post(endpoint, {'url': self.root, 'maxPages': 0}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('maxPages', response.json()['error'])
+
+        response = client.post(endpoint, {'url': self.root, 'maxPages': 1, 'maxDepth': 0}, format='json')
+        self.assertEqual(response.status_code, 202)
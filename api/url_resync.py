@@ -0,0 +1,198 @@
+"""
+URL Re-sync - Keep memories imported from URLs up to date
+Runs as the periodic 'imports.resync' job. Each run re-checks the stalest
+imported URLs through the fetch cache, so unchanged pages usually cost a 304
+and no parsing. Memories are only rewritten (version bumped, re-indexed by the
+post_save signal) when the extracted text actually changed.
+
+- One fetch per URL serves every workspace that imported it.
+- A chunked document gets its chunks rebuilt from the new text.
+- Requests to the same domain are spaced RESYNC_DOMAIN_DELAY seconds apart and
+  capped at RESYNC_MAX_PER_DOMAIN per run.
+- RESYNC_DAILY_BUDGET fetches per day are spread evenly over the runs.
+- Pages imported in advanced (Playwright) mode are skipped unless
+  RESYNC_INCLUDE_ADVANCED is set. Set metadata.resync = false on a memory to
+  opt it out.
+"""
+import logging
+import math
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import Callable, Dict, Any, List
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Memory
+from .import_service import get_domain, chunk_document, index_memories, SUMMARIZE_MIN_LENGTH
+from . import side_effects
+
+logger = logging.getLogger(__name__)
+
+# Due URLs collected per run, as a multiple of the run's budget: leaves room
+# for URLs skipped by the per-domain cap
+CANDIDATE_FACTOR = 5
+
+
+def run_budget() -> int:
+    """Fetches allowed in one run: the daily budget spread over the runs per day"""
+    interval = getattr(settings, 'RESYNC_INTERVAL', 3600)
+    daily = getattr(settings, 'RESYNC_DAILY_BUDGET', 500)
+    return max(1, math.ceil(daily * interval / 86400))
+
+
+def due_urls(limit: int = None) -> List[Dict[str, Any]]:
+    """
+    Imported URLs that are due for a check, stalest first
+
+    Only memories whose synced_at is older than RESYNC_MIN_AGE are read, in
+    batches, oldest first.
+
+    Args:
+        limit: Stop after this many URLs (their remaining due memories are
+            picked up by a later run)
+
+    Returns:
+        List of {'url', 'mode', 'memories', 'last_synced'}
+    """
+    min_age = getattr(settings, 'RESYNC_MIN_AGE', 24 * 3600)
+    cutoff = timezone.now() - timedelta(seconds=min_age)
+    include_advanced = getattr(settings, 'RESYNC_INCLUDE_ADVANCED', False)
+
+    # Opted-out memories are filtered here, not skipped in the loop: their
+    # synced_at never moves, so they would stay at the head of every run.
+    # (A plain exclude() on a JSON key would also drop rows without the key.)
+    stale = Memory.objects.filter(synced_at__lt=cutoff).filter(
+        Q(metadata__resync__isnull=True) | ~Q(metadata__resync=False)
+    )
+    if not include_advanced:
+        stale = stale.filter(Q(metadata__scrape_mode__isnull=True) | ~Q(metadata__scrape_mode='advanced'))
+    by_url = {}
+    for memory in stale.order_by('synced_at').only('id', 'metadata', 'workspace_id', 'synced_at').iterator(chunk_size=500):
+        metadata = memory.metadata
+        url = metadata.get('source_url')
+        if not url:
+            continue
+        mode = metadata.get('scrape_mode', 'basic')
+
+        if url not in by_url:
+            if limit is not None and len(by_url) >= limit:
+                break
+            by_url[url] = {'url': url, 'mode': mode, 'memories': [], 'last_synced': memory.synced_at}
+        by_url[url]['memories'].append(memory)
+
+    return list(by_url.values())
+
+
+def _mark_checked(memories: List[Memory], now, error: str = None) -> None:
+    # Bookkeeping only: a queryset update does not bump updated_at or fire signals
+    for memory in memories:
+        metadata = {**memory.metadata, 'synced_at': str(now)}
+        if error:
+            metadata['sync_error'] = error
+        else:
+            metadata.pop('sync_error', None)
+        Memory.objects.filter(id=memory.id).update(metadata=metadata, synced_at=now)
+
+
+def _apply_update(memory: Memory, scrape_result: Dict[str, Any], now) -> bool:
+    """Rewrite a memory with re-scraped content. Returns False if it was unchanged."""
+    from .url_scraper import summarize_content
+
+    if memory.metadata.get('content_hash') == scrape_result.get('content_hash'):
+        _mark_checked([memory], now)
+        return False
+
+    memory = Memory.objects.get(id=memory.id)
+    content = scrape_result['content']
+    if memory.metadata.get('was_summarized') and len(content) > SUMMARIZE_MIN_LENGTH:
+        content = summarize_content(content, scrape_result['title'])
+
+    memory.content = content
+    memory.snippet = ''
+    memory.version += 1
+    memory.synced_at = now
+    memory.metadata = {
+        **memory.metadata,
+        'content_hash': scrape_result.get('content_hash'),
+        'synced_at': str(now),
+    }
+    for key in ('sync_error', 'chunk_count', 'document_length'):
+        memory.metadata.pop(key, None)
+    chunks = chunk_document(memory, scrape_result['content'])
+
+    with transaction.atomic():
+        # The document's chunks are rebuilt from the new text
+        memory.chunks.all().delete()
+        # post_save re-indexes the memory and refreshes conversations that inject it
+        memory.save()
+        if chunks:
+            Memory.objects.bulk_create(chunks)
+            side_effects.defer(index_memories, chunks)
+    return True
+
+
+def resync(on_progress: Callable[..., None] = None) -> Dict[str, Any]:
+    """
+    Re-check due imported URLs within this run's budget
+
+    Args:
+        on_progress: Called with keyword counts after each URL
+
+    Returns:
+        Counts of checked URLs, unchanged pages, updated memories and failures
+    """
+    from .url_scraper import scrape_url
+
+    budget = run_budget()
+    domain_delay = getattr(settings, 'RESYNC_DOMAIN_DELAY', 1.0)
+    max_per_domain = getattr(settings, 'RESYNC_MAX_PER_DOMAIN', 20)
+
+    # Interleave domains: within the budget, take the stalest URLs but at most
+    # max_per_domain from any one site
+    per_domain = defaultdict(int)
+    selected = []
+    for entry in due_urls(limit=budget * CANDIDATE_FACTOR):
+        domain = get_domain(entry['url'])
+        if per_domain[domain] >= max_per_domain:
+            continue
+        per_domain[domain] += 1
+        selected.append(entry)
+        if len(selected) >= budget:
+            break
+
+    stats = {'due': len(selected), 'checked': 0, 'unchanged': 0, 'updated': 0, 'failed': 0}
+    next_allowed = {}
+
+    for entry in selected:
+        domain = get_domain(entry['url'])
+        wait = next_allowed.get(domain, 0) - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        next_allowed[domain] = time.monotonic() + domain_delay
+
+        result = scrape_url(entry['url'], mode=entry['mode'])
+        now = timezone.now()
+        stats['checked'] += 1
+
+        if not result['success']:
+            stats['failed'] += 1
+            _mark_checked(entry['memories'], now, error=result['error'])
+            logger.warning(f"⚠️ Re-sync of {entry['url']} failed: {result['error']}")
+        else:
+            updated = sum(_apply_update(memory, result, now) for memory in entry['memories'])
+            stats['updated'] += updated
+            if not updated:
+                stats['unchanged'] += 1
+
+        if on_progress:
+            on_progress(**stats)
+
+    logger.info(
+        f"🔄 Re-sync checked {stats['checked']} URLs: {stats['updated']} memories updated, "
+        f"{stats['unchanged']} unchanged, {stats['failed']} failed"
+    )
+    return stats
@@ -5,32 +5,51 @@ Supports two modes:
 2. Advanced: Playwright (for JS-heavy sites, requires premium server)
 """
 import re
+import hashlib
 import logging
 from urllib.parse import urlparse
 import requests
 from bs4 import BeautifulSoup
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .file_parser import html_to_text
 
 logger = logging.getLogger(__name__)
-MAX_CONTENT_LENGTH = 30000
+MAX_CONTENT_LENGTH = 200000  # long pages are chunked on import
 REQUEST_TIMEOUT = 15
 USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0'
+HTTP_POOL_SIZE = 32
+
+_session = None
 
-# Check if Playwright is available
+# Check if Playwright is available (used through browser_pool)
 PLAYWRIGHT_AVAILABLE = False
 try:
-    from playwright.sync_api import sync_playwright
+    import playwright.async_api  # noqa: F401
     PLAYWRIGHT_AVAILABLE = True
 except ImportError:
     pass
 
 
 def clean_text(text: str) -> str:
+    """
+    Normalize whitespace but keep the text's lines: runs of spaces become one
+    space and blank lines collapse to a single paragraph break, so the chunker
+    still sees paragraphs
+    """
     if not text:
         return ''
-    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\S\n]+', ' ', text.replace('\r\n', '\n').replace('\r', '\n'))
+    text = re.sub(r' ?\n(?: ?\n)+ ?', '\n\n', text)
+    text = re.sub(r' ?\n ?', '\n', text)
     return text.strip()
 
 
+def _one_line(text: str) -> str:
+    return ' '.join(text.split()) if text else ''
+
+
 def scrape_url(url: str, mode: str = 'basic') -> dict:
     """
     Scrape content from URL.
@@ -47,53 +66,152 @@ def scrape_url(url: str, mode: str = 'basic') -> dict:
     return scrape_url_basic(url)
 
 
-def scrape_url_basic(url: str) -> dict:
-    """Basic scraping using requests + BeautifulSoup. Fast but no JS support."""
+def get_session() -> requests.Session:
+    """
+    Shared HTTP session, so repeated and concurrent imports reuse connections
+    (pool sized for batch imports)
+    """
+    global _session
+    if _session is None:
+        session = requests.Session()
+        session.headers['User-Agent'] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _session = session
+    return _session
+
+
+def fetch_url(url: str, etag: str = None, last_modified: str = None) -> dict:
+    """
+    Download a page, conditionally if validators from an earlier fetch are given.
+    
+    Returns:
+        dict with success, not_modified (304), url (after redirects), content_type,
+        html, body_hash (sha256 of the raw body), etag and last_modified; or error
+        (and retryable for transient failures)
+    """
     try:
         parsed = urlparse(url)
         if parsed.scheme not in ['http', 'https']:
             return {'success': False, 'error': 'Only HTTP/HTTPS supported'}
         
-        resp = requests.get(url, headers={'User-Agent': USER_AGENT}, timeout=REQUEST_TIMEOUT)
-        resp.raise_for_status()
-        
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        for el in soup(['script', 'style', 'nav', 'footer', 'header', 'aside']):
-            el.decompose()
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
         
-        title = clean_text(soup.title.string) if soup.title else 'Imported'
-        
-        # Find main content
-        content = ''
-        for sel in ['main', 'article', '.content', '#content', '.post', '.entry']:
-            el = soup.select_one(sel)
-            if el:
-                content = clean_text(el.get_text('\n'))
-                if len(content) > 100:
-                    break
-        
-        if not content and soup.body:
-            content = clean_text(soup.body.get_text('\n'))
-        
-        if len(content) < 50:
-            return {'success': False, 'error': 'No meaningful content found. Try Advanced mode for JS-heavy sites.'}
+        resp = get_session().get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        resp.raise_for_status()
         
-        if len(content) > MAX_CONTENT_LENGTH:
-            content = content[:MAX_CONTENT_LENGTH] + '\n[truncated]'
+        if resp.status_code == 304:
+            return {'success': True, 'not_modified': True}
         
-        return {'success': True, 'title': title[:200], 'content': content, 'source_url': url, 'mode': 'basic'}
+        return {
+            'success': True,
+            'not_modified': False,
+            'url': resp.url,
+            'content_type': resp.headers.get('Content-Type', ''),
+            'html': resp.text,
+            'body_hash': hashlib.sha256(resp.content).hexdigest(),
+            'etag': resp.headers.get('ETag'),
+            'last_modified': resp.headers.get('Last-Modified'),
+        }
         
     except requests.exceptions.Timeout:
-        return {'success': False, 'error': 'Request timed out'}
+        return {'success': False, 'error': 'Request timed out', 'retryable': True}
+    except requests.exceptions.HTTPError as e:
+        code = e.response.status_code
+        return {'success': False, 'error': f'Request failed: {str(e)[:80]}', 'retryable': code == 429 or code >= 500}
+    except requests.exceptions.ConnectionError as e:
+        return {'success': False, 'error': f'Request failed: {str(e)[:80]}', 'retryable': True}
     except requests.exceptions.RequestException as e:
         return {'success': False, 'error': f'Request failed: {str(e)[:80]}'}
     except Exception as e:
         return {'success': False, 'error': str(e)[:100]}
 
 
+def extract_links(soup: BeautifulSoup) -> dict:
+    """Link targets (as written in the page) and the declared canonical URL"""
+    canonical = soup.find('link', rel='canonical', href=True)
+    return {
+        'links': [a['href'] for a in soup.find_all('a', href=True)],
+        'canonical': canonical['href'] if canonical else None,
+    }
+
+
+def parse_html(html: str, url: str, with_links: bool = False) -> dict:
+    """
+    Extract the title and main text of a page. Returns the same dict as scrape_url.
+    
+    With with_links, the result also has links and canonical (see extract_links),
+    even when no meaningful content was found, so crawls can pass through index pages.
+    """
+    try:
+        soup = BeautifulSoup(html, 'html.parser')
+        # Before nav/header/footer are dropped: navigation is where most links are
+        links = extract_links(soup) if with_links else None
+        result = _parse_soup(soup, url)
+    except Exception as e:
+        return {'success': False, 'error': str(e)[:100]}
+    
+    if links is not None:
+        result.update(links)
+    return result
+
+
+def _parse_soup(soup: BeautifulSoup, url: str) -> dict:
+    for el in soup(['script', 'style', 'nav', 'footer', 'header', 'aside']):
+        el.decompose()
+    
+    title = _one_line(soup.title.string) if soup.title else 'Imported'
+    
+    # Find main content; headings, paragraphs and table rows are kept for the chunker
+    content = ''
+    for sel in ['main', 'article', '.content', '#content', '.post', '.entry']:
+        el = soup.select_one(sel)
+        if el:
+            content = html_to_text(str(el))
+            if len(content) > 100:
+                break
+    
+    if not content and soup.body:
+        content = html_to_text(str(soup.body))
+    
+    if len(content) < 50:
+        return {'success': False, 'error': 'No meaningful content found. Try Advanced mode for JS-heavy sites.'}
+    
+    if len(content) > MAX_CONTENT_LENGTH:
+        content = content[:MAX_CONTENT_LENGTH] + '\n[truncated]'
+    
+    return {'success': True, 'title': title[:200], 'content': content, 'source_url': url, 'mode': 'basic'}
+
+
+def content_hash(content: str) -> str:
+    """Hash of extracted text, used to detect unchanged pages"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def scrape_url_basic(url: str) -> dict:
+    """
+    Basic scraping using requests + BeautifulSoup. Fast but no JS support.
+    Goes through the fetch cache (conditional GET, parse reuse) when enabled.
+    """
+    if getattr(settings, 'URL_FETCH_CACHE_ENABLED', True):
+        from .fetch_cache import scrape_with_cache
+        return scrape_with_cache(url)
+    
+    fetched = fetch_url(url)
+    if not fetched['success']:
+        return fetched
+    return parse_html(fetched['html'], url)
+
+
 def scrape_url_advanced(url: str) -> dict:
     """
     Advanced scraping using Playwright. Supports JS-heavy sites.
+    Pages are rendered in the shared browser pool (see browser_pool.py).
     Requires Playwright to be installed: pip install playwright && playwright install chromium
     """
     if not PLAYWRIGHT_AVAILABLE:
@@ -107,46 +225,11 @@ def scrape_url_advanced(url: str) -> dict:
         if parsed.scheme not in ['http', 'https']:
             return {'success': False, 'error': 'Only HTTP/HTTPS supported'}
         
-        with sync_playwright() as p:
-            # Launch headless browser
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                user_agent=USER_AGENT,
-                viewport={'width': 1280, 'height': 720}
-            )
-            page = context.new_page()
-            
-            # Navigate and wait for content
-            page.goto(url, wait_until='networkidle', timeout=30000)
-            
-            # Wait a bit for dynamic content
-            page.wait_for_timeout(2000)
-            
-            # Get title
-            title = page.title() or 'Imported'
-            
-            # Try to get main content
-            content = ''
-            
-            # Try common content selectors
-            selectors = ['main', 'article', '.content', '#content', '.post', '.entry', '[role="main"]']
-            for sel in selectors:
-                try:
-                    el = page.query_selector(sel)
-                    if el:
-                        content = clean_text(el.inner_text())
-                        if len(content) > 100:
-                            break
-                except:
-                    continue
-            
-            # Fallback to body
-            if not content or len(content) < 50:
-                body = page.query_selector('body')
-                if body:
-                    content = clean_text(body.inner_text())
-            
-            browser.close()
+        # Shared browser: no per-request Chromium launch, images/fonts/media blocked
+        from .browser_pool import browser_pool
+        title, text = browser_pool.fetch(url)
+        title = title or 'Imported'
+        content = clean_text(text)
         
         if len(content) < 50:
             return {'success': False, 'error': 'No meaningful content found'}
@@ -163,44 +246,10 @@ def scrape_url_advanced(url: str) -> dict:
 
 def summarize_content(content: str, title: str = '') -> str:
     """
-    Summarize/truncate content to a reasonable size for memory storage.
-    This is a simple extraction-based summary, not AI-powered.
+    Summarize content to a reasonable size (SUMMARY_MAX_CHARS) for memory storage.
+    This is an extractive summary (TextRank over TF-IDF sentence vectors, see
+    summarizer), not AI-powered.
     """
-    if not content:
-        return ''
-    
-    # If content is already short enough, return as-is
-    if len(content) <= 2000:
-        return content
-    
-    # Split into paragraphs
-    paragraphs = [p.strip() for p in content.split('\n') if p.strip()]
-    
-    if not paragraphs:
-        return content[:2000] + '\n[truncated]'
-    
-    # Take first few paragraphs that fit within limit
-    summary_parts = []
-    total_length = 0
-    max_length = 2000
-    
-    for para in paragraphs:
-        if total_length + len(para) > max_length:
-            # Add partial paragraph if we have room
-            remaining = max_length - total_length
-            if remaining > 100:
-                summary_parts.append(para[:remaining] + '...')
-            break
-        summary_parts.append(para)
-        total_length += len(para) + 1
-    
-    if not summary_parts:
-        return content[:2000] + '\n[truncated]'
-    
-    result = '\n\n'.join(summary_parts)
-    
-    # Add note if truncated
-    if len(content) > len(result):
-        result += f'\n\n[Content truncated from {len(content)} to {len(result)} characters]'
-    
-    return result
+    from .summarizer import summarize
+
+    return summarize(content, title)
@@ -3,7 +3,7 @@ URL routing for API endpoints - Updated for Frontend Integration
 """
 from django.urls import path
 from . import views
-from . import views_workspace, views_team, views_conversation, views_memory, views_integration, views_settings
+from . import views_workspace, views_team, views_conversation, views_memory, views_integration, views_settings, views_job
 
 urlpatterns = [
     # ============================================
@@ -49,7 +49,10 @@ urlpatterns = [
     # ============================================
     path('workspaces/<str:workspace_id>/memories', views_memory.workspace_memories_view, name='workspace-memories'),
     path('workspaces/<str:workspace_id>/memories/import-url', views_memory.import_from_url_view, name='memory-import-url'),
+    path('workspaces/<str:workspace_id>/memories/import-urls', views_memory.import_from_urls_view, name='memory-import-urls'),
+    path('workspaces/<str:workspace_id>/memories/import-crawl', views_memory.import_crawl_view, name='memory-import-crawl'),
     path('workspaces/<str:workspace_id>/memories/import-file', views_memory.import_from_file_view, name='memory-import-file'),
+    path('workspaces/<str:workspace_id>/memories/import-archive', views_memory.import_archive_view, name='memory-import-archive'),
     path('memories/<str:memory_id>', views_memory.memory_detail_view, name='memory-detail'),
     path('memories/<str:memory_id>/re-embed', views_memory.re_embed_memory_view, name='memory-re-embed'),
     path('memories/search', views_memory.search_memories_view, name='memory-search'),
@@ -62,6 +65,12 @@ urlpatterns = [
     path('integrations/<str:integration_id>/test', views_integration.test_integration_view, name='integration-test'),
     path('models/available', views_integration.available_models_view, name='available-models'),
     
+    # ============================================
+    # BACKGROUND JOB ENDPOINTS
+    # ============================================
+    path('jobs', views_job.jobs_view, name='jobs'),
+    path('jobs/<str:job_id>', views_job.job_detail_view, name='job-detail'),
+    
     # ============================================
     # AUTHENTICATION ENDPOINTS
     # ============================================
@@ -87,6 +96,7 @@ urlpatterns = [
     # HEALTH & UTILITY
     # ============================================
     path('health', views.health_check, name='health'),
+    path('metrics', views.metrics_view, name='metrics'),
     path('hooks/spec-update', views.spec_hook, name='spec-hook'),
     
     # ============================================
@@ -4,7 +4,7 @@ These views maintain backward compatibility with older API clients.
 New code should use the modular view files (views_workspace, views_conversation, etc.)
 """
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 from django.utils import timezone
@@ -42,6 +42,31 @@ def health_check(request):
     }))
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics_view(request):
+    """
+    Runtime metrics for the worker process serving this request
+    (LLM queue depth and wait times per provider, side-effect pipeline, browser
+    pool, file parse cache), plus the shared background job queue
+    """
+    from .llm_scheduler import get_metrics as get_scheduler_metrics
+    from .side_effects import pipeline
+    from .job_queue import get_metrics as get_job_metrics
+    from .browser_pool import browser_pool
+    from .parse_cache import parse_cache
+    
+    return Response(api_response(ok=True, data={
+        'pid': os.getpid(),
+        'timestamp': timezone.now().isoformat(),
+        'llmScheduler': get_scheduler_metrics(),
+        'sideEffects': pipeline.metrics(),
+        'browserPool': browser_pool.metrics(),
+        'parseCache': parse_cache.metrics(),
+        'jobs': get_job_metrics()
+    }))
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def register_view(request):
@@ -4,7 +4,8 @@ Conversation Management Views (Workspace-Scoped)
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import serializers, status
+from django.utils import timezone
 
 from .models import Workspace, Conversation, ChatMessage, Memory, ConversationMemory
 from .serializers_v2 import (
@@ -13,6 +14,9 @@ from .serializers_v2 import (
     MessageCreateSerializer
 )
 from .activity_service import log_conversation_created, log_message_sent
+from .auto_recall import start_recall
+from .memory_extractor import auto_extract_and_save
+from . import side_effects
 
 
 def api_response(ok=True, data=None, error=None):
@@ -20,6 +24,11 @@ def api_response(ok=True, data=None, error=None):
     return {'ok': ok, 'data': data, 'error': error}
 
 
+def touch_conversation(conversation_id):
+    """Bump a conversation's updated_at (deferred from the chat hot path)"""
+    Conversation.objects.filter(id=conversation_id).update(updated_at=timezone.now())
+
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def workspace_conversations_view(request, workspace_id):
@@ -67,6 +76,7 @@ def workspace_conversations_view(request, workspace_id):
                 workspace=workspace,
                 title=serializer.validated_data.get('title', 'New Conversation'),
                 model_id=serializer.validated_data['modelId'],
+                auto_recall=serializer.validated_data['autoRecall'],
                 status='active'
             )
             
@@ -119,6 +129,15 @@ def conversation_detail_view(request, conversation_id):
                 conversation.title = request.data['title']
             if 'status' in request.data:
                 conversation.status = request.data['status']
+            if 'autoRecall' in request.data:
+                # Parsed like the create path: form values such as "false" or "0" are False
+                try:
+                    conversation.auto_recall = serializers.BooleanField().to_internal_value(request.data['autoRecall'])
+                except serializers.ValidationError:
+                    return Response(
+                        api_response(ok=False, error='autoRecall must be a boolean'),
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
             
             conversation.save()
             
@@ -170,6 +189,11 @@ def send_message_view(request, conversation_id):
         
         user_content = serializer.validated_data['content']
         
+        # Auto-recall searches workspace memories in the background while the
+        # message is saved and the provider is looked up
+        get_ai_response = request.data.get('getAiResponse', True)
+        recall = start_recall(conversation, user_content) if get_ai_response else None
+        
         # Create user message
         user_message = ChatMessage.objects.create(
             conversation=conversation,
@@ -179,22 +203,18 @@ def send_message_view(request, conversation_id):
             metadata={}
         )
         
-        # Update conversation timestamp
-        conversation.save(update_fields=['updated_at'])
-        
-        # Log activity
-        log_message_sent(workspace, conversation, user_message)
+        # Conversation timestamp and activity log are written after the
+        # response is sent (side-effect pipeline)
+        side_effects.defer(touch_conversation, conversation.id)
+        log_message_sent(workspace, conversation, user_message, deferred=True)
         
         # Get AI response if requested (default: True)
-        get_ai_response = request.data.get('getAiResponse', True)
-        
         assistant_message = None
         if get_ai_response:
             try:
                 # Get provider from model_id
-                from .llm_router import get_provider, call_llm_with_conversation
-                from .encryption_service import decrypt_api_key
-                from .models import Integration
+                from .llm_router import get_provider
+                from .llm_failover import get_route_candidates, route_llm_call
                 import logging
                 
                 logger = logging.getLogger(__name__)
@@ -202,78 +222,100 @@ def send_message_view(request, conversation_id):
                 provider = get_provider(conversation.model_id)
                 logger.info(f"🔍 Model ID: {conversation.model_id}, Provider: {provider}")
                 
-                # For echo/local providers, no integration needed
-                if provider in ['echo', 'local']:
-                    api_key = None
-                    logger.info(f"✅ Using {provider} mode (no API key needed)")
-                else:
-                    # Get user's integration for this provider
-                    try:
-                        integration = Integration.objects.get(
-                            user=request.user,
-                            provider=provider,
-                            status='connected'
-                        )
-                        
-                        logger.info(f"✅ Found connected integration for {provider}")
-                        
-                        # Decrypt API key
-                        api_key = decrypt_api_key(integration.api_key)
-                        logger.info(f"✅ API key decrypted successfully")
-                    except Integration.DoesNotExist:
-                        # No integration found for provider
-                        logger.error(f"❌ No connected integration found for provider: {provider}")
-                        response_serializer = MessageSerializer(user_message)
-                        return Response(
-                            api_response(
-                                ok=False,
-                                error=f"No connected integration found for provider: {provider}",
-                                data={'userMessage': response_serializer.data}
-                            ),
-                            status=status.HTTP_400_BAD_REQUEST
-                        )
+                # Conversation's provider first, then the user's other connected
+                # integrations by priority (echo/local need no integration)
+                candidates = get_route_candidates(request.user, conversation)
+                
+                if not candidates:
+                    # No integration found for provider
+                    logger.error(f"❌ No connected integration found for provider: {provider}")
+                    response_serializer = MessageSerializer(user_message)
+                    return Response(
+                        api_response(
+                            ok=False,
+                            error=f"No connected integration found for provider: {provider}",
+                            data={'userMessage': response_serializer.data}
+                        ),
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
                 
-                # Call AI model
-                ai_response = call_llm_with_conversation(
+                # Call AI model (useCache overrides settings.LLM_CACHE_ENABLED;
+                # form values arrive as strings, so "false" must not count as true)
+                use_cache = request.data.get('useCache')
+                if use_cache is not None and not isinstance(use_cache, bool):
+                    use_cache = str(use_cache).lower() == 'true'
+                
+                ai_response = route_llm_call(
                     conversation=conversation,
                     user_message=user_content,
-                    api_key=api_key
+                    candidates=candidates,
+                    use_cache=use_cache,
+                    recall=recall
                 )
                 
                 if ai_response['status'] == 'success':
+                    metadata = {
+                        'tokens': ai_response.get('tokens', 0),
+                        'model_version': ai_response.get('model_used', conversation.model_id),
+                        'provider': ai_response.get('provider', provider)
+                    }
+                    if ai_response.get('cached'):
+                        metadata['cached'] = True
+                        metadata['cached_at'] = ai_response.get('cached_at')
+                    if ai_response.get('failover'):
+                        metadata['failover'] = True
+                    metadata['attempts'] = ai_response.get('attempts', [])
+                    if ai_response.get('prompt_cache'):
+                        metadata['prompt_cache'] = ai_response['prompt_cache']
+                    if ai_response.get('recalled_memories'):
+                        metadata['recalled_memories'] = ai_response['recalled_memories']
+                    
                     # Create assistant message
                     assistant_message = ChatMessage.objects.create(
                         conversation=conversation,
                         role='assistant',
                         content=ai_response['reply'],
                         is_pinned=False,
-                        metadata={
-                            'tokens': ai_response.get('tokens', 0),
-                            'model_version': ai_response.get('model_used', conversation.model_id),
-                            'provider': ai_response.get('provider', provider)
-                        }
+                        metadata=metadata
                     )
                     
-                    # Log activity
-                    log_message_sent(workspace, conversation, assistant_message)
+                    # Activity log, memory extraction and load snapshot run in the background
+                    log_message_sent(workspace, conversation, assistant_message, deferred=True)
+                    if request.user.auto_store:
+                        side_effects.defer(
+                            auto_extract_and_save, user_content, assistant_message.content,
+                            conversation, metadata['model_version']
+                        )
+                    side_effects.defer_load_snapshot(workspace)
                 else:
                     # AI call failed, return error in response
                     error_msg = ai_response.get('error', 'AI call failed')
                     response_serializer = MessageSerializer(user_message)
                     
-                    # Use 429 for rate limits, 502 for provider errors
-                    if 'rate limit' in error_msg.lower() or '429' in error_msg:
+                    # 429 for rate limits, 503 while the provider circuit is open or
+                    # its queue is saturated, 502 for other provider errors
+                    if ai_response.get('rate_limited'):
                         http_status = status.HTTP_429_TOO_MANY_REQUESTS
+                    elif ai_response.get('circuit_open') or ai_response.get('overloaded'):
+                        http_status = status.HTTP_503_SERVICE_UNAVAILABLE
                     else:
                         http_status = status.HTTP_502_BAD_GATEWAY
                     
+                    headers = None
+                    if ai_response.get('retry_after'):
+                        headers = {'Retry-After': str(int(ai_response['retry_after']))}
+                    
                     return Response(
                         api_response(
                             ok=False,
                             error=f"AI response failed: {error_msg}",
-                            data={'userMessage': response_serializer.data}
+                            data={
+                                'userMessage': response_serializer.data,
+                                'attempts': ai_response.get('attempts', [])
+                            }
                         ),
-                        status=http_status
+                        status=http_status,
+                        headers=headers
                     )
             
             except Exception as e:
@@ -25,7 +25,7 @@ def integrations_view(request):
     POST: Create new integration
     """
     if request.method == 'GET':
-        integrations = Integration.objects.filter(user=request.user)
+        integrations = Integration.objects.filter(user=request.user).order_by('priority', 'created_at')
         serializer = IntegrationSerializer(integrations, many=True)
         
         return Response(api_response(
@@ -49,6 +49,7 @@ def integrations_view(request):
         api_key = serializer.validated_data['apiKey']
         model_id = serializer.validated_data.get('modelId')
         model_name = serializer.validated_data.get('modelName')
+        priority = serializer.validated_data.get('priority', 0)
         
         # Check if integration already exists
         if Integration.objects.filter(user=request.user, provider=provider).exists():
@@ -74,6 +75,7 @@ def integrations_view(request):
             model_id=model_id,
             model_name=model_name,
             api_key=encrypted_key,
+            priority=priority,
             status='connected' if test_result['success'] else 'error',
             last_tested=timezone.now(),
             error_message=test_result.get('error')
@@ -124,6 +126,16 @@ def integration_detail_view(request, integration_id):
             if 'modelName' in request.data:
                 integration.model_name = request.data['modelName']
             
+            # Update failover order if provided
+            if 'priority' in request.data:
+                try:
+                    integration.priority = int(request.data['priority'])
+                except (TypeError, ValueError):
+                    return Response(
+                        api_response(ok=False, error='priority must be an integer'),
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+            
             integration.save()
             
             serializer = IntegrationSerializer(integration)
@@ -350,7 +362,7 @@ def available_models_view(request):
     and map each to cognitive model object with id, provider, name, 
     displayName, brainRegion, status, and 3D position coordinates
     """
-    from .llm_router import SUPPORTED_MODELS
+    from .llm_router import SUPPORTED_MODELS, DEFAULT_PROVIDER_MODELS
     
     # Get user's connected integrations
     connected_integrations = Integration.objects.filter(
@@ -372,14 +384,7 @@ def available_models_view(request):
         
         # Fallback for legacy integrations without model_id
         if not model_name:
-            default_models = {
-                'openai': 'gpt-4o',
-                'anthropic': 'claude-3.5-sonnet',
-                'google': 'gemini-2.0-flash',
-                'deepseek': 'deepseek-chat',
-                'groq': 'llama-3.3-70b-versatile',
-            }
-            model_name = default_models.get(provider, 'unknown')
+            model_name = DEFAULT_PROVIDER_MODELS.get(provider, 'unknown')
             display_name = model_name.replace('-', ' ').title()
         
         # Create model ID
@@ -0,0 +1,71 @@
+"""
+Background Job Views (status polling for queued work)
+"""
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+
+from .models import Job, Memory
+from .serializers_v2 import JobSerializer, MemorySerializer
+from .job_queue import cancel
+
+
+def api_response(ok=True, data=None, error=None):
+    """Standard API response envelope"""
+    return {'ok': ok, 'data': data, 'error': error}
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def jobs_view(request):
+    """
+    GET: List the current user's recent jobs
+    Optional filters: ?status=running, ?workspaceId=...
+    """
+    jobs = Job.objects.filter(user=request.user)
+    
+    status_filter = request.query_params.get('status')
+    if status_filter:
+        jobs = jobs.filter(status=status_filter)
+    
+    workspace_id = request.query_params.get('workspaceId')
+    if workspace_id:
+        jobs = jobs.filter(workspace_id=workspace_id)
+    
+    serializer = JobSerializer(jobs[:50], many=True)
+    return Response(api_response(ok=True, data={'jobs': serializer.data}))
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def job_detail_view(request, job_id):
+    """
+    GET: Job status, progress and result
+    DELETE: Cancel a job that has not started yet
+    """
+    try:
+        job = Job.objects.get(id=job_id, user=request.user)
+    except Job.DoesNotExist:
+        return Response(
+            api_response(ok=False, error='Job not found'),
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    if request.method == 'DELETE':
+        if not cancel(job.id):
+            return Response(
+                api_response(ok=False, error=f'Job is {job.status} and can no longer be cancelled'),
+                status=status.HTTP_409_CONFLICT
+            )
+        job.refresh_from_db()
+    
+    data = JobSerializer(job).data
+    
+    # Jobs that create a memory (e.g. URL imports) return it once they succeed
+    memory_id = job.result.get('memoryId') if isinstance(job.result, dict) else None
+    if job.status == 'succeeded' and memory_id:
+        memory = Memory.objects.filter(id=memory_id).select_related('workspace').first()
+        data['memory'] = MemorySerializer(memory).data if memory else None
+    
+    return Response(api_response(ok=True, data=data))
@@ -1,14 +1,17 @@
 """
 Memory Management Views (Workspace-Scoped)
 """
+import hashlib
+
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from django.utils import timezone
+from django.conf import settings
 
 from .models import Workspace, Memory
-from .serializers_v2 import MemorySerializer, MemoryCreateSerializer, MemorySearchSerializer
+from .serializers_v2 import MemorySerializer, MemoryCreateSerializer, MemorySearchSerializer, JobSerializer
+from .job_queue import enqueue
 from .memory_service import memory_service
 from .activity_service import log_memory_created
 
@@ -22,7 +25,8 @@ def api_response(ok=True, data=None, error=None):
 @permission_classes([IsAuthenticated])
 def workspace_memories_view(request, workspace_id):
     """
-    GET: List all memories in workspace
+    GET: List all memories in workspace (without document chunks; ?parentId=<id>
+         lists the chunks of one document in order)
     POST: Create new memory in workspace
     """
     try:
@@ -42,6 +46,13 @@ def workspace_memories_view(request, workspace_id):
             # Optimize query with select_related
             memories = workspace.memories.select_related('workspace').all()
             
+            # Chunks of long documents are listed only for their document
+            parent_id = request.query_params.get('parentId')
+            if parent_id:
+                memories = memories.filter(parent_id=parent_id)
+            else:
+                memories = memories.filter(parent__isnull=True)
+            
             # Apply search filter if provided
             search_query = request.query_params.get('search', '')
             if search_query:
@@ -53,7 +64,9 @@ def workspace_memories_view(request, workspace_id):
             
             # Apply sorting
             sort_by = request.query_params.get('sortBy', 'recent')
-            if sort_by == 'title':
+            if parent_id:
+                memories = memories.order_by('chunk_index')
+            elif sort_by == 'title':
                 memories = memories.order_by('title')
             elif sort_by == 'recent':
                 memories = memories.order_by('-updated_at')
@@ -270,6 +283,9 @@ def import_from_url_view(request, workspace_id):
     Modes:
     - basic: Uses requests + BeautifulSoup (fast, lightweight, default)
     - advanced: Uses Playwright (supports JS-heavy sites, requires premium server)
+    
+    With IMPORT_ASYNC (default) the scrape runs as a background job: returns 202
+    with a job id to poll at /jobs/<id>. Otherwise scrapes inline and returns 201.
     """
     try:
         workspace = Workspace.objects.get(id=workspace_id)
@@ -299,86 +315,223 @@ def import_from_url_view(request, workspace_id):
         if scrape_mode not in ['basic', 'advanced']:
             scrape_mode = 'basic'
         
-        # Import the scraper
-        from .url_scraper import scrape_url, summarize_content
+        if getattr(settings, 'IMPORT_ASYNC', True):
+            # Scrape in the background job worker and let the client poll
+            job = enqueue(
+                'imports.url',
+                {'workspace_id': workspace.id, 'url': url, 'summarize': should_summarize, 'mode': scrape_mode},
+                user=request.user,
+                workspace=workspace,
+                dedupe_key=f"imports.url:{workspace.id}:{hashlib.sha256(url.encode('utf-8')).hexdigest()}"
+            )
+            return Response(
+                api_response(ok=True, data={
+                    'jobId': job.id,
+                    'job': JobSerializer(job).data,
+                    'statusUrl': f'/api/jobs/{job.id}'
+                }),
+                status=status.HTTP_202_ACCEPTED
+            )
+        
+        from .import_service import import_url, ScrapeBusy
         
-        # Scrape the URL with specified mode
-        scrape_result = scrape_url(url, mode=scrape_mode)
+        try:
+            result = import_url(workspace, url, should_summarize=should_summarize, mode=scrape_mode)
+        except ScrapeBusy as e:
+            return Response(
+                api_response(ok=False, error=str(e)),
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
         
-        if not scrape_result['success']:
+        if not result['success']:
             return Response(
-                api_response(ok=False, error=scrape_result['error']),
+                api_response(ok=False, error=result['error']),
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Get content
-        title = scrape_result['title']
-        content = scrape_result['content']
-        used_mode = scrape_result.get('mode', 'basic')
-        
-        # Determine URL type from domain
-        from urllib.parse import urlparse
-        parsed_url = urlparse(url)
-        domain = parsed_url.netloc.lower()
-        
-        if 'chatgpt.com' in domain or 'chat.openai.com' in domain:
-            url_type = 'chatgpt'
-        elif 'notion.so' in domain or 'notion.site' in domain:
-            url_type = 'notion'
-        elif 'docs.google.com' in domain:
-            url_type = 'google_docs'
-        elif 'github.com' in domain:
-            url_type = 'github'
-        else:
-            url_type = 'webpage'
-        
-        # Summarize if requested
-        if should_summarize and len(content) > 500:
-            content = summarize_content(content, title)
-        
-        # Generate tags based on URL type and scrape mode
-        tags = ['imported', f'source:{url_type}']
-        if used_mode == 'advanced':
-            tags.append('playwright-scraped')
-        if url_type == 'chatgpt':
-            tags.append('ai-conversation')
-        elif url_type == 'notion':
-            tags.append('documentation')
-        elif url_type == 'google_docs':
-            tags.append('document')
-        elif url_type == 'github':
-            tags.append('code')
-        
-        # Create memory
-        memory = Memory.objects.create(
-            workspace=workspace,
-            title=f"[Imported] {title[:100]}",
-            content=content,
-            tags=tags,
-            metadata={
-                'source_url': url,
-                'source_type': url_type,
-                'scrape_mode': used_mode,
-                'imported_at': str(timezone.now()),
-                'was_summarized': should_summarize and len(scrape_result['content']) > 500
-            }
+        memory = result['memory']
+        serializer = MemorySerializer(memory)
+        unchanged = result.get('unchanged', False)
+        
+        return Response(
+            api_response(ok=True, data={
+                'memory': serializer.data,
+                'source_type': memory.metadata['source_type'],
+                'was_summarized': memory.metadata['was_summarized'],
+                'unchanged': unchanged
+            }),
+            status=status.HTTP_200_OK if unchanged else status.HTTP_201_CREATED
+        )
+    
+    except Workspace.DoesNotExist:
+        return Response(
+            api_response(ok=False, error='Workspace not found'),
+            status=status.HTTP_404_NOT_FOUND
         )
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"Error importing from URL: {str(e)}")
+        return Response(
+            api_response(ok=False, error=f'Import failed: {str(e)}'),
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_from_urls_view(request, workspace_id):
+    """
+    Import many public URLs at once, one memory per page.
+    
+    Request body:
+    {
+        "urls": ["https://...", ...],
+        "summarize": true/false (optional, default true),
+        "mode": "basic" or "advanced" (optional, default "basic")
+    }
+    
+    Pages are fetched concurrently and saved in one transaction. Returns 202 with
+    a job id (per-URL results are in the job result), or 201 with the results
+    when IMPORT_ASYNC is off.
+    """
+    try:
+        workspace = Workspace.objects.get(id=workspace_id)
         
-        # Store in search index
-        memory_service.store(memory.content, memory.id)
+        # Check access
+        is_owner = workspace.owner == request.user
+        is_member = workspace.members.filter(user=request.user).exists()
         
-        # Log activity
-        log_memory_created(workspace, memory)
+        if not (is_owner or is_member):
+            return Response(
+                api_response(ok=False, error='Access denied'),
+                status=status.HTTP_403_FORBIDDEN
+            )
         
-        serializer = MemorySerializer(memory)
+        urls = request.data.get('urls')
+        if not isinstance(urls, list) or not urls or not all(isinstance(url, str) and url for url in urls):
+            return Response(
+                api_response(ok=False, error='urls must be a non-empty list of URLs'),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        max_urls = getattr(settings, 'IMPORT_BATCH_MAX_URLS', 50)
+        if len(urls) > max_urls:
+            return Response(
+                api_response(ok=False, error=f'At most {max_urls} URLs per request'),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        should_summarize = request.data.get('summarize', True)
+        scrape_mode = request.data.get('mode', 'basic')
+        if scrape_mode not in ['basic', 'advanced']:
+            scrape_mode = 'basic'
+        
+        if getattr(settings, 'IMPORT_ASYNC', True):
+            job = enqueue(
+                'imports.url_batch',
+                {'workspace_id': workspace.id, 'urls': urls, 'summarize': should_summarize, 'mode': scrape_mode},
+                user=request.user,
+                workspace=workspace
+            )
+            return Response(
+                api_response(ok=True, data={
+                    'jobId': job.id,
+                    'job': JobSerializer(job).data,
+                    'statusUrl': f'/api/jobs/{job.id}'
+                }),
+                status=status.HTTP_202_ACCEPTED
+            )
         
+        from .import_service import import_urls
+        
+        result = import_urls(workspace, urls, should_summarize=should_summarize, mode=scrape_mode)
+        return Response(api_response(ok=True, data=result), status=status.HTTP_201_CREATED)
+    
+    except Workspace.DoesNotExist:
+        return Response(
+            api_response(ok=False, error='Workspace not found'),
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"Error importing URLs: {str(e)}")
+        return Response(
+            api_response(ok=False, error=f'Import failed: {str(e)}'),
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_crawl_view(request, workspace_id):
+    """
+    Crawl a website (or the pages listed in a sitemap) into memories, one per page.
+    
+    Request body:
+    {
+        "url": "https://docs.example.com/guide/" or ".../sitemap.xml",
+        "maxPages": 100 (optional, capped at CRAWL_MAX_PAGES),
+        "maxDepth": 3 (optional, link depth from the root page),
+        "summarize": true/false (optional, default true)
+    }
+    
+    Only links on the same host and below the root URL's directory are followed,
+    and robots.txt is respected. Always runs as a background job: returns 202
+    with a job id; the job result has page counts, pagesPerSecond and per-page
+    results.
+    """
+    try:
+        workspace = Workspace.objects.get(id=workspace_id)
+        
+        # Check access
+        is_owner = workspace.owner == request.user
+        is_member = workspace.members.filter(user=request.user).exists()
+        
+        if not (is_owner or is_member):
+            return Response(
+                api_response(ok=False, error='Access denied'),
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        url = request.data.get('url')
+        if not url or not isinstance(url, str) or not url.startswith(('http://', 'https://')):
+            return Response(
+                api_response(ok=False, error='An http(s) URL is required'),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        max_pages = request.data.get('maxPages')
+        max_depth = request.data.get('maxDepth')
+        # A crawl needs at least one page; a depth of 0 imports only the root page
+        for name, value, minimum in [('maxPages', max_pages, 1), ('maxDepth', max_depth, 0)]:
+            if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < minimum):
+                return Response(
+                    api_response(ok=False, error=f'{name} must be an integer of at least {minimum}'),
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        job = enqueue(
+            'imports.crawl',
+            {
+                'workspace_id': workspace.id,
+                'url': url,
+                'max_pages': max_pages,
+                'max_depth': max_depth,
+                'summarize': request.data.get('summarize', True)
+            },
+            user=request.user,
+            workspace=workspace,
+            dedupe_key=f"imports.crawl:{workspace.id}:{hashlib.sha256(url.encode('utf-8')).hexdigest()}"
+        )
         return Response(
             api_response(ok=True, data={
-                'memory': serializer.data,
-                'source_type': url_type,
-                'was_summarized': should_summarize and len(scrape_result['content']) > 500
+                'jobId': job.id,
+                'job': JobSerializer(job).data,
+                'statusUrl': f'/api/jobs/{job.id}'
             }),
-            status=status.HTTP_201_CREATED
+            status=status.HTTP_202_ACCEPTED
         )
     
     except Workspace.DoesNotExist:
@@ -389,7 +542,7 @@ def import_from_url_view(request, workspace_id):
     except Exception as e:
         import logging
         logger = logging.getLogger(__name__)
-        logger.error(f"Error importing from URL: {str(e)}")
+        logger.error(f"Error starting site crawl: {str(e)}")
         return Response(
             api_response(ok=False, error=f'Import failed: {str(e)}'),
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -436,12 +589,12 @@ def import_from_file_view(request, workspace_id):
         
         uploaded_file = request.FILES['file']
         filename = uploaded_file.name
-        file_content = uploaded_file.read()
         
         should_summarize = request.data.get('summarize', 'false').lower() == 'true'
         
         # Import the file parser
-        from .file_parser import parse_file, is_supported_file
+        from .file_parser import parse_upload, is_supported_file
+        from .import_service import build_file_memories, save_memories
         
         # Check if file type is supported
         if not is_supported_file(filename):
@@ -450,8 +603,8 @@ def import_from_file_view(request, workspace_id):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Parse the file
-        parse_result = parse_file(filename, file_content)
+        # Parse the file (streamed in chunks, never read into memory whole)
+        parse_result = parse_upload(uploaded_file)
         
         if not parse_result['success']:
             return Response(
@@ -459,51 +612,24 @@ def import_from_file_view(request, workspace_id):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        content = parse_result['content']
-        file_type = parse_result['file_type']
-        
-        # Summarize if requested
-        if should_summarize and len(content) > 500:
-            from .url_scraper import summarize_content
-            content = summarize_content(content, filename)
-        
-        # Generate title from filename
-        title_base = filename.rsplit('.', 1)[0] if '.' in filename else filename
-        title = f"[File] {title_base[:100]}"
-        
-        # Generate tags
-        tags = ['imported', 'file-upload', f'format:{file_type}']
-        
-        # Create memory
-        memory = Memory.objects.create(
-            workspace=workspace,
-            title=title,
-            content=content,
-            tags=tags,
-            metadata={
-                'source_type': 'file',
-                'original_filename': filename,
-                'file_type': file_type,
-                'file_size': len(file_content),
-                'imported_at': str(timezone.now()),
-                'was_summarized': should_summarize and len(parse_result['content']) > 500
-            }
+        # Long documents become a parent record plus chunk memories
+        memories = build_file_memories(
+            workspace, filename, parse_result, uploaded_file.size, should_summarize
         )
+        memory, chunks = memories[0], memories[1:]
         
-        # Store in search index
-        memory_service.store(memory.content, memory.id)
-        
-        # Log activity
-        log_memory_created(workspace, memory)
+        # Saves, indexes and logs the memory (and its chunks)
+        save_memories(workspace, memories)
         
         serializer = MemorySerializer(memory)
         
         return Response(
             api_response(ok=True, data={
                 'memory': serializer.data,
-                'file_type': file_type,
+                'file_type': parse_result['file_type'],
                 'original_filename': filename,
-                'was_summarized': should_summarize and len(parse_result['content']) > 500
+                'was_summarized': memory.metadata['was_summarized'],
+                'chunks': len(chunks)
             }),
             status=status.HTTP_201_CREATED
         )
@@ -521,3 +647,92 @@ def import_from_file_view(request, workspace_id):
             api_response(ok=False, error=f'Import failed: {str(e)}'),
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_archive_view(request, workspace_id):
+    """
+    Import every supported file of a zip or tar archive, one memory per file.
+    
+    Request: multipart/form-data with 'file' field (.zip, .tar, .tar.gz, .tgz,
+    .tar.bz2, .tar.xz)
+    Optional: 'summarize' boolean field (default: false)
+    
+    Files are parsed as in import-file; unsupported and hidden files are
+    skipped. Always runs as a background job: returns 202 with a job id; the job
+    result has file counts, filesPerSecond and per-file results.
+    """
+    try:
+        workspace = Workspace.objects.get(id=workspace_id)
+        
+        # Check access
+        is_owner = workspace.owner == request.user
+        is_member = workspace.members.filter(user=request.user).exists()
+        
+        if not (is_owner or is_member):
+            return Response(
+                api_response(ok=False, error='Access denied'),
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        if 'file' not in request.FILES:
+            return Response(
+                api_response(ok=False, error='No file uploaded'),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        from .archive_import import archive_extension, store_archive, delete_archive
+        
+        uploaded_file = request.FILES['file']
+        if not archive_extension(uploaded_file.name):
+            return Response(
+                api_response(ok=False, error='Unsupported archive type. Supported: .zip, .tar, .tar.gz, .tgz, .tar.bz2, .tar.xz'),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        max_size = getattr(settings, 'ARCHIVE_IMPORT_MAX_SIZE', 200 * 1024 * 1024)
+        if uploaded_file.size > max_size:
+            return Response(
+                api_response(ok=False, error=f'Archive too large. Maximum size is {max_size // (1024*1024)}MB'),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        upload = store_archive(uploaded_file, user=request.user)
+        try:
+            job = enqueue(
+                'imports.archive',
+                {
+                    'workspace_id': workspace.id,
+                    'upload_id': upload.id,
+                    'filename': uploaded_file.name,
+                    'summarize': request.data.get('summarize', 'false').lower() == 'true'
+                },
+                user=request.user,
+                workspace=workspace
+            )
+        except Exception:
+            delete_archive(upload.id)
+            raise
+        return Response(
+            api_response(ok=True, data={
+                'jobId': job.id,
+                'job': JobSerializer(job).data,
+                'statusUrl': f'/api/jobs/{job.id}'
+            }),
+            status=status.HTTP_202_ACCEPTED
+        )
+    
+    except Workspace.DoesNotExist:
+        return Response(
+            api_response(ok=False, error='Workspace not found'),
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"Error importing archive: {str(e)}")
+        return Response(
+            api_response(ok=False, error=f'Import failed: {str(e)}'),
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
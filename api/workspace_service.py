@@ -26,8 +26,8 @@ def calculate_workspace_stats(workspace):
     
     Requirements: 2.6, 8.1, 8.4
     """
-    # Calculate totalMemories (count of workspace memories)
-    total_memories = workspace.memories.count()
+    # Calculate totalMemories (count of workspace memories; document chunks are not counted)
+    total_memories = workspace.memories.filter(parent__isnull=True).count()
     
     # Calculate totalEmbeddings (count of memories with non-null embedding)
     total_embeddings = workspace.memories.filter(embedding__isnull=False).count()
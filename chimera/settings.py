@@ -2,6 +2,7 @@
 Django settings for chimera project.
 """
 import os
+import json
 from pathlib import Path
 from dotenv import load_dotenv
 import dj_database_url
@@ -87,6 +88,170 @@ else:
         }
     }
 
+# Cache
+# Redis is used when REDIS_URL is set so state is shared across gunicorn workers.
+# Without it each worker gets its own in-memory cache (fine for local development).
+REDIS_URL = os.getenv('REDIS_URL')
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', 1000))
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+        'llm': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'llm',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'chimera-default',
+        },
+        'llm': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'chimera-llm',
+            'OPTIONS': {'MAX_ENTRIES': LLM_CACHE_MAX_ENTRIES},
+        },
+    }
+
+# LLM response cache (opt-in)
+# Identical requests (same provider, model, messages and generation params)
+# within a workspace are answered from cache instead of calling the provider
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'False') == 'True'
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', 3600))
+
+# Per-conversation cache of the rendered memory block and recent history.
+# On by default only with REDIS_URL: a per-process cache goes stale when other
+# gunicorn workers or the job worker change a conversation or its memories.
+CONTEXT_CACHE_ENABLED = os.getenv('CONTEXT_CACHE_ENABLED', 'True' if REDIS_URL else 'False') == 'True'
+CONTEXT_CACHE_TTL = int(os.getenv('CONTEXT_CACHE_TTL', 1800))
+
+# Auto-recall: search workspace memories on each turn of conversations with
+# auto_recall enabled, in parallel with the rest of the request
+AUTO_RECALL_TIMEOUT_MS = int(os.getenv('AUTO_RECALL_TIMEOUT_MS', 20))
+AUTO_RECALL_TOP_K = int(os.getenv('AUTO_RECALL_TOP_K', 3))
+AUTO_RECALL_MIN_SCORE = float(os.getenv('AUTO_RECALL_MIN_SCORE', 0.2))
+AUTO_RECALL_WORKERS = int(os.getenv('AUTO_RECALL_WORKERS', 4))
+
+# Provider-side prompt caching of the system prompt + injected memories prefix
+LLM_PROMPT_CACHE_MIN_TOKENS = int(os.getenv('LLM_PROMPT_CACHE_MIN_TOKENS', 1024))  # smallest cacheable prefix
+LLM_PROMPT_CACHE_TTL = int(os.getenv('LLM_PROMPT_CACHE_TTL', 300))  # provider cache lifetime (seconds)
+
+# LLM failover and hedging
+# When a provider fails the chat turn is retried on the user's other connected
+# integrations (ordered by Integration.priority). Hedging additionally fires the
+# next integration when the first has not answered within its p95 latency.
+LLM_FAILOVER_ENABLED = os.getenv('LLM_FAILOVER_ENABLED', 'True') == 'True'
+LLM_HEDGE_ENABLED = os.getenv('LLM_HEDGE_ENABLED', 'False') == 'True'
+LLM_HEDGE_DEFAULT_DELAY = float(os.getenv('LLM_HEDGE_DEFAULT_DELAY', 10))  # seconds, until enough samples exist
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv('LLM_HEDGE_MIN_SAMPLES', 20))
+LLM_HEDGE_WORKERS = int(os.getenv('LLM_HEDGE_WORKERS', 8))
+
+# LLM provider rate limits and circuit breaker (state shared through CACHES)
+# LLM_RATE_LIMITS: JSON object of requests per minute per provider, e.g. {"groq": 30}
+LLM_RATE_LIMITS = json.loads(os.getenv('LLM_RATE_LIMITS', '{"google": 15, "groq": 30}'))
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('LLM_CIRCUIT_FAILURE_THRESHOLD', 5))
+LLM_CIRCUIT_COOLDOWN = int(os.getenv('LLM_CIRCUIT_COOLDOWN', 30))  # seconds, doubles on failed probes
+LLM_CIRCUIT_PROBE_TIMEOUT = int(os.getenv('LLM_CIRCUIT_PROBE_TIMEOUT', 60))
+
+# LLM scheduler (per process): concurrency cap per provider, fair share across workspaces
+# LLM_SCHEDULER_CONCURRENCY: JSON object of max concurrent calls per provider, e.g. {"openai": 8}
+# LLM_SCHEDULER_WEIGHTS: JSON object of workspace id -> weight (default 1)
+LLM_SCHEDULER_DEFAULT_CONCURRENCY = int(os.getenv('LLM_SCHEDULER_DEFAULT_CONCURRENCY', 4))
+LLM_SCHEDULER_CONCURRENCY = json.loads(os.getenv('LLM_SCHEDULER_CONCURRENCY', '{}'))
+LLM_SCHEDULER_WEIGHTS = json.loads(os.getenv('LLM_SCHEDULER_WEIGHTS', '{}'))
+LLM_SCHEDULER_MAX_QUEUE = int(os.getenv('LLM_SCHEDULER_MAX_QUEUE', 32))
+LLM_SCHEDULER_QUEUE_TIMEOUT = float(os.getenv('LLM_SCHEDULER_QUEUE_TIMEOUT', 15))  # seconds
+
+# Extra OpenAI-compatible providers (e.g. a local server for load tests)
+# LLM_EXTRA_PROVIDERS: JSON object, e.g. {"local": {"base_url": "http://127.0.0.1:8089/v1", "models": ["local-model"]}}
+LLM_EXTRA_PROVIDERS = json.loads(os.getenv('LLM_EXTRA_PROVIDERS', '{}'))
+
+# Record/replay provider traffic for reproducible benchmarks: off, record or replay
+LLM_CASSETTE_MODE = os.getenv('LLM_CASSETTE_MODE', 'off')
+LLM_CASSETTE_PATH = os.getenv('LLM_CASSETTE_PATH', str(BASE_DIR / 'cassettes' / 'llm.jsonl'))
+LLM_CASSETTE_LATENCY_SCALE = float(os.getenv('LLM_CASSETTE_LATENCY_SCALE', 1.0))  # 0 = replay without delay
+
+# Post-commit side-effect pipeline (activity log, memory extraction, load snapshots,
+# search index updates). SIDE_EFFECTS_ASYNC=False runs them inline after commit.
+SIDE_EFFECTS_ASYNC = os.getenv('SIDE_EFFECTS_ASYNC', 'True') == 'True'
+SIDE_EFFECTS_WORKERS = int(os.getenv('SIDE_EFFECTS_WORKERS', 2))
+SIDE_EFFECTS_MAX_QUEUE = int(os.getenv('SIDE_EFFECTS_MAX_QUEUE', 1000))
+SIDE_EFFECTS_BATCH_SIZE = int(os.getenv('SIDE_EFFECTS_BATCH_SIZE', 50))
+SIDE_EFFECTS_SNAPSHOT_INTERVAL = int(os.getenv('SIDE_EFFECTS_SNAPSHOT_INTERVAL', 300))  # seconds per workspace
+
+# Database-backed background jobs, run by `manage.py run_worker`
+JOB_RETRY_BACKOFF = int(os.getenv('JOB_RETRY_BACKOFF', 10))  # seconds, doubles per attempt
+JOB_RETRY_BACKOFF_MAX = int(os.getenv('JOB_RETRY_BACKOFF_MAX', 3600))
+JOB_LOCK_TIMEOUT = int(os.getenv('JOB_LOCK_TIMEOUT', 900))  # seconds without progress before a job is requeued
+JOB_RETENTION_DAYS = int(os.getenv('JOB_RETENTION_DAYS', 7))
+
+# URL imports. IMPORT_ASYNC=False scrapes inside the request (no worker needed).
+IMPORT_ASYNC = os.getenv('IMPORT_ASYNC', 'True') == 'True'
+IMPORT_MAX_CONCURRENT_SCRAPES = int(os.getenv('IMPORT_MAX_CONCURRENT_SCRAPES', 4))  # per process
+IMPORT_MAX_SCRAPES_PER_DOMAIN = int(os.getenv('IMPORT_MAX_SCRAPES_PER_DOMAIN', 2))  # per process
+IMPORT_DOMAIN_WAIT = float(os.getenv('IMPORT_DOMAIN_WAIT', 5))  # seconds to wait for a domain slot
+IMPORT_DOMAIN_RETRY_DELAY = int(os.getenv('IMPORT_DOMAIN_RETRY_DELAY', 10))  # seconds before a busy job retries
+IMPORT_BATCH_MAX_URLS = int(os.getenv('IMPORT_BATCH_MAX_URLS', 50))
+IMPORT_BATCH_CONCURRENCY = int(os.getenv('IMPORT_BATCH_CONCURRENCY', 16))  # fetches in flight per batch
+IMPORT_BATCH_PER_HOST = int(os.getenv('IMPORT_BATCH_PER_HOST', 4))  # fetches in flight per host per batch
+CRAWL_MAX_PAGES = int(os.getenv('CRAWL_MAX_PAGES', 500))  # page budget cap for site crawl imports
+CRAWL_CONCURRENCY = int(os.getenv('CRAWL_CONCURRENCY', 8))  # fetches in flight per crawl
+CRAWL_PER_HOST = int(os.getenv('CRAWL_PER_HOST', 4))  # fetches in flight per host per crawl
+CRAWL_HOST_DELAY = float(os.getenv('CRAWL_HOST_DELAY', 0.1))  # seconds between requests to a host (robots.txt Crawl-delay wins if longer)
+CRAWL_BATCH_SIZE = int(os.getenv('CRAWL_BATCH_SIZE', 25))  # pages per memory insert
+URL_FETCH_CACHE_ENABLED = os.getenv('URL_FETCH_CACHE_ENABLED', 'True') == 'True'  # conditional GET + parse reuse
+URL_FETCH_CACHE_DAYS = int(os.getenv('URL_FETCH_CACHE_DAYS', 30))  # drop entries not requested for this long
+
+# Periodic re-sync of memories imported from URLs (the imports.resync job)
+RESYNC_ENABLED = os.getenv('RESYNC_ENABLED', 'True') == 'True'
+RESYNC_INTERVAL = int(os.getenv('RESYNC_INTERVAL', 3600))  # seconds between runs
+RESYNC_MIN_AGE = int(os.getenv('RESYNC_MIN_AGE', 24 * 3600))  # seconds before a URL is checked again
+RESYNC_DAILY_BUDGET = int(os.getenv('RESYNC_DAILY_BUDGET', 500))  # fetches per day, spread over the runs
+RESYNC_DOMAIN_DELAY = float(os.getenv('RESYNC_DOMAIN_DELAY', 1.0))  # seconds between requests to one domain
+RESYNC_MAX_PER_DOMAIN = int(os.getenv('RESYNC_MAX_PER_DOMAIN', 20))  # fetches per domain per run
+RESYNC_INCLUDE_ADVANCED = os.getenv('RESYNC_INCLUDE_ADVANCED', 'False') == 'True'  # re-render Playwright imports
+# File imports are parsed as a stream: peak memory is a few chunks, and the
+# extracted text is capped at FILE_IMPORT_MAX_CHARS
+FILE_IMPORT_MAX_SIZE = int(os.getenv('FILE_IMPORT_MAX_SIZE', 50 * 1024 * 1024))  # bytes per upload
+FILE_IMPORT_CHUNK_SIZE = int(os.getenv('FILE_IMPORT_CHUNK_SIZE', 64 * 1024))
+FILE_IMPORT_MAX_CHARS = int(os.getenv('FILE_IMPORT_MAX_CHARS', 500000))
+# Single-byte code pages guessed, in order of preference, for text files that are not UTF-8
+FILE_IMPORT_FALLBACK_ENCODINGS = json.loads(os.getenv('FILE_IMPORT_FALLBACK_ENCODINGS', '["cp1252", "cp1250", "cp1251", "koi8_r"]'))
+# Long PDFs are extracted on a process pool (each worker costs ~40MB)
+PDF_EXTRACT_WORKERS = int(os.getenv('PDF_EXTRACT_WORKERS', min(2, os.cpu_count() or 1)))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', 16))  # fewer pages: extract in the request thread
+PDF_PAGES_PER_TASK = int(os.getenv('PDF_PAGES_PER_TASK', 16))
+PDF_TIME_BUDGET = float(os.getenv('PDF_TIME_BUDGET', 30))  # seconds per document; pages done by then are kept
+# Extracted text of PDF/DOCX uploads, keyed by file content (shared by processes on the host)
+PARSE_CACHE_ENABLED = os.getenv('PARSE_CACHE_ENABLED', 'True') == 'True'
+PARSE_CACHE_DIR = os.getenv('PARSE_CACHE_DIR', str(BASE_DIR / 'cache' / 'parsed'))
+PARSE_CACHE_MAX_BYTES = int(os.getenv('PARSE_CACHE_MAX_BYTES', 256 * 1024 * 1024))  # least recently used entries go first
+# Uploads larger than this are spooled to a temporary file instead of memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv('FILE_UPLOAD_MAX_MEMORY_SIZE', 1024 * 1024))
+# Zip/tar uploads are stored in the database until the imports.archive job has read them
+ARCHIVE_IMPORT_MAX_SIZE = int(os.getenv('ARCHIVE_IMPORT_MAX_SIZE', 200 * 1024 * 1024))  # bytes per upload
+ARCHIVE_IMPORT_MAX_FILES = int(os.getenv('ARCHIVE_IMPORT_MAX_FILES', 2000))  # files imported per archive
+ARCHIVE_IMPORT_MAX_TOTAL_SIZE = int(os.getenv('ARCHIVE_IMPORT_MAX_TOTAL_SIZE', 1024 * 1024 * 1024))  # uncompressed bytes
+ARCHIVE_IMPORT_WORKERS = int(os.getenv('ARCHIVE_IMPORT_WORKERS', 4))  # files parsed at once
+ARCHIVE_IMPORT_BATCH_SIZE = int(os.getenv('ARCHIVE_IMPORT_BATCH_SIZE', 50))  # files per memory insert
+SUMMARY_MAX_CHARS = int(os.getenv('SUMMARY_MAX_CHARS', 2000))  # extractive summaries of imported content
+# Imported documents this long are stored as a summary parent plus chunk memories
+CHUNKING_MIN_LENGTH = int(os.getenv('CHUNKING_MIN_LENGTH', 4000))  # characters
+CHUNK_MAX_CHARS = int(os.getenv('CHUNK_MAX_CHARS', 2000))  # target characters per chunk
+CHUNK_OVERLAP = int(os.getenv('CHUNK_OVERLAP', 200))  # characters repeated between consecutive chunks
+
+# Shared headless Chromium for advanced (Playwright) imports, one per process
+BROWSER_POOL_MAX_PAGES = int(os.getenv('BROWSER_POOL_MAX_PAGES', 4))  # pages open at once
+BROWSER_POOL_BROWSER_PAGES = int(os.getenv('BROWSER_POOL_BROWSER_PAGES', 500))  # pages before the browser restarts
+BROWSER_POOL_IDLE_TIMEOUT = int(os.getenv('BROWSER_POOL_IDLE_TIMEOUT', 300))  # seconds idle before the browser closes
+BROWSER_POOL_BLOCKED_RESOURCES = json.loads(os.getenv('BROWSER_POOL_BLOCKED_RESOURCES', '["image", "font", "media"]'))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {